@@ -0,0 +1,73 @@
+"""
+記事スナップショット
+速報版・深掘り版の両パイプラインで同じ記事セットを共有するため、
+取得済み記事をタイムスタンプ付きで保存し、有効期限内は再取得せずに読み込む。
+"""
+
+import hashlib
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import config
+from cache_utils import load_json, save_json
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+
+class ArticleSnapshot:
+    """fetch_rss_feeds の結果を取得条件ごとに保存・再利用する"""
+
+    def __init__(self, path: Optional[str] = None, ttl_sec: Optional[int] = None):
+        self.path = path or config.ARTICLE_SNAPSHOT_PATH
+        self.ttl_sec = config.ARTICLE_SNAPSHOT_TTL_SEC if ttl_sec is None else ttl_sec
+
+    @staticmethod
+    def make_key(feed_urls: List[str], **params: Any) -> str:
+        """フィード一覧と取得パラメータからスナップショットの識別キーを作る"""
+        parts = [f"{k}={params[k]}" for k in sorted(params)] + list(feed_urls)
+        return hashlib.sha256("\n".join(parts).encode('utf-8')).hexdigest()[:16]
+
+    def load(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """有効期限内かつ同一条件のスナップショットがあれば記事リストを返す"""
+        if self.ttl_sec <= 0:
+            return None
+        data = load_json(self.path, None)
+        if not data or data.get('version') != SNAPSHOT_VERSION or data.get('key') != key:
+            return None
+
+        created_at = datetime.fromisoformat(data['created_at'])
+        age = (datetime.now(timezone.utc) - created_at).total_seconds()
+        if age > self.ttl_sec:
+            logger.info("記事スナップショット期限切れ (%.0f秒経過)、再取得します", age)
+            return None
+
+        logger.info(
+            "記事スナップショットを使用: %s作成 (%d記事, %.0f秒前)",
+            data['created_at'], len(data['articles']), age,
+        )
+        return [
+            dict(a, published_dt=datetime.fromisoformat(a['published_dt']) if a.get('published_dt') else None)
+            for a in data['articles']
+        ]
+
+    def save(self, key: str, articles: List[Dict[str, Any]]) -> None:
+        """記事リストをスナップショットとして保存する"""
+        if self.ttl_sec <= 0 or not articles:
+            return
+        data = {
+            'version': SNAPSHOT_VERSION,
+            'key': key,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'articles': [
+                dict(a, published_dt=a['published_dt'].isoformat() if a.get('published_dt') else None)
+                for a in articles
+            ],
+        }
+        try:
+            save_json(self.path, data)
+            logger.info("記事スナップショットを保存: %s (%d記事)", self.path, len(articles))
+        except OSError as e:
+            logger.warning("記事スナップショット保存エラー: %s", e)
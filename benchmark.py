@@ -0,0 +1,345 @@
+"""
+性能ベンチマークスクリプト
+
+合成データで処理時間を計測し、件数に対するスケーリングを確認する（ネットワーク・API呼び出しなし）。
+
+使い方:
+    python benchmark.py            # 全ベンチマーク
+    python benchmark.py dedup      # 指定したベンチマークのみ
+"""
+
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from difflib import SequenceMatcher
+from typing import Callable, Dict, List, Tuple
+
+import config
+import pronunciation
+from content_manager import ContentManager
+from script_generator import ScriptGenerator, ScriptLine
+
+BENCHMARKS: Dict[str, Callable[[], None]] = {}
+
+
+def benchmark(name: str):
+    """ベンチマーク関数を登録するデコレータ"""
+    def register(func: Callable[[], None]) -> Callable[[], None]:
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def _timed(func: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+# ── 重複排除 ──────────────────────────────────────────
+
+def _zipf_words(rng: random.Random, alphabet: str, count: int, length: Tuple[int, int]) -> List[str]:
+    return ["".join(rng.choices(alphabet, k=rng.randint(*length))) for _ in range(count)]
+
+
+def _synthetic_titles(n: int, seed: int = 0) -> List[str]:
+    """日英混在の合成タイトルを生成する（語の出現頻度は Zipf 分布、約2割は既存タイトルの表記ゆれ）"""
+    rng = random.Random(seed)
+    kanji_kana = "".join(chr(c) for c in range(0x4E00, 0x4E00 + 2000)) + "".join(
+        chr(c) for c in range(0x3041, 0x3097))
+    ja_words = _zipf_words(rng, kanji_kana, 3000, (2, 4))
+    en_words = _zipf_words(rng, "abcdefghijklmnopqrstuvwxyz", 3000, (2, 9))
+    weights = [1 / (rank + 1) for rank in range(3000)]
+
+    titles: List[str] = []
+    for _ in range(n):
+        if titles and rng.random() < 0.2:
+            base = list(rng.choice(titles))
+            for _ in range(rng.randint(1, 3)):
+                base[rng.randrange(len(base))] = rng.choice("、 新")
+            titles.append("".join(base))
+        elif rng.random() < 0.6:
+            titles.append("".join(rng.choices(ja_words, weights, k=rng.randint(5, 9))))
+        else:
+            titles.append(" ".join(rng.choices(en_words, weights, k=rng.randint(6, 10))))
+    return titles
+
+
+def _legacy_dedup(titles: List[str], threshold: float = 0.75) -> int:
+    """旧実装（SequenceMatcher による全ペア比較）"""
+    kept: List[str] = []
+    for title in titles:
+        if not any(SequenceMatcher(None, title, k).ratio() >= threshold for k in kept):
+            kept.append(title)
+    return len(kept)
+
+
+@benchmark("dedup")
+def bench_dedup() -> None:
+    """_deduplicate_articles のタイトル数に対するスケーリング"""
+    manager = ContentManager.__new__(ContentManager)
+    print("titles     index(s)   kept   legacy(s)  kept")
+    for n in (100, 1000, 10000):
+        titles = _synthetic_titles(n)
+        articles = [{"title": t, "link": f"https://example.com/{i}"} for i, t in enumerate(titles)]
+        result: List = []
+        elapsed = _timed(lambda: result.extend(manager._deduplicate_articles(articles)))
+        if n <= 1000:  # 旧実装は O(n²) のため 1000件まで
+            legacy: List[int] = []
+            legacy_elapsed = _timed(lambda: legacy.append(_legacy_dedup(titles)))
+            print(f"{n:>6} {elapsed:>11.3f} {len(result):>6} {legacy_elapsed:>11.3f} {legacy[0]:>5}")
+        else:
+            print(f"{n:>6} {elapsed:>11.3f} {len(result):>6} {'(skip)':>11}")
+
+
+# ── 日付パース ──────────────────────────────────────────
+
+_DATE_SAMPLES = (
+    lambda dt: {'published': dt.strftime("%a, %d %b %Y %H:%M:%S +0900"),
+                'published_parsed': dt.utctimetuple()},
+    lambda dt: {'updated': dt.strftime("%Y-%m-%dT%H:%M:%S+09:00"),
+                'updated_parsed': dt.utctimetuple()},
+    lambda dt: {'published': dt.strftime("%a, %d %b %Y %H:%M:%S +0000")},
+    lambda dt: {'published': dt.strftime("%Y-%m-%dT%H:%M:%S+0900")},
+    lambda dt: {'published': dt.strftime("%Y-%m-%dT%H:%M:%S.%f+0000")},
+    lambda dt: {'updated': dt.strftime("%Y-%m-%d %H:%M:%S")},
+)
+
+
+def _synthetic_feeds(feeds: int, entries: int, seed: int = 0) -> List[Tuple[str, List[dict]]]:
+    """フィードごとに1種類の日付形式を持つ合成エントリ群を生成する"""
+    rng = random.Random(seed)
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    corpus = []
+    for i in range(feeds):
+        make = _DATE_SAMPLES[i % len(_DATE_SAMPLES)]
+        items = [make(base + timedelta(minutes=rng.randint(0, 500000))) for _ in range(entries)]
+        corpus.append((f"https://feed{i}.example.com/rss", items))
+    return corpus
+
+
+def _legacy_parse_date(entry: dict):
+    """旧実装（毎回すべての方法を順に試す）"""
+    import calendar
+    for field in ('published_parsed', 'updated_parsed'):
+        if entry.get(field):
+            return datetime.fromtimestamp(calendar.timegm(entry[field]), tz=timezone.utc)
+    raw = entry.get('published') or entry.get('updated', '')
+    for fmt in ("%a, %d %b %Y %H:%M:%S %z", "%Y-%m-%dT%H:%M:%S%z",
+                "%Y-%m-%dT%H:%M:%S.%f%z", "%Y-%m-%d %H:%M:%S"):
+        try:
+            dt = datetime.strptime(raw.strip(), fmt)
+        except ValueError:
+            continue
+        return (dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)).astimezone(timezone.utc)
+    return None
+
+
+@benchmark("dates")
+def bench_dates() -> None:
+    """_parse_published_date（フィードごとの書式記憶）と旧実装の比較"""
+    print("feeds x entries   memoized(s)   legacy(s)")
+    for feeds, entries in ((12, 100), (120, 100), (300, 200)):
+        corpus = _synthetic_feeds(feeds, entries)
+        manager = ContentManager.__new__(ContentManager)
+        manager._date_strategies = {}
+        memo = _timed(lambda: [manager._parse_published_date(e, url) for url, items in corpus for e in items])
+        legacy = _timed(lambda: [_legacy_parse_date(e) for _, items in corpus for e in items])
+        print(f"{feeds:>5} x {entries:<7} {memo:>13.3f} {legacy:>11.3f}")
+
+
+# ── 読み替え辞書 ──────────────────────────────────────────
+
+_SCRIPT_TEMPLATES = (
+    "今日は{0}と{1}の話題から始めましょう。",
+    "{0}（{r}）が発表した新しい{1}について、業界の反応はどうですか？",
+    "そうですね、{0}は{1}の分野で{2}との競争が激しくなっています。",
+    "特に{0}を使った{1}の事例は、日本企業にとっても参考になりそうです。",
+    "ただ、{0}には課題もあって、{1}や{2}への影響を心配する声もありますね。",
+    "なるほど。リスナーの皆さんも、ぜひ{0}のニュースをチェックしてみてください。",
+)
+
+
+def _synthetic_script(chars: int, seed: int = 0) -> List[ScriptLine]:
+    """読み替え辞書の語句を含む合成台本を生成する（約 chars 文字、一部は誤った読み付き）"""
+    rng = random.Random(seed)
+    words = list(pronunciation.load_dictionary(config.PRONUNCIATION_DICT_PATH).entries)
+    script: List[ScriptLine] = []
+    total = 0
+    while total < chars:
+        text = rng.choice(_SCRIPT_TEMPLATES).format(
+            *rng.sample(words, 3), r=rng.choice(("ごよみ", "アヤマリ")),
+        )
+        script.append(ScriptLine(speaker="AB"[len(script) % 2], text=text))
+        total += len(text)
+    return script
+
+
+def _legacy_pronunciation_fixes(mapping: Dict[str, str], script: List[ScriptLine]) -> List[ScriptLine]:
+    """旧実装（語句ごとに正規表現を2つコンパイルして順に置換）"""
+    import re
+    sorted_words = sorted(mapping, key=len, reverse=True)
+    fixed = []
+    for line in script:
+        text = line.text
+        placeholders = {}
+        for idx, word in enumerate(sorted_words):
+            placeholder = f"\x00PH{idx}\x00"
+            text = re.compile(re.escape(word) + r'（[ぁ-ゟァ-ヴーｰA-Za-z\s]+）').sub(placeholder, text)
+            text = re.compile(re.escape(word) + r'(?!（)').sub(placeholder, text)
+            placeholders[placeholder] = f"{word}（{mapping[word]}）"
+        for ph, annotated in placeholders.items():
+            text = text.replace(ph, annotated)
+        fixed.append(ScriptLine(speaker=line.speaker, text=text))
+    return fixed
+
+
+@benchmark("pronunciation")
+def bench_pronunciation() -> None:
+    """_apply_pronunciation_fixes（一括照合パターン）と旧実装の比較"""
+    generator = ScriptGenerator.__new__(ScriptGenerator)
+    mapping = pronunciation.load_dictionary(config.PRONUNCIATION_DICT_PATH).entries
+    print(f"辞書 {len(mapping)}語")
+    print("chars   lines   single-pass(s)   legacy(s)   same")
+    for chars in (1000, 5000, 20000):
+        script = _synthetic_script(chars)
+        result: List = []
+        elapsed = _timed(lambda: result.extend(generator._apply_pronunciation_fixes(script)))
+        if chars <= 5000:  # 旧実装は 5000文字で数十秒かかるため
+            legacy: List = []
+            legacy_elapsed = _timed(lambda: legacy.extend(_legacy_pronunciation_fixes(mapping, script)))
+            same = [l.text for l in result] == [l.text for l in legacy]
+            print(f"{chars:>5} {len(script):>7} {elapsed:>16.4f} {legacy_elapsed:>11.3f}   {same}")
+        else:
+            print(f"{chars:>5} {len(script):>7} {elapsed:>16.4f} {'(skip)':>11}")
+
+
+@benchmark("dictionary")
+def bench_dictionary() -> None:
+    """読み替え辞書の読み込み（TSV解析 / 保存済みインデックス）と照合の語数に対するスケーリング"""
+    import tempfile
+    rng = random.Random(0)
+    base = pronunciation.load_dictionary(config.PRONUNCIATION_DICT_PATH).entries
+    script = _synthetic_script(5000)
+    print("words    tsv(s)   index(s)  compile(s)  annotate 5000字(s)")
+    with tempfile.TemporaryDirectory() as tmp:
+        config.DICTIONARY_INDEX_DIR = tmp
+        for n in (1000, 10000, 50000):
+            entries = dict(base)
+            while len(entries) < n:  # 社名・人名を想定した英字・カタカナの合成語
+                word = rng.choice(("".join(rng.choices("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz", k=rng.randint(3, 12))),
+                                   "".join(rng.choices("アイウエオカキクケコサシスセソタチツテトナニヌネノハヒフヘホマミムメモヤユヨラリルレロワン", k=rng.randint(3, 8)))))
+                entries[word] = "ヨミ"
+            path = f"{tmp}/dict{n}.tsv"
+            with open(path, "w", encoding="utf-8") as f:
+                f.writelines(f"{k}\t{v}\n" for k, v in entries.items())
+            pronunciation._dictionaries.clear()
+            tsv = _timed(lambda: pronunciation.load_dictionary(path))
+            pronunciation._dictionaries.clear()
+            loaded: List = []
+            index = _timed(lambda: loaded.append(pronunciation.load_dictionary(path)))
+            compile_ = _timed(lambda: loaded[0].annotator)
+            annotate = _timed(lambda: [loaded[0].annotator.annotate(line.text) for line in script])
+            print(f"{n:>5} {tsv:>10.3f} {index:>10.3f} {compile_:>11.3f} {annotate:>19.4f}")
+
+
+def _annotated_script(chars: int, seed: int = 0) -> List[ScriptLine]:
+    """TTS に渡す直前の形の合成台本（読み替え辞書の「語句（読み）」付き、約 chars 文字）"""
+    generator = ScriptGenerator.__new__(ScriptGenerator)
+    return generator._apply_pronunciation_fixes(_synthetic_script(chars, seed))
+
+
+def _legacy_prepare_for_tts(patches: Dict[str, str], text: str) -> str:
+    """旧実装（パッチ1語ごとに str.replace、続けてコンパイルしていない正規表現でアノテーション除去）"""
+    import re
+    for hiragana in sorted(patches, key=len, reverse=True):
+        text = text.replace(hiragana, patches[hiragana])
+    return re.sub(
+        r'[\u4e00-\u9fff\u3400-\u4dbfA-Za-z0-9./_\-]+(?:\s[\u4e00-\u9fff\u3400-\u4dbfA-Za-z0-9./_\-]+)*（([ぁ-ゟァ-ヿーA-Za-z\s]+)）',
+        r'\1',
+        text,
+    )
+
+
+@benchmark("tts_text")
+def bench_tts_text() -> None:
+    """TTS前のテキスト前処理（チャンク単位の1回走査）と旧実装（行ごとの逐次置換）の比較"""
+    from tts_generator import TTSGenerator
+    generator = TTSGenerator.__new__(TTSGenerator)
+    generator._patches = None
+    generator._preprocessor = None
+    patches = pronunciation.load_dictionary(config.TTS_KANA_PATCHES_PATH).entries
+    print(f"パッチ {len(patches)}語、コンパイル {_timed(generator._text_preprocessor):.4f}s")
+    print("chars   lines   one-pass(s)   legacy(s)   differs")
+    for chars in (5000, 20000, 100000):
+        texts = [line.text for line in _annotated_script(chars)]
+        result: List = []
+        elapsed = _timed(lambda: result.extend(generator._text_preprocessor().process_lines(texts)))
+        legacy: List = []
+        legacy_elapsed = _timed(lambda: legacy.extend(_legacy_prepare_for_tts(patches, t) for t in texts))
+        # 旧実装は「Google（グーグル）」を先にパッチして「グーグル（グーグル）」を残していた
+        differs = sum(a != b for a, b in zip(result, legacy))
+        print(f"{chars:>6} {len(texts):>6} {elapsed:>13.4f} {legacy_elapsed:>11.4f} {differs:>9}")
+
+
+# ── 台本JSONの解析 ──────────────────────────────────────────
+
+def _truncated_response(lines: int) -> str:
+    """lines 行の台本JSONを最後の行の途中で打ち切った応答（改行・インデント付き）
+
+    中ほどの1行にはエスケープされていない引用符が混ざっている（LLM の出力で実際に起きる崩れ方）。
+    """
+    import json
+    data = [{"speaker": "AB"[i % 2], "text": f"これは{i}行目の発話です。" * 3} for i in range(lines)]
+    text = json.dumps(data, ensure_ascii=False, indent=2)
+    broken = f"これは{lines // 2}行目の発話です。"
+    text = text.replace(broken * 3, f'{broken}"引用"{broken}', 1)
+    return text[:len(text) - 30]
+
+
+def _legacy_parse_truncated(text: str) -> int:
+    """旧実装（末尾の行を1行ずつ削って json.loads を再試行）"""
+    import json
+    lines = text.splitlines()
+    for i in range(len(lines) - 1, 0, -1):
+        candidate = '\n'.join(lines[:i]).rstrip().rstrip(',')
+        for closing in (']', '}]'):
+            try:
+                return len(json.loads(candidate + closing))
+            except json.JSONDecodeError:
+                continue
+    return 0
+
+
+@benchmark("parse")
+def bench_parse() -> None:
+    """途中で打ち切られた台本JSONの回復（_parse_response）と旧実装の比較"""
+    import logging
+    logging.getLogger("script_generator").setLevel(logging.ERROR)
+    generator = ScriptGenerator.__new__(ScriptGenerator)
+    print("lines    chars    one-pass(s)  rows   legacy(s)  rows")
+    for lines in (100, 1000, 3000):
+        text = _truncated_response(lines)
+        result: List = []
+        elapsed = _timed(lambda: result.extend(generator._parse_response(text)))
+        legacy: List[int] = []
+        legacy_elapsed = _timed(lambda: legacy.append(_legacy_parse_truncated(text)))
+        print(f"{lines:>5} {len(text):>8} {elapsed:>14.4f} {len(result):>5} {legacy_elapsed:>11.3f} {legacy[0]:>5}")
+
+
+def main(argv: List[str]) -> int:
+    names = argv or list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        print(f"不明なベンチマーク: {', '.join(unknown)}（利用可能: {', '.join(BENCHMARKS)}）")
+        return 1
+    for name in names:
+        print(f"=== {name}: {BENCHMARKS[name].__doc__} ===")
+        BENCHMARKS[name]()
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,54 @@
+"""
+キャッシュファイル共通ユーティリティ
+JSON・バイナリ形式の永続キャッシュを安全に読み書きする（書き込みは一時ファイル経由でアトミックに置換）
+"""
+
+import json
+import logging
+import os
+import tempfile
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+def load_json(path: str, default: Any) -> Any:
+    """JSONファイルを読み込む。存在しない・壊れている場合は default を返す"""
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning("キャッシュ読み込みエラー、破棄します (%s): %s", path, e)
+        return default
+
+
+def save_json(path: str, data: Any) -> None:
+    """JSONファイルをアトミックに書き込む（途中で落ちても壊れたファイルを残さない）"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix=".json")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def save_bytes(path: str, data: bytes) -> None:
+    """バイナリファイルをアトミックに書き込む"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
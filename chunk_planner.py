@@ -0,0 +1,211 @@
+"""
+TTSチャンクの分割計画
+台本の各行の読み上げ時間をモーラ数から見積もり、1チャンクの音声が TTS_CHUNK_TARGET_SEC 前後、
+最長でも TTS_CHUNK_MAX_SEC に収まるように分ける。
+
+- plan_chunks: 台本全体を見て、チャンクの長さが揃うように区切りを選ぶ（並列合成の終わりが揃う）
+- StreamingChunker: ストリーミング生成用。行を受け取りながら区切る（全体が見えないので長さは揃えない）
+
+区切りはトピックの切れ目（ホストの「さて」「続いて」などで始まる発話の前）を優先し、
+次にホストの発話の前、やむを得ない場合だけゲストの発話の前で区切る。
+1行だけで TTS_CHUNK_MAX_SEC を超える場合はその行を単独のチャンクにする。
+"""
+
+import math
+import re
+from typing import Callable, List, Optional, Sequence
+
+import config
+from script_generator import Script, ScriptLine
+
+LINE_PAUSE_SEC = 0.4  # 発話の切り替わりの間（秒）
+
+# 区切りのペナルティ（チャンク長のずれ（目標比）の2乗と同じ尺度）
+TOPIC_BREAK_PENALTY = 0.0  # トピックの切れ目
+HOST_BREAK_PENALTY = 0.1  # ホストの発話の前
+GUEST_BREAK_PENALTY = 0.5  # ゲストの発話の前（やり取りの途中）
+
+# トピックの切り替えに使われる言い出し
+_TOPIC_OPENERS = re.compile(r'^(?:さて|続いて|次は|次に|では|それでは|ここからは|最後に|まずは|まず)')
+
+# 英字・数字の連なり（大文字5文字までの略語は1文字ずつ読む）
+_ASCII_RUN = re.compile(r'[A-Z]{1,5}(?![a-z])|[A-Za-z]+|[0-9]+(?:[.,][0-9]+)*')
+
+_SMALL_KANA = frozenset('ぁぃぅぇぉゃゅょゎァィゥェォャュョヮ')
+
+
+def estimate_mora(text: str) -> float:
+    """読み上げのモーラ数の概算
+
+    かな1文字（拗音の小書きを除く）で1モーラ、漢字1文字で約2モーラ、
+    英単語は1文字約0.8モーラ、略語は1文字2モーラ、数字は1桁2モーラ。句読点は間として数える。
+    """
+    mora = 0.0
+    for m in _ASCII_RUN.finditer(text):
+        run = m.group()
+        if run[0].isdigit():
+            mora += 2 * sum(ch.isdigit() for ch in run)
+        elif run.isupper():
+            mora += 2 * len(run)
+        else:
+            mora += 0.8 * len(run)
+
+    for ch in _ASCII_RUN.sub('', text):
+        if ch in _SMALL_KANA:
+            continue
+        if 'ぁ' <= ch <= 'ヿ':
+            mora += 1
+        elif '一' <= ch <= '鿿' or '㐀' <= ch <= '䶿' or ch == '々':
+            mora += 2
+        elif ch in '、，,':
+            mora += 1
+        elif ch in '。．！？!?…':
+            mora += 2
+    return mora
+
+
+def estimate_duration(text: str) -> float:
+    """1行の読み上げ時間（秒）の概算"""
+    return estimate_mora(text) / config.TTS_MORA_PER_SEC + LINE_PAUSE_SEC
+
+
+def break_penalty(line: ScriptLine) -> float:
+    """line の直前で区切る場合のペナルティ"""
+    if line.speaker != "A":
+        return GUEST_BREAK_PENALTY
+    if _TOPIC_OPENERS.match(line.text.lstrip()):
+        return TOPIC_BREAK_PENALTY
+    return HOST_BREAK_PENALTY
+
+
+def plan_chunks(script: Script,
+                spoken_text: Callable[[ScriptLine], str] = lambda line: line.text,
+                target_sec: Optional[float] = None,
+                max_sec: Optional[float] = None) -> List[Script]:
+    """台本を読み上げ時間の揃ったチャンクに分ける
+
+    チャンク数は合計時間 / target_sec の切り上げ（max_sec を超えるチャンクが出るなら増やす）。
+    その数のうえで、各チャンクの長さの平均からのずれと区切りのペナルティの合計が最小になる
+    区切りを動的計画法で選ぶ。1行で max_sec を超える行は単独のチャンクにする。
+
+    Args:
+        script: 台本
+        spoken_text: 行から実際に読み上げるテキストを返す関数（読みアノテーション除去後など）
+        target_sec: 1チャンクの目標の長さ（秒）
+        max_sec: 1チャンクの長さの上限（秒）
+    """
+    if not script:
+        return []
+    target_sec = config.TTS_CHUNK_TARGET_SEC if target_sec is None else target_sec
+    max_sec = config.TTS_CHUNK_MAX_SEC if max_sec is None else max_sec
+    durations = [estimate_duration(spoken_text(line)) for line in script]
+
+    # 1行で上限を超える行は単独のチャンクにし、その前後を別々に分ける
+    chunks: List[Script] = []
+    start = 0
+    for i, duration in enumerate(durations + [max_sec + 1]):
+        if duration <= max_sec:
+            continue
+        if start < i:
+            chunks.extend(_plan_segment(script[start:i], durations[start:i], target_sec, max_sec))
+        if i < len(script):
+            chunks.append([script[i]])
+        start = i + 1
+    return chunks
+
+
+def _plan_segment(script: Script, durations: Sequence[float],
+                  target_sec: float, max_sec: float) -> List[Script]:
+    """どの行も max_sec 以下の台本をチャンクに分ける"""
+    prefix = [0.0]
+    for duration in durations:
+        prefix.append(prefix[-1] + duration)
+    total = prefix[-1]
+    if total <= max_sec and total <= target_sec * 1.5:
+        return [script]
+
+    penalties = [0.0] + [break_penalty(line) for line in script[1:]]
+    count = math.ceil(total / target_sec)
+    while True:
+        cuts = _best_cuts(prefix, penalties, count, max_sec)
+        if cuts is not None:
+            return [script[start:end] for start, end in zip(cuts, cuts[1:])]
+        count += 1
+
+
+def _best_cuts(prefix: Sequence[float], penalties: Sequence[float],
+               count: int, max_sec: float) -> Optional[List[int]]:
+    """count 個のチャンクに分ける最良の区切り位置（先頭 0・末尾 len を含む）。無理なら None"""
+    n = len(prefix) - 1
+    ideal = prefix[-1] / count
+    inf = float('inf')
+    # cost[k][j]: 先頭 j 行を k 個のチャンクに分けた最小コスト
+    cost = [[inf] * (n + 1) for _ in range(count + 1)]
+    back = [[0] * (n + 1) for _ in range(count + 1)]
+    cost[0][0] = 0.0
+
+    for k in range(1, count + 1):
+        prev, cur, prev_back = cost[k - 1], cost[k], back[k]
+        for j in range(k, n - (count - k) + 1):
+            best, best_i = inf, 0
+            # 末尾のチャンク [i, j) を短い順に伸ばし、上限を超えたら打ち切る
+            for i in range(j - 1, k - 2, -1):
+                duration = prefix[j] - prefix[i]
+                if duration > max_sec:
+                    break
+                if prev[i] == inf:
+                    continue
+                c = prev[i] + ((duration - ideal) / ideal) ** 2 + penalties[i]
+                if c < best:
+                    best, best_i = c, i
+            cur[j] = best
+            prev_back[j] = best_i
+
+    if cost[count][n] == inf:
+        return None
+    cuts = [n]
+    for k in range(count, 0, -1):
+        cuts.append(back[k][cuts[-1]])
+    return cuts[::-1]
+
+
+class StreamingChunker:
+    """行を受け取りながらチャンクに区切る（ストリーミング生成用）
+
+    target_sec を超えたらトピックの切れ目で、その1.25倍を超えたらホストの発話の前で区切り、
+    次の行で max_sec を超える場合はそこで区切る。
+    """
+
+    def __init__(self, spoken_text: Callable[[ScriptLine], str] = lambda line: line.text,
+                 target_sec: Optional[float] = None,
+                 max_sec: Optional[float] = None):
+        self.spoken_text = spoken_text
+        self.target_sec = config.TTS_CHUNK_TARGET_SEC if target_sec is None else target_sec
+        self.max_sec = config.TTS_CHUNK_MAX_SEC if max_sec is None else max_sec
+        self._current: Script = []
+        self._duration = 0.0
+
+    def add(self, line: ScriptLine) -> Optional[Script]:
+        """行を追加する。line の直前で区切った場合は確定したチャンクを返す"""
+        duration = estimate_duration(self.spoken_text(line))
+        chunk = None
+        if self._current and self._should_break(line, duration):
+            chunk = self.flush()
+        self._current.append(line)
+        self._duration += duration
+        return chunk
+
+    def flush(self) -> Optional[Script]:
+        """残りの行をチャンクとして返す（無ければ None）"""
+        chunk = self._current or None
+        self._current = []
+        self._duration = 0.0
+        return chunk
+
+    def _should_break(self, line: ScriptLine, duration: float) -> bool:
+        if self._duration + duration > self.max_sec:
+            return True
+        penalty = break_penalty(line)
+        if self._duration >= self.target_sec * 1.25:
+            return penalty <= HOST_BREAK_PENALTY
+        return self._duration >= self.target_sec and penalty <= TOPIC_BREAK_PENALTY
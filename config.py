@@ -5,10 +5,16 @@ load_dotenv()
 
 # Gemini API設定
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_MAX_CONNECTIONS = 10  # 共有クライアント（genai_client.py）の同時接続数の上限
+GEMINI_KEEPALIVE_SEC = 60.0  # 使っていない接続を保持する秒数（ステージ間で接続を使い回す）
 
 # TTS設定
 TTS_MODEL = "gemini-2.5-flash-preview-tts"
 TTS_VOICE = "Kore"    # デフォルト音声（フォールバック用）
+TTS_MAX_CONCURRENCY = 3  # 並列に音声合成するチャンク数の上限（1で逐次。送信ペースは RATE_LIMITS でも制限される）
+TTS_CHUNK_TARGET_SEC = 150.0  # 1チャンクの音声の目標の長さ（秒）。チャンクの長さはこの前後に揃える
+TTS_CHUNK_MAX_SEC = 240.0  # 1チャンクの音声の長さの上限（秒）。TTS出力の打ち切りを避ける
+TTS_MORA_PER_SEC = 7.5  # 読み上げ速度（1秒あたりのモーラ数）。チャンクの長さの見積もりに使う
 
 # 曜日ローテーション（7ペア × ホスト＋ゲスト = 14人）
 # 各タプル: (ホスト名, ホスト音声, ゲスト名, ゲスト音声)
@@ -28,6 +34,25 @@ TTS_VOICE_B = "Charon"
 
 # LLM設定（台本生成）
 LLM_MODEL = "gemini-2.5-flash"
+SCRIPT_STREAMING = False  # True: 台本をストリーミング生成し、生成中から音声合成を始める（台本レビューは省略）
+PROMPT_TOKEN_BUDGET = 12000  # 記事一覧プロンプトの入力トークン数の目安（超えたら URL・本文・末尾の記事の順に省く。0で無制限）
+PROMPT_TITLE_MAX_CHARS = 100  # 英語の記事タイトルをこの文字数で切り詰める（0で切り詰めない）
+
+# Gemini API リトライ（retry.py: 429・5xx・通信エラーを指数バックオフ＋ジッターで再試行）
+RETRY_MAX_ATTEMPTS = 5  # 1回の呼び出しあたりの最大試行回数（初回を含む）
+RETRY_BASE_DELAY_SEC = 5.0  # 1回目のリトライ待機（秒）。以降は倍々に延ばす
+RETRY_MAX_DELAY_SEC = 120.0  # 1回あたりの待機の上限（秒）
+RETRY_BUCKET_CAPACITY = 10  # モデルごとのリトライ予算（連続してリトライできる回数）
+RETRY_BUCKET_REFILL_SEC = 30.0  # リトライ予算が1回分回復するまでの秒数
+RUN_DEADLINE_SEC = 25 * 60  # RUN_STARTED_AT からの締め切り。これを超える待機はしない（ジョブの timeout-minutes: 30 より前に終える）
+RUN_STARTED_AT = float(os.getenv("RUN_STARTED_AT") or 0)  # 締め切りの起点（UNIX時刻）。ワークフローがジョブ開始時に設定し、速報版・深掘り版で共有する。未設定ならプロセス開始時刻
+
+# クライアント側レート制限（rate_limiter.py）: モデルごとの (1分あたりのリクエスト数, 1分あたりの入力トークン数)
+# 0 は無制限。有料プランなど上限が異なる場合は書き換える
+RATE_LIMITS = {
+    LLM_MODEL: (10, 250000),
+    TTS_MODEL: (3, 10000),
+}
 
 # コンテンツソース設定
 RSS_FEEDS = [
@@ -55,9 +80,64 @@ RSS_FEEDS = [
 if os.getenv("CUSTOM_RSS_FEEDS"):
     RSS_FEEDS.extend(os.getenv("CUSTOM_RSS_FEEDS").split(","))
 
+# フィード取得設定（並列ダウンロード）
+FEED_FETCH_WORKERS = 8  # 同時ダウンロード数の上限
+FEED_FETCH_TIMEOUT = 10  # 1フィードあたりのタイムアウト（秒）
+FEED_FETCH_DEADLINE = 30  # 全フィード取得の締め切り（秒）
+FEED_STREAM_PARSE = True  # 受信しながら解析し、必要な記事が揃ったら読み込みを打ち切る
+FEED_STREAM_STALE_LIMIT = 3  # 期間外の記事がこの件数続いたら打ち切る（0で無効）
+
+# フィード取得統計に基づく調整（タイムアウト自動調整・サーキットブレーカー）
+FEED_TIMEOUT_MIN = 3  # 自動調整したタイムアウトの下限（秒）
+FEED_TIMEOUT_FACTOR = 3.0  # 平均取得時間の何倍をタイムアウトにするか
+FEED_FAILURE_THRESHOLD = 3  # この回数連続で失敗したフィードは一時停止
+FEED_REPROBE_INTERVAL_SEC = 3 * 24 * 3600  # 一時停止中のフィードを再試行する間隔（秒）
+
+# 記事本文取得設定（fetch_web_contents）
+WEB_FETCH_WORKERS = 8  # 同時ダウンロード数の上限
+WEB_FETCH_PER_HOST = 2  # 同一ホストへの同時接続数の上限
+WEB_FETCH_TIMEOUT = 10  # 1ページあたりのタイムアウト（秒）
+WEB_CONTENT_MAX_BYTES = 512 * 1024  # 1ページあたりの読み込み上限（バイト）
+
 # ファイル管理設定
 AUDIO_OUTPUT_DIR = "./audio_files"
 CONTENT_DIR = "./content"
+CACHE_DIR = "./cache"  # 実行間で引き継ぐキャッシュ（GitHub Actions では actions/cache で復元）
+
+# フィードキャッシュ（条件付きGET）
+FEED_CACHE_PATH = os.path.join(CACHE_DIR, "feed_cache.json")
+FEED_CACHE_MAX_ENTRIES = 50  # 1フィードあたりに保存するエントリ数の上限
+FEED_STATS_PATH = os.path.join(CACHE_DIR, "feed_stats.json")  # フィードごとの取得時間・失敗回数
+
+# 記事スナップショット（速報版・深掘り版で同じ記事セットを共有）
+ARTICLE_SNAPSHOT_PATH = os.path.join(CACHE_DIR, "article_snapshot.json")
+ARTICLE_SNAPSHOT_TTL_SEC = 3600  # 有効期限（秒）。0で無効
+
+# 配信済み記事ストア（前日までに扱った記事を再送しない）
+SEEN_ARTICLES_PATH = os.path.join(CACHE_DIR, "seen_articles.json")
+SEEN_ARTICLE_RETENTION_DAYS = 30  # 記録の保持日数
+SEEN_ARTICLE_POLICY = "drop"  # "drop": 除外 / "demote": 末尾に回す / "off": 無効
+
+# 記事本文抽出キャッシュ
+EXTRACTION_CACHE_DIR = os.path.join(CACHE_DIR, "extracted")
+EXTRACTION_CACHE_TTL_SEC = 7 * 24 * 3600  # 有効期限（秒）
+EXTRACTION_CACHE_MAX_BYTES = 50 * 1024 * 1024  # 合計サイズの上限（バイト）
+
+# LLM応答キャッシュ（同じリクエストの再送では API を呼ばない）
+LLM_CACHE_DIR = os.path.join(CACHE_DIR, "llm")
+LLM_CACHE_TTL_SEC = 24 * 3600  # 有効期限（秒）。0で無効
+LLM_CACHE_BYPASS = os.getenv("LLM_CACHE_BYPASS", "").lower() in ("1", "true", "yes")  # キャッシュを使わずに必ず生成
+
+# TTSチャンクキャッシュ（同じ内容のチャンクは合成済みの音声を再利用）
+TTS_CACHE_DIR = os.path.join(CACHE_DIR, "tts")
+TTS_CACHE_TTL_SEC = 3 * 24 * 3600  # 有効期限（秒）。0で無効
+TTS_CACHE_MAX_BYTES = 300 * 1024 * 1024  # 合計サイズの上限（バイト）
+
+# 読み替え辞書（語句<TAB>読み の TSV。更新されると次回参照時に再読み込み）
+DICTIONARY_DIR = "./dictionaries"
+PRONUNCIATION_DICT_PATH = os.path.join(DICTIONARY_DIR, "pronunciation.tsv")  # 台本の「語句（読み）」付与
+TTS_KANA_PATCHES_PATH = os.path.join(DICTIONARY_DIR, "tts_kana_patches.tsv")  # TTS前のカタカナ化パッチ
+DICTIONARY_INDEX_DIR = os.path.join(CACHE_DIR, "dictionaries")  # 解析済みインデックスの保存先
 
 # Podcast設定
 PODCAST_TITLE = "テック速報 AI ニュースラジオ"
@@ -83,4 +163,7 @@ DEEP_PODCAST_DESCRIPTION = "最新ニュースの背景・影響・技術解説
 DEEP_RSS_FEED_FILENAME = "feed_deep.xml"
 DEEP_EPISODES_DIR = "episodes_deep"
 DEEP_PODCAST_IMAGE_URL = "https://necoha.github.io/auto-podcast/cover_deep.jpg"
-DEEP_MAX_TOPICS = 3  # 深掘りするトピック数
\ No newline at end of file
+DEEP_MAX_TOPICS = 3  # 深掘りするトピック数
+DEEP_ARTICLE_BODY_CHARS = 0  # プロンプトに添える記事本文の抜粋文字数（0で本文を取得しない）
+DEEP_PARALLEL_TOPICS = True  # トピック選定→トピック別の台本を並列生成（False で1回の呼び出しで全体を生成）
+DEEP_TOPIC_RETRIES = 1  # トピック別生成で失敗したトピックだけを再生成する回数
@@ -3,71 +3,161 @@
 RSSフィード、ニュースサイト、テキストファイルからコンテンツを収集・処理
 """
 
+import calendar
 import logging
 import os
 import json
 import re
+import threading
+import time
 from datetime import datetime, timedelta, timezone
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from difflib import SequenceMatcher
+from email.utils import parsedate_to_datetime
 from typing import Any, Dict, List, Optional
 from urllib.parse import urlparse, urlunparse, parse_qs, urlencode
 
 import requests
+import requests.adapters
 from bs4 import BeautifulSoup
 import feedparser
 
 import config
+from article_snapshot import ArticleSnapshot
+from extraction_cache import ExtractionCache
+from feed_cache import FeedCache
+from feed_stats import FeedStats
+from feed_stream import FeedStreamError, FeedStreamParser
+from seen_articles import SeenArticleStore
+from title_dedup import TitleIndex, ratio_candidate_threshold, title_shingles
 
 logger = logging.getLogger(__name__)
 
+FEED_USER_AGENT = feedparser.USER_AGENT
+WEB_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+# 本文抽出には高速な lxml パーサーを使う（依存関係に含む。インストールされていない環境では標準の html.parser）
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+JST = timezone(timedelta(hours=9))
+
+# 公開日時の解析方法（先頭から順に試す）: feedparser の解析済みフィールド → 文字列書式
+DATE_PARSED_FIELDS = ('published_parsed', 'updated_parsed')
+DATE_ISO_8601 = 'iso8601'  # datetime.fromisoformat（strptime より高速）
+DATE_RFC_2822 = 'rfc2822'  # email.utils.parsedate_to_datetime
+DATE_STRATEGIES = DATE_PARSED_FIELDS + (
+    DATE_ISO_8601,
+    "%a, %d %b %Y %H:%M:%S %z",   # RFC 2822
+    DATE_RFC_2822,                  # RFC 2822（タイムゾーン名 GMT / JST 等を含む形式）
+    "%Y-%m-%dT%H:%M:%S%z",          # ISO 8601
+    "%Y-%m-%dT%H:%M:%S.%f%z",
+    "%Y-%m-%d %H:%M:%S",
+)
+
+
+@dataclass
+class FeedResponse:
+    """フィード1件のダウンロード結果（304 の場合 content は空）"""
+    status: int
+    content: bytes
+    headers: Dict[str, str]
+    elapsed: float = 0.0  # ダウンロード所要時間（秒）
+    source: str = ''  # ストリーミング解析で得たフィード名
+    entries: Optional[List[Dict[str, Any]]] = None  # ストリーミング解析済みのエントリ（None なら未解析）
+    complete: bool = True  # 本文を最後まで読んだか（ストリーミング解析を途中で打ち切ったら False）
+
 
 class ContentManager:
     def __init__(self):
         self.content_dir = config.CONTENT_DIR
         os.makedirs(self.content_dir, exist_ok=True)
+        self._session: Optional[requests.Session] = None
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._session_lock = threading.Lock()
+        self.extraction_cache = ExtractionCache()
+        self._date_strategies: Dict[str, str] = {}  # フィード → 成功した日付の文字列書式
     
-    def fetch_rss_feeds(self, max_articles: int = 5, hours: int = 24) -> List[Dict[str, Any]]:
+    def fetch_rss_feeds(self, max_articles: int = 5, hours: int = 24,
+                        use_snapshot: bool = True) -> List[Dict[str, Any]]:
         """RSSフィードから最新記事を取得（日付フィルタ＋重複排除付き）
 
+        全フィードを並列にダウンロードしてから、config.RSS_FEEDS の順に解析する。
+        そのため取得時間は最も遅い1フィード程度に収まり、結果の順序は常に一定。
+
+        同じ条件の記事スナップショットが有効期限内にあれば、再取得せずにそれを返す
+        （速報版の取得結果を深掘り版がそのまま使う）。
+
         Args:
             max_articles: フィードあたりの最大取得件数
             hours: 直近N時間以内の記事のみ取得（0で無制限）
+            use_snapshot: 記事スナップショットを読み書きするか
         """
+        snapshot = ArticleSnapshot()
+        snapshot_key = snapshot.make_key(config.RSS_FEEDS, max_articles=max_articles, hours=hours)
+        if use_snapshot:
+            articles = snapshot.load(snapshot_key)
+            if articles is not None:
+                return articles
+
         all_articles = []
         cutoff = datetime.now(timezone.utc) - timedelta(hours=hours) if hours > 0 else None
 
+        feed_cache = FeedCache()
+        feed_stats = FeedStats()
+        responses = self._download_feeds(config.RSS_FEEDS, feed_cache, feed_stats, max_articles, cutoff)
+
         for feed_url in config.RSS_FEEDS:
+            if feed_url not in responses:
+                continue
             try:
-                feed = feedparser.parse(feed_url)
-                articles = []
-
-                for entry in feed.entries[:max_articles * 2]:  # フィルタ分を多めに取得
-                    pub_dt = self._parse_published_date(entry)
-
-                    # 日付フィルタ: cutoff より古い記事はスキップ
-                    if cutoff and pub_dt and pub_dt < cutoff:
-                        continue
-
-                    article = {
-                        'title': entry.get('title', ''),
-                        'summary': entry.get('summary', ''),
-                        'link': entry.get('link', ''),
-                        'published': entry.get('published', ''),
-                        'published_dt': pub_dt,
-                        'source': feed.feed.get('title', feed_url),
-                    }
-                    articles.append(article)
-
-                    if len(articles) >= max_articles:
-                        break
+                response = responses[feed_url]
+                cached = feed_cache.get(feed_url) if response.status == 304 else None
+                if cached is not None:
+                    source, entries = cached['source'], cached['entries']
+                elif response.entries is not None:
+                    source, entries = response.source or feed_url, response.entries
+                    if response.complete:
+                        feed_cache.put(feed_url, response.headers, source, entries)
+                    else:
+                        # 打ち切った一部のエントリを検証子付きで残すと、記事数や期間の違う実行でも
+                        # 304 のたびにそれが使われてしまうので、キャッシュしない
+                        feed_cache.discard(feed_url)
+                else:
+                    feed = feedparser.parse(response.content, response_headers=response.headers)
+                    source = feed.feed.get('title', feed_url)
+                    entries = self._entries_from_feed(feed, feed_url)
+                    feed_cache.put(feed_url, response.headers, source, entries)
+
+                articles = self._extract_articles(entries, source, max_articles, cutoff)
+                # 取得時間（タイムアウトの基準）は本文を最後まで受信した 200 応答だけで更新する
+                full = response.status != 304 and response.complete
+                feed_stats.record_success(
+                    feed_url,
+                    response.elapsed if full else None,
+                    len(response.content) if full else None,
+                    len(entries),
+                )
 
                 all_articles.extend(articles)
-                logger.info("取得完了: %s - %d記事", feed.feed.get('title', feed_url), len(articles))
+                logger.info(
+                    "取得完了: %s - %d記事 (%.1f秒)%s",
+                    source, len(articles), response.elapsed,
+                    "（未更新・キャッシュ使用）" if cached else "",
+                )
 
             except Exception as e:
+                feed_stats.record_failure(feed_url)
                 logger.warning("RSS取得エラー (%s): %s", feed_url, e)
 
+        feed_cache.save()
+        feed_stats.save()
+
         # 重複排除
         before = len(all_articles)
         all_articles = self._deduplicate_articles(all_articles)
@@ -75,48 +165,231 @@ class ContentManager:
         if removed:
             logger.info("重複排除: %d件を除外（%d → %d件）", removed, before, len(all_articles))
 
+        # 前日までのエピソードで扱った記事を除外
+        all_articles = self._filter_seen_articles(all_articles)
+
+        if use_snapshot:
+            snapshot.save(snapshot_key, all_articles)
+
         return all_articles
 
-    # ── 日付パース ──────────────────────────────────────────
+    def _entries_from_feed(self, feed, feed_key: Optional[str] = None) -> List[Dict[str, Any]]:
+        """feedparser の解析結果をキャッシュ可能なエントリ辞書のリストに変換する"""
+        return [
+            {
+                'title': entry.get('title', ''),
+                'summary': entry.get('summary', ''),
+                'link': entry.get('link', ''),
+                'published': entry.get('published', ''),
+                'published_dt': self._parse_published_date(entry, feed_key),
+            }
+            for entry in feed.entries[:config.FEED_CACHE_MAX_ENTRIES]
+        ]
+
+    @staticmethod
+    def _extract_articles(entries: List[Dict[str, Any]], source: str, max_articles: int,
+                          cutoff: Optional[datetime]) -> List[Dict[str, Any]]:
+        """エントリから日付フィルタを通過した記事を最大 max_articles 件取り出す"""
+        articles = []
+
+        for entry in entries[:max_articles * 2]:  # フィルタ分を多めに取得
+            pub_dt = entry['published_dt']
+
+            # 日付フィルタ: cutoff より古い記事はスキップ
+            if cutoff and pub_dt and pub_dt < cutoff:
+                continue
+
+            articles.append(dict(entry, source=source))
+
+            if len(articles) >= max_articles:
+                break
+
+        return articles
 
-    def _parse_published_date(self, entry) -> datetime | None:
-        """feedparser の entry から公開日時を UTC datetime に変換する"""
-        # feedparser が parsed 形式を提供している場合
-        if hasattr(entry, 'published_parsed') and entry.published_parsed:
+    # ── フィード並列ダウンロード ──────────────────────────────
+
+    def _download_feeds(self, feed_urls: List[str], feed_cache: FeedCache,
+                        feed_stats: FeedStats, max_articles: int = 5,
+                        cutoff: Optional[datetime] = None) -> Dict[str, FeedResponse]:
+        """全フィードをスレッドプールで並列ダウンロードする
+
+        タイムアウトはフィードごとに過去の取得時間から決め（上限 FEED_FETCH_TIMEOUT）、
+        全体は FEED_FETCH_DEADLINE で締め切る。取得時間の長いフィードから順に投入し、
+        連続失敗中のフィードは再試行間隔が過ぎるまでスキップする。
+        締め切りまでに終わらなかったフィードや失敗したフィードは結果に含めない。
+        キャッシュ済みのフィードには条件付きGETを送り、未更新なら 304 を受け取る。
+        FEED_STREAM_PARSE が有効なら受信しながら解析し、必要な記事が揃った時点で読み込みを打ち切る。
+
+        Returns:
+            {フィードURL: FeedResponse}
+        """
+        targets = []
+        for url in feed_stats.order(list(dict.fromkeys(feed_urls))):
+            if feed_stats.should_skip(url):
+                logger.info(
+                    "RSS取得スキップ (%s): %d回連続失敗中",
+                    url, feed_stats.get(url).get('failure_streak', 0),
+                )
+            else:
+                targets.append(url)
+
+        results: Dict[str, FeedResponse] = {}
+        if not targets:
+            return results
+
+        workers = max(1, min(config.FEED_FETCH_WORKERS, len(targets)))
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="feed")
+        try:
+            futures = {
+                executor.submit(
+                    self._download_feed, url, feed_stats.timeout_for(url), feed_cache.validators(url),
+                    max_articles, cutoff,
+                ): url
+                for url in targets
+            }
+            done, pending = wait(futures, timeout=config.FEED_FETCH_DEADLINE)
+
+            for future in done:
+                url = futures[future]
+                try:
+                    results[url] = future.result()
+                except Exception as e:
+                    feed_stats.record_failure(url)
+                    logger.warning("RSS取得エラー (%s): %s", url, e)
+
+            for future in pending:
+                feed_stats.record_failure(futures[future])
+                logger.warning(
+                    "RSS取得エラー (%s): 締め切り %d秒 を超過",
+                    futures[future], config.FEED_FETCH_DEADLINE,
+                )
+        finally:
+            # 締め切り超過分の完了は待たない（各リクエストは timeout で打ち切られる）
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return results
+
+    def _download_feed(self, feed_url: str, timeout: float, validators: Dict[str, str],
+                       max_articles: int = 5, cutoff: Optional[datetime] = None) -> FeedResponse:
+        """フィード1件をダウンロードする（validators があれば条件付きGET）
+
+        FEED_STREAM_PARSE が有効なら本文を受信しながらエントリを取り出し、
+        max_articles 件の新しい記事が揃うか古い記事が続いた時点で残りを読まずに接続を閉じる。
+        XML として厳密に解析できないフィードは全体を読み込み、feedparser での解析に回す。
+        """
+        start = time.monotonic()
+        response = requests.get(
+            feed_url,
+            headers={'User-Agent': FEED_USER_AGENT, **validators},
+            timeout=timeout,
+            stream=config.FEED_STREAM_PARSE,
+        )
+        with response:
+            if response.status_code == 304:
+                return FeedResponse(status=304, content=b"", headers={}, elapsed=time.monotonic() - start)
+            response.raise_for_status()
+            # feedparser はヘッダー名を小文字で参照する（相対URL解決用に取得元も渡す）
+            headers = {k.lower(): v for k, v in response.headers.items()}
+            headers.setdefault('content-location', response.url)
+
+            if not config.FEED_STREAM_PARSE:
+                return FeedResponse(
+                    status=response.status_code, content=response.content, headers=headers,
+                    elapsed=time.monotonic() - start,
+                )
+
+            received: List[bytes] = []
+            chunks = response.iter_content(chunk_size=16384)
+
+            def receive():
+                for chunk in chunks:
+                    received.append(chunk)
+                    yield chunk
+
+            parser = FeedStreamParser(
+                max_entries=min(max_articles * 2, config.FEED_CACHE_MAX_ENTRIES),
+                max_fresh=max_articles,
+                cutoff=cutoff,
+                stale_limit=config.FEED_STREAM_STALE_LIMIT,
+                parse_date=lambda entry: self._parse_published_date(entry, feed_url),
+            )
             try:
-                import calendar
-                ts = calendar.timegm(entry.published_parsed)
-                return datetime.fromtimestamp(ts, tz=timezone.utc)
-            except Exception:
-                pass
+                entries = parser.parse(receive())
+            except FeedStreamError as e:
+                logger.debug("ストリーミング解析不可、feedparser で解析 (%s): %s", feed_url, e)
+                received.extend(chunks)
+                return FeedResponse(
+                    status=response.status_code, content=b"".join(received), headers=headers,
+                    elapsed=time.monotonic() - start,
+                )
+
+            if parser.stopped_early:
+                logger.debug("ストリーミング解析: %s - %d件で打ち切り", feed_url, len(entries))
+            return FeedResponse(
+                status=response.status_code, content=b"".join(received), headers=headers,
+                elapsed=time.monotonic() - start, source=parser.source, entries=entries,
+                complete=not parser.stopped_early,
+            )
+
+    # ── 日付パース ──────────────────────────────────────────
+
+    def _parse_published_date(self, entry, feed_key: Optional[str] = None) -> datetime | None:
+        """feedparser の entry から公開日時を UTC datetime に変換する
 
-        if hasattr(entry, 'updated_parsed') and entry.updated_parsed:
+        解析済みフィールド（published_parsed → updated_parsed）は毎回この順で試す。
+        feed_key を渡すと、文字列書式のうちそのフィードで最初に成功したものを記憶し、
+        以降のエントリでは記憶した書式を最初に試す（同じフィード内の日付形式は通常一定）。
+        """
+        for field in DATE_PARSED_FIELDS:
+            dt = self._parse_date_with(entry, field)
+            if dt is not None:
+                return dt
+
+        known = self._date_strategies.get(feed_key) if feed_key else None
+        if known is not None:
+            dt = self._parse_date_with(entry, known)
+            if dt is not None:
+                return dt
+
+        for strategy in DATE_STRATEGIES[len(DATE_PARSED_FIELDS):]:
+            if strategy == known:
+                continue
+            dt = self._parse_date_with(entry, strategy)
+            if dt is not None:
+                if feed_key:
+                    self._date_strategies[feed_key] = strategy
+                return dt
+        return None
+
+    @staticmethod
+    def _parse_date_with(entry, strategy: str) -> datetime | None:
+        """指定した方法（*_parsed フィールド名 / ISO 8601 / strptime 書式）で日時を解析する"""
+        if strategy in DATE_PARSED_FIELDS:
+            # feedparser が parsed 形式を提供している場合
+            parsed = entry.get(strategy)
+            if not parsed:
+                return None
             try:
-                import calendar
-                ts = calendar.timegm(entry.updated_parsed)
-                return datetime.fromtimestamp(ts, tz=timezone.utc)
+                return datetime.fromtimestamp(calendar.timegm(parsed), tz=timezone.utc)
             except Exception:
-                pass
+                return None
 
         # 文字列フォールバック
         raw = entry.get('published') or entry.get('updated', '')
         if not raw:
             return None
-
-        for fmt in (
-            "%a, %d %b %Y %H:%M:%S %z",   # RFC 2822
-            "%Y-%m-%dT%H:%M:%S%z",          # ISO 8601
-            "%Y-%m-%dT%H:%M:%S.%f%z",
-            "%Y-%m-%d %H:%M:%S",
-        ):
-            try:
-                dt = datetime.strptime(raw.strip(), fmt)
-                if dt.tzinfo is None:
-                    dt = dt.replace(tzinfo=timezone.utc)
-                return dt.astimezone(timezone.utc)
-            except ValueError:
-                continue
-        return None
+        try:
+            if strategy == DATE_ISO_8601:
+                dt = datetime.fromisoformat(raw.strip())
+            elif strategy == DATE_RFC_2822:
+                dt = parsedate_to_datetime(raw.strip())
+            else:
+                dt = datetime.strptime(raw.strip(), strategy)
+        except (TypeError, ValueError):
+            return None
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.astimezone(timezone.utc)
 
     # ── 重複排除 ──────────────────────────────────────────
 
@@ -139,17 +412,31 @@ class ContentManager:
         """タイトル同士の類似度を返す (0.0〜1.0)"""
         return SequenceMatcher(None, a, b).ratio()
 
+    @staticmethod
+    def _titles_match(a: str, b: str, threshold: float) -> bool:
+        """タイトル同士の類似度が threshold 以上か（安価な上限値で先に除外してから ratio() を計算する）"""
+        matcher = SequenceMatcher(None, a, b)
+        return (matcher.real_quick_ratio() >= threshold
+                and matcher.quick_ratio() >= threshold
+                and matcher.ratio() >= threshold)
+
     def _deduplicate_articles(self, articles: list, threshold: float = 0.75) -> list:
         """URL とタイトル類似度で重複記事を排除する
 
+        タイトルは文字バイグラムの転置インデックスで候補を絞ってから SequenceMatcher.ratio() で照合するため、
+        判定は全ペア比較と同じまま、記事数が増えても比較するのは似たタイトルの組だけで済む。
+
         Args:
             articles: 記事リスト
-            threshold: タイトル類似度の閾値（これ以上で重複とみなす）
+            threshold: タイトル類似度の閾値（SequenceMatcher.ratio()、これ以上で重複とみなす）
         """
         seen_urls: set[str] = set()
         unique: list = []
 
-        for article in articles:
+        shingles = [title_shingles(a.get('title', '')) for a in articles]
+        index = TitleIndex.for_titles(shingles, ratio_candidate_threshold(threshold))
+
+        for article, title_set in zip(articles, shingles):
             norm_url = self._normalize_url(article.get('link', ''))
 
             # URL 完全一致チェック
@@ -157,67 +444,184 @@ class ContentManager:
                 logger.debug("重複(URL): %s", article.get('title', ''))
                 continue
 
-            # タイトル類似度チェック
+            # タイトル類似度チェック（インデックスの候補だけを照合）
             title = article.get('title', '')
-            is_dup = False
-            for kept in unique:
-                if self._title_similarity(title, kept.get('title', '')) >= threshold:
-                    logger.debug(
-                        "重複(タイトル): '%s' ≈ '%s'",
-                        title, kept.get('title', ''),
-                    )
-                    is_dup = True
-                    break
-
-            if is_dup:
+            match = next(
+                (idx for idx in index.candidates(title_set)
+                 if self._titles_match(title, unique[idx].get('title', ''), threshold)),
+                None,
+            )
+            if match is not None:
+                logger.debug(
+                    "重複(タイトル): '%s' ≈ '%s'",
+                    title, unique[match].get('title', ''),
+                )
                 continue
 
             if norm_url:
                 seen_urls.add(norm_url)
+            index.add(title_set)
             unique.append(article)
 
         return unique
     
+    # ── 配信済み記事 ──────────────────────────────────────────
+
+    def _filter_seen_articles(self, articles: list) -> list:
+        """前日までのエピソードで使用済みの記事を SEEN_ARTICLE_POLICY に従って除外・後回しにする"""
+        policy = config.SEEN_ARTICLE_POLICY
+        if policy == "off" or not articles:
+            return articles
+
+        store = SeenArticleStore()
+        today = datetime.now(JST).date()
+        fresh: list = []
+        seen: list = []
+        for article in articles:
+            norm_url = self._normalize_url(article.get('link', ''))
+            if store.is_seen(norm_url, article.get('title', ''), today):
+                seen.append(article)
+            else:
+                fresh.append(article)
+
+        if not seen:
+            return articles
+        if policy == "demote":
+            logger.info("配信済み記事: %d件を末尾に移動", len(seen))
+            return fresh + seen
+        if not fresh:
+            logger.warning("全%d件が配信済みのため、除外せずに使用します", len(seen))
+            return articles
+
+        logger.info("配信済み記事: %d件を除外（%d → %d件）", len(seen), len(articles), len(fresh))
+        return fresh
+
+    def mark_articles_seen(self, articles: List[Dict[str, Any]]) -> None:
+        """エピソードで使用した記事を配信済みとして記録する"""
+        if config.SEEN_ARTICLE_POLICY == "off":
+            return
+
+        store = SeenArticleStore()
+        today = datetime.now(JST).date()
+        for article in articles:
+            store.mark(self._normalize_url(article.get('link', '')), article.get('title', ''), today)
+        evicted = store.evict(today)
+        store.save()
+        logger.info(
+            "配信済み記事を記録: %d件（登録キー %d件、期限切れ削除 %d件）",
+            len(articles), len(store), evicted,
+        )
+
+    # ── 記事本文取得 ──────────────────────────────────────────
+
     def fetch_web_content(self, url):
-        """Webページからコンテンツを取得"""
+        """Webページからコンテンツを取得（抽出済みテキストはキャッシュから返す）"""
+        norm_url = self._normalize_url(url)
+        cached = self.extraction_cache.get(norm_url)
+        if cached is not None:
+            return cached
+
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # メインコンテンツを抽出
-            for script in soup(["script", "style", "nav", "header", "footer"]):
-                script.decompose()
-            
-            # 記事本文を取得（一般的なセレクターを試行）
-            content_selectors = [
-                'article', 
-                '.content', 
-                '.article-content',
-                '.post-content',
-                'main',
-                '#content'
-            ]
-            
-            content = ""
-            for selector in content_selectors:
-                elements = soup.select(selector)
-                if elements:
-                    content = elements[0].get_text(strip=True)
-                    break
-            
-            if not content:
-                content = soup.get_text(strip=True)
-            
-            return content[:config.MAX_CONTENT_LENGTH]
-            
+            html = self._download_page(url)
+            content = self._extract_text(html)
         except Exception as e:
             logger.warning("Webコンテンツ取得エラー (%s): %s", url, e)
             return ""
+
+        if content:
+            self.extraction_cache.put(norm_url, content, html)
+        return content
+
+    def fetch_web_contents(self, urls: List[str]) -> Dict[str, str]:
+        """複数ページの本文を並列に取得する
+
+        接続プール付きセッションを共有し、同一ホストへの同時接続は WEB_FETCH_PER_HOST までに制限する。
+        各ページは WEB_CONTENT_MAX_BYTES までしか読み込まない。
+
+        Returns:
+            {URL: 本文テキスト}（取得失敗したURLは空文字）
+        """
+        targets = [url for url in dict.fromkeys(urls) if url]
+        if not targets:
+            return {}
+
+        workers = max(1, min(config.WEB_FETCH_WORKERS, len(targets)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="web") as executor:
+            texts = list(executor.map(self.fetch_web_content, targets))
+
+        fetched = sum(1 for text in texts if text)
+        logger.info("記事本文取得: %d/%d件", fetched, len(targets))
+        self.extraction_cache.prune()
+        return dict(zip(targets, texts))
+
+    def _get_session(self) -> requests.Session:
+        """接続プール付きの共有セッションを返す（初回のみ生成）"""
+        with self._session_lock:
+            if self._session is None:
+                session = requests.Session()
+                session.headers['User-Agent'] = WEB_USER_AGENT
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=config.WEB_FETCH_WORKERS,
+                    pool_maxsize=config.WEB_FETCH_PER_HOST,
+                )
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._session = session
+            return self._session
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        """ホストごとの同時接続数を制限するセマフォを返す"""
+        host = urlparse(url).netloc
+        with self._session_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(config.WEB_FETCH_PER_HOST)
+            return self._host_slots[host]
+
+    def _download_page(self, url: str) -> bytes:
+        """ページをストリーミングで取得し、WEB_CONTENT_MAX_BYTES で打ち切る"""
+        limit = config.WEB_CONTENT_MAX_BYTES
+        chunks: List[bytes] = []
+        size = 0
+        with self._host_slot(url):
+            with self._get_session().get(url, timeout=config.WEB_FETCH_TIMEOUT, stream=True) as response:
+                response.raise_for_status()
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if size >= limit:
+                        break
+        return b"".join(chunks)[:limit]
+
+    @staticmethod
+    def _extract_text(html: bytes) -> str:
+        """HTMLから本文テキストを抽出し、MAX_CONTENT_LENGTH 文字で切り詰める"""
+        soup = BeautifulSoup(html, HTML_PARSER)
+
+        # メインコンテンツを抽出
+        for script in soup(["script", "style", "nav", "header", "footer"]):
+            script.decompose()
+
+        # 記事本文を取得（一般的なセレクターを試行）
+        content_selectors = [
+            'article', 
+            '.content', 
+            '.article-content',
+            '.post-content',
+            'main',
+            '#content'
+        ]
+
+        content = ""
+        for selector in content_selectors:
+            elements = soup.select(selector)
+            if elements:
+                content = elements[0].get_text(strip=True)
+                break
+
+        if not content:
+            content = soup.get_text(strip=True)
+
+        return content[:config.MAX_CONTENT_LENGTH]
     
     def process_articles_for_podcast(self, articles, topic_focus=None):
         """記事をポッドキャスト用に処理・要約"""
@@ -8,18 +8,19 @@
 
 import logging
 import os
-import time
 import xml.etree.ElementTree as ET
 from datetime import datetime, timezone, timedelta
-from typing import Optional
+from typing import Dict, List, Optional
 
 from pydub import AudioSegment
 
 import config
 from content_manager import ContentManager
 from deep_script_generator import DeepScriptGenerator
-from script_generator import Script
+from retry import RetryPolicy
+from script_generator import Script, should_regenerate
 from script_reviewer import ScriptReviewer
+from token_budget import ledger
 from tts_generator import TTSGenerator, get_daily_speakers
 from rss_feed_generator import RSSFeedGenerator
 from podcast_uploader import PodcastUploader, EpisodeMetadata
@@ -28,6 +29,9 @@ logger = logging.getLogger(__name__)
 
 JST = timezone(timedelta(hours=9))
 
+SCRIPT_MAX_ATTEMPTS = 5  # 台本生成の最大試行回数（台本が打ち切られたときに作り直す）
+SCRIPT_RETRY_BASE_DELAY = 30.0  # 台本生成をやり直すまでの初回待機（秒）。以降は倍々に延ばす
+
 
 class DeepDivePodcastGenerator:
     """深掘りポッドキャスト生成の全体オーケストレーション"""
@@ -96,29 +100,42 @@ class DeepDivePodcastGenerator:
 
         logger.info("[Deep]   %d件の記事を取得（ここからAIが厳選）", len(articles))
 
+        # 1.5. 記事本文の抜粋を付与（DEEP_ARTICLE_BODY_CHARS > 0 の場合のみ）
+        body_chars = getattr(config, 'DEEP_ARTICLE_BODY_CHARS', 0)
+        if body_chars > 0:
+            logger.info("[Deep] 1.5. 記事本文を取得中...")
+            bodies = self.content_manager.fetch_web_contents([a.get('link', '') for a in articles])
+            articles = [
+                dict(a, body=bodies.get(a.get('link', ''), '')[:body_chars])
+                for a in articles
+            ]
+
         # 2. 深掘り台本生成（AIが記事を厳選＋深い分析台本を生成）
-        #    503エラー時はリトライ（LLMは500 req/日なので余裕あり）
+        #    打ち切り・一時的な API エラー時はリトライ（LLMは500 req/日なので余裕あり）
         logger.info("[Deep] 2. 深掘り台本生成中...")
+        episode_num = self._get_episode_number()
+        today_jst = datetime.now(JST).date()
+        audio_filename = f"deep_{episode_num}_{today_jst.strftime('%Y%m%d')}.wav"
+        audio_path = os.path.join(config.AUDIO_OUTPUT_DIR, audio_filename)
+
         script = None
         is_fallback = False
-        max_retries = 4
-        for attempt in range(max_retries + 1):
+        audio_ready = False
+        if config.SCRIPT_STREAMING:
+            # 台本の生成中から音声合成を始める（失敗したら通常の生成に切り替え）
+            script = self._generate_streaming(articles, audio_path)
+            audio_ready = script is not None
+        if not audio_ready:
+            # 打ち切られた台本は、待機して台本生成ごとやり直す（一時的な API エラーは呼び出しごとに再試行済み）
+            policy = RetryPolicy(
+                "[Deep] 台本生成", self.script_generator.model,
+                max_attempts=SCRIPT_MAX_ATTEMPTS, base_delay=SCRIPT_RETRY_BASE_DELAY,
+                retry_on=should_regenerate,
+            )
             try:
-                script = self.script_generator.generate_script(articles)
-                break
+                script = policy.call(self.script_generator.generate_script, articles)
             except Exception as e:
-                is_503 = "503" in str(e) or "UNAVAILABLE" in str(e)
-                is_truncated = "台本が短すぎます" in str(e) or "トークン上限" in str(e)
-                if (is_503 or is_truncated) and attempt < max_retries:
-                    wait = 60 * (attempt + 1)
-                    logger.warning(
-                        "[Deep] 台本生成失敗 (attempt %d/%d), %d秒後にリトライ: %s",
-                        attempt + 1, max_retries + 1, wait, e,
-                    )
-                    time.sleep(wait)
-                else:
-                    logger.warning("[Deep] 台本生成失敗（リトライ上限）: %s", e)
-                    break
+                logger.warning("[Deep] 台本生成失敗（リトライ上限）: %s", e)
 
         if script is None:
             # リトライしても失敗 → お休み告知を生成して配信
@@ -132,6 +149,8 @@ class DeepDivePodcastGenerator:
         # お休み告知は固定テンプレなのでレビュー不要
         if is_fallback:
             logger.info("[Deep] 2.5. お休み告知のため台本レビューをスキップ")
+        elif audio_ready:
+            logger.info("[Deep] 2.5. ストリーミング生成のため台本レビューをスキップ")
         else:
             logger.info("[Deep] 2.5. 台本レビュー中...")
             script = self.script_reviewer.review(script, articles)
@@ -139,17 +158,16 @@ class DeepDivePodcastGenerator:
 
         # 3. 音声生成
         logger.info("[Deep] 3. 音声生成中...")
-        episode_num = self._get_episode_number()
-        today_jst = datetime.now(JST).date()
-        audio_filename = f"deep_{episode_num}_{today_jst.strftime('%Y%m%d')}.wav"
-        audio_path = os.path.join(config.AUDIO_OUTPUT_DIR, audio_filename)
-
         try:
-            self.tts_generator.generate_audio(script, audio_path)
+            if not audio_ready:
+                self.tts_generator.generate_audio(script, audio_path)
         except Exception as e:
             logger.error("[Deep] 音声生成失敗: %s", e)
             return None
 
+        # ステージごとのトークン使用量（台本生成・レビュー・TTS）
+        ledger.report()
+
         # 3.5 WAV → MP3 変換
         mp3_path = audio_path.replace('.wav', '.mp3')
         try:
@@ -164,6 +182,7 @@ class DeepDivePodcastGenerator:
 
         mp3_filename = os.path.basename(audio_path)
         mp3_size = os.path.getsize(audio_path) if os.path.exists(audio_path) else None
+        feed_updated = False
         try:
             self.rss_generator.add_episode(
                 mp3_filename=mp3_filename,
@@ -173,12 +192,21 @@ class DeepDivePodcastGenerator:
                 duration_seconds=metadata.duration_seconds,
                 mp3_size=mp3_size,
             )
+            feed_updated = True
         except Exception as e:
             logger.error("[Deep] RSS フィード更新失敗: %s", e)
 
         # 5. メタデータ JSON 保存
         success = self.uploader.upload(audio_path, metadata)
 
+        # 6. 台本で扱った記事を配信済みとして記録（翌日以降の再送を防ぐ）
+        # フィードに載らなかったエピソードの記事は、次の実行で使えるよう記録しない
+        if not is_fallback and self.script_generator.used_articles:
+            if feed_updated and success:
+                self.content_manager.mark_articles_seen(self.script_generator.used_articles)
+            else:
+                logger.warning("[Deep] エピソードを配信できなかったため、記事を配信済みにしません")
+
         if success:
             logger.info("=== 深掘りポッドキャスト生成完了 ===")
             logger.info("[Deep]   エピソード: %s", metadata.title)
@@ -188,6 +216,22 @@ class DeepDivePodcastGenerator:
 
         return metadata
 
+    def _generate_streaming(self, articles: List[Dict[str, str]], audio_path: str) -> Optional[Script]:
+        """台本をストリーミング生成しながら音声合成する（SCRIPT_STREAMING）
+
+        Returns:
+            成功時は台本（音声は audio_path に保存済み）、失敗時は None
+        """
+        logger.info("[Deep] 2-3. 台本生成と音声生成を並行実行中（ストリーミング）...")
+        try:
+            script = self.tts_generator.generate_audio_stream(
+                self.script_generator.generate_script_stream(articles), audio_path,
+            )
+        except Exception as e:
+            logger.warning("[Deep] ストリーミング生成失敗、通常の生成に切り替え: %s", e)
+            return None
+        return script
+
     def _get_episode_number(self) -> int:
         """次のエピソード番号を算出する（feed_deep.xml から）
 
@@ -2,43 +2,37 @@
 深掘りポッドキャスト台本生成モジュール
 Gemini Flash APIを使い、厳選した記事について深い分析・考察を含む対話台本を生成する
 
-ScriptGeneratorを継承し、PRONUNCIATION_MAP・_parse_response・_apply_pronunciation_fixes を再利用する。
+ScriptGeneratorを継承し、_parse_response・_apply_pronunciation_fixes（読み替え辞書）を再利用する。
 """
 
 import json
 import logging
 import re
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional
 
 from google import genai
 from google.genai import types
 
 import config
+from json_stream import JSONArrayParser
+from retry import RetryPolicy
 from script_generator import (
     ScriptGenerator,
     ScriptLine,
     Script,
+    ScriptTooShortError,
 )
+from token_budget import compact_article, fit_prompt
 
 logger = logging.getLogger(__name__)
 
+TOPIC_SELECTION_MAX_TOKENS = 2048  # トピック選定の応答は見出しと記事番号だけなので短い
+TOPIC_SEGMENT_MAX_TOKENS = 16384  # 1トピック分のパート（1000〜1700文字程度）
 
-DEEP_SYSTEM_PROMPT_TEMPLATE = """\
-あなたはポッドキャストの台本ライターです。
-以下のニュース記事群の中から最も重要・注目すべき{max_topics}件を選び、
-それぞれについて深い洞察と分析を含む対話形式のポッドキャスト台本を作成してください。
-
-話者設定:
-- 話者A: ホスト（進行役）。名前は「{host_name}」
-- 話者B: ゲスト（解説役・テック専門家）。名前は「{guest_name}」
-- 台本中の speaker は "A" "B" を使用する（名前はテキスト内で自然に使う）
-
-記事選定の基準:
-- 社会的インパクトが大きいもの
-- 技術的に革新的・興味深いもの
-- 複数ソース（国内外）で報じられている注目度の高いもの
-- リスナーにとって実用的な知見が得られるもの
 
+# 各トピックの分析観点（一括生成・トピック別生成で共通）
+DEEP_ANALYSIS_RULES = """\
 各トピックで必ず含めること:
 1. 背景・経緯: なぜこのニュースが生まれたのか、これまでの流れ
 2. 技術的な解説: 関連する技術の仕組みや原理をわかりやすく説明
@@ -47,21 +41,10 @@ DEEP_SYSTEM_PROMPT_TEMPLATE = """\
 5. 日本と海外の比較: 国内外の動向の違いがあれば言及
 6. 今後の展望: この先どうなるかの考察・予測
 
-要件:
-- 10〜15分程度の会話になるボリューム（合計3000〜5000文字程度）
-- 1トピックあたり5〜8往復の深い議論
-- 選んだ{max_topics}件のトピックはそれぞれ異なるテーマであること。同じ話題を別のトピックとして繰り返さない
-- 複数の記事が同じニュースを扱っている場合は、それらを統合して1つのトピックとして扱う
-- 冒頭の挨拶は「おはようございます、{host_name}です」「{guest_name}です、よろしくお願いします」のように名乗りする（名乗りは冒頭の1回のみ。以降の発話で「〇〇です」と繰り返し名乗らないこと）
-- 冒頭で「この番組はAIによって自動生成されています」と必ず述べる
-- 冒頭で「このコーナーでは最新ニュースを深掘りして解説していきます」と趣旨を説明
-- 会話中は相手を名前で呼ぶことがある（「{guest_name}さん、それは〜」など）が、自分の名前を毎回名乗る必要はない
-- 自然な相槌・質問・感想・反論を含める
-- ホストが素朴な疑問を投げかけ、ゲストが専門知識で答える形式を基本にする
-- 各トピックを紹介する際にソース名を明示する
-- トピック間の切り替えには自然な橋渡しを入れる
-- 末尾にまとめと「今日も聞いてくれてありがとうございました、また明日お会いしましょう」という締めの挨拶を入れる
+"""
 
+# 著作権・事実確認・発音表記・出力形式のルール（一括生成・トピック別生成で共通）
+DEEP_CONTENT_RULES = """\
 著作権に関する注意:
 - 元記事の文章をそのまま引用・転載しないこと
 - あなた自身の言葉で独自に要約・解説・分析すること
@@ -90,6 +73,87 @@ DEEP_SYSTEM_PROMPT_TEMPLATE = """\
 [{{"speaker": "A", "text": "..."}}, {{"speaker": "B", "text": "..."}}], ...]
 """
 
+# 話者設定（一括生成・トピック別生成で共通）
+DEEP_SPEAKER_RULES = """\
+話者設定:
+- 話者A: ホスト（進行役）。名前は「{host_name}」
+- 話者B: ゲスト（解説役・テック専門家）。名前は「{guest_name}」
+- 台本中の speaker は "A" "B" を使用する（名前はテキスト内で自然に使う）
+
+"""
+
+# 記事選定の基準（一括生成・トピック選定で共通）
+DEEP_SELECTION_CRITERIA = """\
+記事選定の基準:
+- 社会的インパクトが大きいもの
+- 技術的に革新的・興味深いもの
+- 複数ソース（国内外）で報じられている注目度の高いもの
+- リスナーにとって実用的な知見が得られるもの
+
+"""
+
+DEEP_SYSTEM_PROMPT_TEMPLATE = """\
+あなたはポッドキャストの台本ライターです。
+以下のニュース記事群の中から最も重要・注目すべき{max_topics}件を選び、
+それぞれについて深い洞察と分析を含む対話形式のポッドキャスト台本を作成してください。
+
+""" + DEEP_SPEAKER_RULES + DEEP_SELECTION_CRITERIA + DEEP_ANALYSIS_RULES + """\
+要件:
+- 10〜15分程度の会話になるボリューム（合計3000〜5000文字程度）
+- 1トピックあたり5〜8往復の深い議論
+- 選んだ{max_topics}件のトピックはそれぞれ異なるテーマであること。同じ話題を別のトピックとして繰り返さない
+- 複数の記事が同じニュースを扱っている場合は、それらを統合して1つのトピックとして扱う
+- 冒頭の挨拶は「おはようございます、{host_name}です」「{guest_name}です、よろしくお願いします」のように名乗りする（名乗りは冒頭の1回のみ。以降の発話で「〇〇です」と繰り返し名乗らないこと）
+- 冒頭で「この番組はAIによって自動生成されています」と必ず述べる
+- 冒頭で「このコーナーでは最新ニュースを深掘りして解説していきます」と趣旨を説明
+- 会話中は相手を名前で呼ぶことがある（「{guest_name}さん、それは〜」など）が、自分の名前を毎回名乗る必要はない
+- 自然な相槌・質問・感想・反論を含める
+- ホストが素朴な疑問を投げかけ、ゲストが専門知識で答える形式を基本にする
+- 各トピックを紹介する際にソース名を明示する
+- トピック間の切り替えには自然な橋渡しを入れる
+- 末尾にまとめと「今日も聞いてくれてありがとうございました、また明日お会いしましょう」という締めの挨拶を入れる
+
+""" + DEEP_CONTENT_RULES
+
+
+# トピック別生成: 1回目の呼び出しで扱うトピックだけを選ぶ（出力が短いので速い）
+DEEP_TOPIC_SELECTION_PROMPT_TEMPLATE = """\
+あなたはポッドキャストの編集者です。
+以下のニュース記事群の中から、深掘り解説番組で扱う最も重要・注目すべきトピックを{max_topics}件選んでください。
+
+""" + DEEP_SELECTION_CRITERIA + """\
+ルール:
+- 選んだ{max_topics}件のトピックはそれぞれ全く異なるテーマであること
+- 複数の記事が同じニュースを扱っている場合は、それらを統合して1つのトピックとして扱う
+- title はトピックを表す短い日本語の見出しにする（英語の記事タイトルをそのまま使わない）
+- title の英語の固有名詞や略語にはカタカナ読みを括弧で併記する 例: GitHub（ギットハブ）
+- articles にはそのトピックで扱う記事番号を入れる
+- 重要な順に並べる
+
+出力形式: JSON配列
+[{{"title": "トピックの見出し", "articles": [1, 4]}}, ...]
+"""
+
+# トピック別生成: 2回目以降の呼び出しで各トピックのパートを並列に生成する
+# （冒頭の挨拶と締めはテンプレートで組み立てるので、ここでは生成しない）
+DEEP_SEGMENT_PROMPT_TEMPLATE = """\
+あなたはポッドキャストの台本ライターです。
+深掘りニュース解説番組のうち、提示された1つのトピックを扱うパートの対話台本を作成してください。
+番組冒頭の挨拶と末尾の締めの挨拶は別に用意されているので、このパートには含めないでください。
+
+""" + DEEP_SPEAKER_RULES + DEEP_ANALYSIS_RULES + """\
+要件:
+- 5〜8往復の深い議論（合計1000〜1700文字程度）
+- ホストがトピックを紹介するところから始め、紹介の際にソース名を明示する
+- 「前のトピック」が提示されている場合は、最初の発話で前のトピックから自然に橋渡しする
+- 挨拶・名乗り・番組の趣旨説明・締めの挨拶は入れない
+- 会話中は相手を名前で呼ぶことがある（「{guest_name}さん、それは〜」など）が、自分の名前を名乗らない
+- 自然な相槌・質問・感想・反論を含める
+- ホストが素朴な疑問を投げかけ、ゲストが専門知識で答える形式を基本にする
+- 最後はこのトピックの要点を短くまとめて終える
+
+""" + DEEP_CONTENT_RULES
+
 
 class DeepScriptGenerator(ScriptGenerator):
     """深掘りポッドキャスト対話台本を生成する
@@ -98,6 +162,7 @@ class DeepScriptGenerator(ScriptGenerator):
     - プロンプト: 深い分析・考察を要求
     - 記事選定: 全記事から重要な2-3件をAIが選定
     - 台本長: 3000-5000文字（10-15分）
+    - 生成方法: DEEP_PARALLEL_TOPICS=True ではトピック選定の後、トピックごとのパートを並列に生成して連結
     """
 
     def __init__(self, api_key: Optional[str] = None,
@@ -112,12 +177,194 @@ class DeepScriptGenerator(ScriptGenerator):
             guest_name=self.guest_name,
             max_topics=self.max_topics,
         )
+        self.selection_prompt = DEEP_TOPIC_SELECTION_PROMPT_TEMPLATE.format(max_topics=self.max_topics)
+        self.segment_prompt = DEEP_SEGMENT_PROMPT_TEMPLATE.format(
+            host_name=self.host_name,
+            guest_name=self.guest_name,
+        )
+
+    def generate_script(self, articles: List[Dict[str, Any]]) -> Script:
+        """記事リストから深掘り台本を生成する
+
+        DEEP_PARALLEL_TOPICS が有効なら、トピック選定（短い応答）→ トピック別パートの並列生成
+        → 冒頭・締めと連結、の順に組み立てる。待ち時間は最も遅いトピック1件分で済み、
+        失敗したトピックだけを再生成する（成功したパートはLLM応答キャッシュから再利用される）。
+        """
+        if not config.DEEP_PARALLEL_TOPICS or self.max_topics < 2:
+            return super().generate_script(articles)
+        if not articles:
+            raise ValueError("記事リストが空です")
+
+        logger.info(
+            "深掘り台本生成を開始 (モデル: %s, 記事数: %d, トピック別並列生成)",
+            self.model, len(articles),
+        )
+        topics = self._select_topics(articles)
+        segments = self._generate_segments(articles, topics)
+
+        titles = [topic['title'] for topic, segment in zip(topics, segments) if segment]
+        self.used_articles = [
+            articles[n - 1]
+            for topic, segment in zip(topics, segments) if segment
+            for n in topic['articles']
+        ]
+        script: Script = self._intro_lines(titles)
+        for segment in segments:
+            script.extend(segment)
+        script.extend(self._outro_lines(titles))
+
+        script = self._apply_pronunciation_fixes(script)
+        logger.info("深掘り台本生成完了: %d行 (%dトピック)", len(script), len(titles))
+        self._check_length(len(script))
+        return script
+
+    def _select_topics(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """扱うトピックを選ぶ: [{"title": 見出し, "articles": [記事番号, ...]}, ...]"""
+        prompt = self._build_selection_prompt(articles)
+        response_text, cache_key = self._request_json(
+            prompt, self.selection_prompt, max_output_tokens=TOPIC_SELECTION_MAX_TOKENS,
+            stage="トピック選定",
+        )
+
+        topics: List[Dict[str, Any]] = []
+        used = set()
+        for item in JSONArrayParser().feed(response_text):
+            if not isinstance(item, dict):
+                continue
+            title = str(item.get('title', '')).strip()
+            numbers = item.get('articles')
+            if not title or not isinstance(numbers, list):
+                continue
+            # 範囲外の番号と、別のトピックで使った記事は除く
+            indices = []
+            for n in numbers:
+                if isinstance(n, int) and 1 <= n <= len(articles) and n not in used:
+                    indices.append(n)
+                    used.add(n)
+            if indices:
+                topics.append({'title': title, 'articles': indices})
+            if len(topics) >= self.max_topics:
+                break
+
+        if not topics:
+            raise ValueError("トピック選定に失敗しました: 有効なトピックがありません")
+        logger.info("トピック選定完了: %s", " / ".join(t['title'] for t in topics))
+        self.response_cache.put(cache_key, response_text, self.model)
+        return topics
+
+    def _generate_segments(self, articles: List[Dict[str, Any]],
+                           topics: List[Dict[str, Any]]) -> List[Script]:
+        """トピック別パートを並列に生成する（失敗したトピックは空の Script）
+
+        各パートは直前のトピックが成功する前提の橋渡しで書かれるので、直前のトピックが失敗した
+        パートは、実際に直前に来るトピックを渡して作り直す（作り直しに失敗したら除外する）。
+        全トピックが失敗した場合は最後のエラーをそのまま送出する（呼び出し側でリトライを判定できるように）。
+        """
+        titles: List[Optional[str]] = [None] + [topic['title'] for topic in topics]
+        with ThreadPoolExecutor(max_workers=len(topics), thread_name_prefix="topic") as executor:
+            futures = [
+                executor.submit(self._generate_segment, articles, topics, i, titles[i])
+                for i in range(len(topics))
+            ]
+        segments: List[Script] = []
+        last_error: Optional[Exception] = None
+        previous: Optional[str] = None  # 直前に残ったトピックの見出し
+        for i, (topic, future) in enumerate(zip(topics, futures)):
+            try:
+                segment = future.result()
+                if titles[i] != previous:
+                    logger.info("トピック%d「%s」: 直前のトピックが除外されたため橋渡しを作り直します",
+                                i + 1, topic['title'])
+                    segment = self._generate_segment(articles, topics, i, previous)
+            except Exception as e:
+                logger.warning("トピック「%s」の台本生成に失敗、このトピックを除外します: %s", topic['title'], e)
+                segments.append([])
+                last_error = e
+                continue
+            segments.append(segment)
+            previous = topic['title']
+
+        if last_error is not None and not any(segments):
+            logger.warning("全トピックの台本生成に失敗しました")
+            raise last_error
+        return segments
+
+    def _generate_segment(self, articles: List[Dict[str, Any]],
+                          topics: List[Dict[str, Any]], index: int,
+                          previous: Optional[str]) -> Script:
+        """1トピック分のパートを生成する（応答が不正・短すぎる場合は DEEP_TOPIC_RETRIES 回まで再生成）
+
+        previous は直前に来るトピックの見出し（None なら番組冒頭の挨拶の直後）。
+        """
+        topic = topics[index]
+        prompt = self._build_segment_prompt(articles, topics, index, previous)
+
+        def generate() -> Script:
+            response_text, cache_key = self._request_json(
+                prompt, self.segment_prompt, max_output_tokens=TOPIC_SEGMENT_MAX_TOKENS,
+                stage="トピック別台本",
+            )
+            segment = self._parse_response(response_text)
+            if len(segment) < 4:
+                raise ScriptTooShortError(f"トピックの台本が短すぎます ({len(segment)}行)")
+            self.response_cache.put(cache_key, response_text, self.model)
+            return segment
+
+        # API エラーのリトライは _request_json 内で行うので、ここでは応答の不備だけを再生成する
+        policy = RetryPolicy(
+            f"トピック{index + 1}「{topic['title']}」", self.model,
+            max_attempts=config.DEEP_TOPIC_RETRIES + 1,
+            retry_on=lambda e: isinstance(e, ValueError),
+        )
+        segment = policy.call(generate)
+        logger.info("トピック%d「%s」: %d行", index + 1, topic['title'], len(segment))
+        return segment
+
+    def _intro_lines(self, titles: List[str]) -> Script:
+        """冒頭の挨拶（名乗り・AI生成の告知・趣旨説明・トピック紹介）"""
+        return [
+            ScriptLine(speaker="A", text=f"おはようございます、{self.host_name}です。"),
+            ScriptLine(speaker="B", text=f"{self.guest_name}です、よろしくお願いします。"),
+            ScriptLine(
+                speaker="A",
+                text="この番組はAIによって自動生成されています。"
+                     "このコーナーでは最新ニュースを深掘りして解説していきます。"
+                     f"今日取り上げるのは、{_join_titles(titles)}の{len(titles)}つです。",
+            ),
+            ScriptLine(speaker="B", text="どれも気になる話題ですね。さっそく見ていきましょう。"),
+        ]
+
+    def _outro_lines(self, titles: List[str]) -> Script:
+        """まとめと締めの挨拶"""
+        return [
+            ScriptLine(
+                speaker="A",
+                text=f"今日は、{_join_titles(titles)}について深掘りしてきました。"
+                     f"{self.guest_name}さん、振り返ってみていかがでしたか？",
+            ),
+            ScriptLine(
+                speaker="B",
+                text="どのトピックも、これからの動き次第で影響が大きく変わりそうです。"
+                     "引き続き注目していきたいですね。",
+            ),
+            ScriptLine(
+                speaker="A",
+                text="今日も聞いてくれてありがとうございました、また明日お会いしましょう。",
+            ),
+        ]
 
     def _build_prompt(self, articles: List[Dict[str, Any]]) -> str:
         """記事情報からプロンプトテキストを構築する（深掘り版）
 
         全記事を提示し、AIに重要な記事の選定と深掘り台本の生成を任せる。
+        URL・タイトルを圧縮し、PROMPT_TOKEN_BUDGET に収める。
+        どの記事を扱ったかは分からないので、used_articles は空にする（選ばれなかった記事を配信済みにしない）。
         """
+        self.used_articles = []
+        return fit_prompt(articles, self._render_prompt, label="深掘り台本プロンプト")
+
+    def _render_prompt(self, articles: List[Dict[str, Any]]) -> str:
+        """記事リストをプロンプトテキストにする（link・body が空ならその行を省く）"""
         lines = [
             f"以下の{len(articles)}件のニュース記事から、"
             f"最も重要な{self.max_topics}件を選んで深掘り台本を作成してください。\n",
@@ -125,17 +372,64 @@ class DeepScriptGenerator(ScriptGenerator):
             "同じニュースを複数のソースが報じている場合は、それらを統合して1つのトピックとして扱ってください。",
             f"重要: 選んだ{self.max_topics}件のトピックはそれぞれ全く異なるテーマであること。同じ話題を繰り返さないでください。\n",
         ]
-
         for i, article in enumerate(articles, 1):
-            lines.append(f"--- 記事{i} ---")
-            lines.append(f"タイトル: {article.get('title', '不明')}")
-            lines.append(f"ソース: {article.get('source', '不明')}")
-            lines.append(f"URL: {article.get('link', '')}")
-            lines.append("")
+            lines.extend(_article_lines(i, article))
+        return "\n".join(lines)
+
+    def _build_selection_prompt(self, articles: List[Dict[str, Any]]) -> str:
+        """トピック選定用のプロンプト（記事本文は渡さない）"""
+        def render(candidates: List[Dict[str, Any]]) -> str:
+            lines = [
+                f"以下の{len(candidates)}件のニュース記事から、"
+                f"深掘りするトピックを{self.max_topics}件選んでください。\n",
+            ]
+            for i, article in enumerate(candidates, 1):
+                lines.extend(_article_lines(i, article))
+            return "\n".join(lines)
 
+        return fit_prompt([dict(a, body='') for a in articles], render, label="トピック選定プロンプト")
+
+    def _build_segment_prompt(self, articles: List[Dict[str, Any]],
+                              topics: List[Dict[str, Any]], index: int,
+                              previous: Optional[str]) -> str:
+        """トピック別パート用のプロンプト（直前のトピックの見出しを橋渡し用に添える）"""
+        topic = topics[index]
+        lines = [
+            f"全{len(topics)}トピック中{index + 1}つ目のトピック「{topic['title']}」のパートを作成してください。",
+        ]
+        if previous is not None:
+            lines.append(f"前のトピック: {previous}")
+        else:
+            lines.append("前のトピック: なし（番組冒頭の挨拶の直後に始まります）")
+        lines.append("")
+        for n in topic['articles']:
+            lines.extend(_article_lines(n, compact_article(articles[n - 1])))
         return "\n".join(lines)
 
 
+def _article_lines(number: int, article: Dict[str, Any]) -> List[str]:
+    """プロンプトに載せる記事1件分の行"""
+    lines = [
+        f"--- 記事{number} ---",
+        f"タイトル: {article.get('title', '不明')}",
+        f"ソース: {article.get('source', '不明')}",
+    ]
+    if article.get('link'):
+        lines.append(f"URL: {article['link']}")
+    if article.get('body'):
+        lines.append(f"本文抜粋: {article['body']}")
+    lines.append("")
+    return lines
+
+
+def _join_titles(titles: List[str]) -> str:
+    """「A」、「B」、そして「C」のようにトピックの見出しをつなげる"""
+    quoted = [f"「{t}」" for t in titles]
+    if len(quoted) <= 1:
+        return "".join(quoted)
+    return "、".join(quoted[:-1]) + "、そして" + quoted[-1]
+
+
 def deep_fallback_script(articles: List[dict],
                          host_name: str = "アオイ",
                          guest_name: str = "タクミ") -> Script:
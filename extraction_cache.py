@@ -0,0 +1,98 @@
+"""
+記事本文抽出キャッシュ
+正規化URLごとに抽出済み本文テキストを1ファイルずつ保存し、
+速報版・深掘り版やリトライで同じページを再取得・再解析しないようにする。
+"""
+
+import hashlib
+import logging
+import os
+import time
+from typing import Optional
+
+import config
+from cache_utils import load_json, save_json
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionCache:
+    """正規化URL → (本文テキスト, 抽出時刻, 元HTMLのハッシュ) のディスクキャッシュ
+
+    有効期限（EXTRACTION_CACHE_TTL_SEC）を過ぎたエントリは読み込まず、
+    prune() で期限切れと容量超過分（古い順）を削除する。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None,
+                 ttl_sec: Optional[int] = None,
+                 max_bytes: Optional[int] = None):
+        self.cache_dir = cache_dir or config.EXTRACTION_CACHE_DIR
+        self.ttl_sec = config.EXTRACTION_CACHE_TTL_SEC if ttl_sec is None else ttl_sec
+        self.max_bytes = config.EXTRACTION_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+
+    def _path(self, norm_url: str) -> str:
+        key = hashlib.sha256(norm_url.encode('utf-8')).hexdigest()[:32]
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, norm_url: str) -> Optional[str]:
+        """有効期限内の抽出済みテキストを返す（無ければ None）"""
+        path = self._path(norm_url)
+        entry = load_json(path, None)
+        if not entry or entry.get('url') != norm_url:
+            return None
+        if time.time() - entry.get('extracted_at', 0) > self.ttl_sec:
+            return None
+        return entry.get('text')
+
+    def put(self, norm_url: str, text: str, raw: bytes) -> None:
+        """抽出済みテキストを保存する"""
+        entry = {
+            'url': norm_url,
+            'text': text,
+            'extracted_at': time.time(),
+            'content_hash': hashlib.sha256(raw).hexdigest(),
+        }
+        try:
+            save_json(self._path(norm_url), entry)
+        except OSError as e:
+            logger.warning("本文キャッシュ保存エラー (%s): %s", norm_url, e)
+
+    def prune(self) -> int:
+        """期限切れのエントリと、容量上限を超えた古いエントリを削除して削除件数を返す"""
+        if not os.path.isdir(self.cache_dir):
+            return 0
+
+        now = time.time()
+        files = []
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json') or name.startswith('.tmp_'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.ttl_sec:
+                removed += self._remove(path)
+            else:
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            removed += self._remove(path)
+            total -= size
+
+        if removed:
+            logger.info("本文キャッシュ: %d件を削除", removed)
+        return removed
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except OSError:
+            return 0
@@ -0,0 +1,94 @@
+"""
+RSSフィードキャッシュ
+フィードURLごとに ETag / Last-Modified と解析済みエントリを保存し、
+条件付きGET（If-None-Match / If-Modified-Since）で 304 が返った場合に再利用する。
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import config
+from cache_utils import load_json, save_json
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+
+
+class FeedCache:
+    """フィードURL → (検証子, 解析済みエントリ) の永続キャッシュ"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or config.FEED_CACHE_PATH
+        data = load_json(self.path, {})
+        if data.get('version') != CACHE_VERSION:
+            data = {}
+        self._feeds: Dict[str, Dict[str, Any]] = data.get('feeds', {})
+        self._dirty = False
+
+    def validators(self, feed_url: str) -> Dict[str, str]:
+        """条件付きGET用のリクエストヘッダーを返す（キャッシュが無ければ空）"""
+        cached = self._feeds.get(feed_url)
+        if not cached:
+            return {}
+        headers = {}
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+        return headers
+
+    def get(self, feed_url: str) -> Optional[Dict[str, Any]]:
+        """キャッシュ済みのフィード情報 {'source', 'entries'} を返す"""
+        cached = self._feeds.get(feed_url)
+        if cached is None:
+            return None
+        entries = [
+            dict(e, published_dt=_from_iso(e.get('published_dt')))
+            for e in cached.get('entries', [])
+        ]
+        return {'source': cached.get('source', feed_url), 'entries': entries}
+
+    def put(self, feed_url: str, headers: Dict[str, str], source: str,
+            entries: List[Dict[str, Any]]) -> None:
+        """200 応答の検証子とエントリを保存する（検証子が無いフィードは保存しない）"""
+        etag = headers.get('etag')
+        last_modified = headers.get('last-modified')
+        if not etag and not last_modified:
+            self._feeds.pop(feed_url, None)
+            return
+        self._feeds[feed_url] = {
+            'etag': etag,
+            'last_modified': last_modified,
+            'source': source,
+            'fetched_at': datetime.now(timezone.utc).isoformat(),
+            'entries': [
+                dict(e, published_dt=_to_iso(e.get('published_dt')))
+                for e in entries[:config.FEED_CACHE_MAX_ENTRIES]
+            ],
+        }
+        self._dirty = True
+
+    def discard(self, feed_url: str) -> None:
+        """フィードのキャッシュを削除する（次回は条件付きGETにしない）"""
+        if self._feeds.pop(feed_url, None) is not None:
+            self._dirty = True
+
+    def save(self) -> None:
+        """変更があればキャッシュファイルに書き出す"""
+        if not self._dirty:
+            return
+        try:
+            save_json(self.path, {'version': CACHE_VERSION, 'feeds': self._feeds})
+            self._dirty = False
+        except OSError as e:
+            logger.warning("フィードキャッシュ保存エラー: %s", e)
+
+
+def _to_iso(dt: Optional[datetime]) -> Optional[str]:
+    return dt.isoformat() if dt else None
+
+
+def _from_iso(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
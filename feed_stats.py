@@ -0,0 +1,99 @@
+"""
+フィード取得統計
+フィードURLごとの取得時間・転送量・記事数・連続失敗回数を永続化し、
+取得タイムアウトの自動調整、壊れたフィードの一時停止（サーキットブレーカー）、
+遅いフィードから順に取得を始めるための並び順に使う。
+"""
+
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+import config
+from cache_utils import load_json, save_json
+
+logger = logging.getLogger(__name__)
+
+STATS_VERSION = 1
+LATENCY_SMOOTHING = 0.3  # 取得時間の指数移動平均の重み（新しい値の比率）
+
+
+class FeedStats:
+    """フィードごとの取得統計と、それに基づく取得方針"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or config.FEED_STATS_PATH
+        data = load_json(self.path, {})
+        if data.get('version') != STATS_VERSION:
+            data = {}
+        self._feeds: Dict[str, Dict[str, Any]] = data.get('feeds', {})
+
+    def get(self, feed_url: str) -> Dict[str, Any]:
+        return self._feeds.get(feed_url, {})
+
+    def timeout_for(self, feed_url: str) -> float:
+        """過去の取得時間から、このフィードに割り当てるタイムアウト（秒）を決める
+
+        平均取得時間の FEED_TIMEOUT_FACTOR 倍を FEED_TIMEOUT_MIN〜FEED_FETCH_TIMEOUT に収める。
+        統計がないフィードは FEED_FETCH_TIMEOUT をそのまま使う。
+        """
+        latency = self.get(feed_url).get('latency')
+        if latency is None:
+            return config.FEED_FETCH_TIMEOUT
+        return min(
+            config.FEED_FETCH_TIMEOUT,
+            max(config.FEED_TIMEOUT_MIN, latency * config.FEED_TIMEOUT_FACTOR),
+        )
+
+    def should_skip(self, feed_url: str, now: Optional[float] = None) -> bool:
+        """連続失敗が閾値以上で、再試行間隔が経過していなければ True"""
+        stats = self.get(feed_url)
+        if stats.get('failure_streak', 0) < config.FEED_FAILURE_THRESHOLD:
+            return False
+        now = time.time() if now is None else now
+        return now - stats.get('last_attempt', 0) < config.FEED_REPROBE_INTERVAL_SEC
+
+    def order(self, feed_urls: List[str]) -> List[str]:
+        """取得時間が長いフィードから順に並べる（統計がないフィードは先頭）"""
+        return sorted(
+            feed_urls,
+            key=lambda url: -self.get(url).get('latency', float('inf')),
+        )
+
+    def record_success(self, feed_url: str, latency: Optional[float], size: Optional[int],
+                       entries: int) -> None:
+        """取得成功を記録する
+
+        latency・size は本文を最後まで受信した 200 応答のときだけ渡す（None なら更新しない）。
+        304 や途中で打ち切った受信は所要時間が短く、タイムアウトを縮めすぎてしまうため。
+        """
+        stats = self._feeds.setdefault(feed_url, {})
+        if latency is not None:
+            previous = stats.get('latency')
+            stats['latency'] = round(
+                latency if previous is None
+                else previous + LATENCY_SMOOTHING * (latency - previous), 3,
+            )
+        if size is not None:
+            stats['bytes'] = size
+        stats['entries'] = entries
+        stats['failure_streak'] = 0
+        stats['last_attempt'] = stats['last_success'] = time.time()
+
+    def record_failure(self, feed_url: str) -> None:
+        """取得失敗を記録する"""
+        stats = self._feeds.setdefault(feed_url, {})
+        stats['failure_streak'] = stats.get('failure_streak', 0) + 1
+        stats['last_attempt'] = time.time()
+        if stats['failure_streak'] == config.FEED_FAILURE_THRESHOLD:
+            logger.warning(
+                "フィードが%d回連続で失敗、%d時間停止します: %s",
+                stats['failure_streak'], config.FEED_REPROBE_INTERVAL_SEC // 3600, feed_url,
+            )
+
+    def save(self) -> None:
+        """統計をファイルに書き出す"""
+        try:
+            save_json(self.path, {'version': STATS_VERSION, 'feeds': self._feeds})
+        except OSError as e:
+            logger.warning("フィード統計保存エラー: %s", e)
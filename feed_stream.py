@@ -0,0 +1,137 @@
+"""
+ストリーミングフィードパーサー
+レスポンス本文を受信しながら XMLPullParser で RSS 2.0 / RSS 1.0 (RDF) / Atom のエントリを逐次取り出し、
+必要な件数が揃った時点、または日付の古いエントリが続いた時点で読み込みを打ち切る。
+
+厳密な XML として読めないフィード（未定義の実体参照・非対応の文字コードなど）は
+FeedStreamError を送出するので、呼び出し側で feedparser にフォールバックする。
+"""
+
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from xml.etree.ElementTree import Element, ParseError, XMLPullParser
+
+ENTRY_TAGS = {'item', 'entry'}
+FEED_TAGS = {'channel', 'feed'}
+
+
+class FeedStreamError(Exception):
+    """ストリーミング解析できないフィード"""
+
+
+def _local(tag: str) -> str:
+    """'{namespace}name' から name を取り出す"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _child_text(elem: Element, *names: str) -> str:
+    for name in names:
+        for child in elem:
+            if _local(child.tag) == name and child.text and child.text.strip():
+                return child.text.strip()
+    return ''
+
+
+def _entry_link(elem: Element) -> str:
+    """RSS は <link>本文</link>、Atom は <link rel="alternate" href="..."/> から取り出す"""
+    fallback = ''
+    for child in elem:
+        if _local(child.tag) != 'link':
+            continue
+        if child.text and child.text.strip():
+            return child.text.strip()
+        href = child.get('href', '')
+        if href and child.get('rel', 'alternate') == 'alternate':
+            return href
+        fallback = fallback or href
+    return fallback
+
+
+class FeedStreamParser:
+    """受信チャンクからエントリを逐次取り出すパーサー
+
+    Args:
+        max_entries: 読み込むエントリ数の上限
+        max_fresh: cutoff 以降のエントリがこの件数揃ったら打ち切る
+        cutoff: これより古いエントリを「古い」とみなす（None で日付判定なし）
+        stale_limit: 古いエントリがこの件数連続したら打ち切る（新しい順に並んだフィードを想定）
+        parse_date: エントリ辞書から公開日時を返す関数
+    """
+
+    def __init__(self, max_entries: int, max_fresh: int, cutoff: Optional[datetime],
+                 stale_limit: int, parse_date: Callable[[Dict[str, Any]], Optional[datetime]]):
+        self.max_entries = max_entries
+        self.max_fresh = max_fresh
+        self.cutoff = cutoff
+        self.stale_limit = stale_limit
+        self.parse_date = parse_date
+
+        self.source = ''
+        self.entries: List[Dict[str, Any]] = []
+        self.stopped_early = False
+        self._fresh = 0
+        self._stale_run = 0
+
+    def parse(self, chunks: Iterable[bytes]) -> List[Dict[str, Any]]:
+        """チャンク列を解析し、取り出したエントリを返す（打ち切り時は残りを読まない）"""
+        parser = XMLPullParser(events=('start', 'end'))
+        path: List[str] = []
+        for chunk in chunks:
+            self._feed(parser, chunk)
+            for event, elem in parser.read_events():
+                name = _local(elem.tag)
+                if event == 'start':
+                    path.append(name)
+                    continue
+                path.pop()
+                if name in ENTRY_TAGS:
+                    self._add_entry(elem)
+                    elem.clear()
+                    if self._done():
+                        self.stopped_early = True
+                        return self.entries
+                elif name == 'title' and path and path[-1] in FEED_TAGS and not self.source:
+                    self.source = (elem.text or '').strip()
+        self._feed(parser, None)
+        return self.entries
+
+    @staticmethod
+    def _feed(parser: XMLPullParser, chunk: Optional[bytes]) -> None:
+        """チャンクを渡す（None なら終端）。解析できない入力は FeedStreamError にする
+
+        Shift_JIS・EUC-JP などのマルチバイト文字コードは expat が扱えず ValueError、
+        未知の文字コード名は LookupError になる。
+        """
+        try:
+            if chunk is None:
+                parser.close()
+            else:
+                parser.feed(chunk)
+        except (ParseError, ValueError, LookupError) as e:
+            raise FeedStreamError(str(e)) from e
+
+    def _add_entry(self, elem: Element) -> None:
+        entry: Dict[str, Any] = {
+            'title': _child_text(elem, 'title'),
+            'summary': _child_text(elem, 'description', 'summary', 'content'),
+            'link': _entry_link(elem),
+            'published': _child_text(elem, 'pubDate', 'date', 'published', 'issued'),
+            'updated': _child_text(elem, 'updated', 'modified'),
+        }
+        pub_dt = self.parse_date(entry)
+        del entry['updated']
+        entry['published_dt'] = pub_dt
+        self.entries.append(entry)
+
+        if self.cutoff and pub_dt and pub_dt < self.cutoff:
+            self._stale_run += 1
+        else:
+            self._stale_run = 0
+            self._fresh += 1
+
+    def _done(self) -> bool:
+        return (
+            len(self.entries) >= self.max_entries
+            or self._fresh >= self.max_fresh
+            or (self.stale_limit > 0 and self._stale_run >= self.stale_limit)
+        )
@@ -0,0 +1,45 @@
+"""
+Gemini クライアントの共有
+API キーごとに genai.Client を1つだけ作り、台本生成・レビュー・TTS（速報版・深掘り版）で使い回す。
+同じ HTTP クライアントの keep-alive 接続を再利用するので、ステージごとの TLS ハンドシェイクが省ける。
+接続数の上限はここで一括して設定する。
+"""
+
+import logging
+import threading
+from typing import Dict, Optional
+
+import httpx
+from google import genai
+from google.genai import types
+
+import config
+
+logger = logging.getLogger(__name__)
+
+_clients: Dict[str, genai.Client] = {}
+_lock = threading.Lock()
+
+
+def get_client(api_key: Optional[str] = None) -> genai.Client:
+    """API キーに対応する共有クライアントを返す（初回呼び出し時に作成）"""
+    api_key = api_key or config.GEMINI_API_KEY
+    if not api_key:
+        raise ValueError("GEMINI_API_KEY が設定されていません")
+    with _lock:
+        client = _clients.get(api_key)
+        if client is None:
+            limits = httpx.Limits(
+                max_connections=config.GEMINI_MAX_CONNECTIONS,
+                max_keepalive_connections=config.GEMINI_MAX_CONNECTIONS,
+                keepalive_expiry=config.GEMINI_KEEPALIVE_SEC,
+            )
+            client = _clients[api_key] = genai.Client(
+                api_key=api_key,
+                http_options=types.HttpOptions(
+                    client_args={'limits': limits},
+                    async_client_args={'limits': limits},
+                ),
+            )
+            logger.info("Gemini クライアントを作成 (最大接続数: %d)", config.GEMINI_MAX_CONNECTIONS)
+        return client
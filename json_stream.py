@@ -0,0 +1,118 @@
+"""
+インクリメンタル JSON 配列パーサー
+LLM の応答（`[{...}, {...}, ...]`）を受信した断片ごとに読み進め、
+閉じた要素から順に取り出す。全体を1回だけ走査するため、
+途中で打ち切られた応答でも線形時間で「最後に閉じた要素まで」を回復できる。
+
+配列の前のテキスト（```json など）は読み飛ばす。
+配列直下のオブジェクト・配列だけを要素として取り出す（数値・文字列などの要素は無視）。
+"""
+
+import json
+import re
+from typing import Any, List
+
+_STRUCTURAL = re.compile(r'["{}\[\]]')  # 文字列の外で意味を持つ文字
+_STRING_SPECIAL = re.compile(r'["\\]')  # 文字列の中で意味を持つ文字
+
+
+class JSONArrayParser:
+    """JSON 配列の要素を逐次取り出すパーサー
+
+    Attributes:
+        started: 配列の開き括弧 '[' を読んだか
+        closed: 配列の閉じ括弧 ']' まで読んだか（False のまま終われば打ち切り）
+        complete_end: 最後に閉じた要素の直後の位置（受け取った全文字列に対するオフセット）
+        skipped: JSON として解釈できず読み飛ばした要素の数
+    """
+
+    def __init__(self):
+        self.started = False
+        self.closed = False
+        self.complete_end = 0
+        self.skipped = 0
+
+        self._buffer = ""  # 未完了の要素（またはその手前）の文字列
+        self._base = 0  # _buffer の先頭の、全文字列に対するオフセット
+        self._depth = 0  # 配列内のネストの深さ（配列直下が 1）
+        self._in_string = False
+        self._escape = False  # 直前の断片が文字列中の '\' で終わった
+        self._element_start = -1  # _buffer 内の現在の要素の開始位置
+
+    @property
+    def truncated(self) -> bool:
+        """配列が閉じないまま入力が終わっているか"""
+        return self.started and not self.closed
+
+    def feed(self, text: str) -> List[Any]:
+        """文字列の断片を読み、この断片で閉じた要素のリストを返す"""
+        if self.closed or not text:
+            return []
+
+        i = len(self._buffer)
+        buffer = self._buffer = self._buffer + text
+        n = len(buffer)
+        items: List[Any] = []
+
+        if self._escape:
+            self._escape = False
+            i += 1
+
+        while i < n:
+            if self._in_string:
+                m = _STRING_SPECIAL.search(buffer, i)
+                if m is None:
+                    i = n
+                    break
+                if m.group() == '\\':
+                    if m.start() + 1 >= n:
+                        self._escape = True
+                        i = n
+                        break
+                    i = m.start() + 2
+                    continue
+                self._in_string = False
+                i = m.end()
+                continue
+
+            m = _STRUCTURAL.search(buffer, i)
+            if m is None:
+                i = n
+                break
+            ch, pos = m.group(), m.start()
+            i = pos + 1
+
+            if not self.started:
+                if ch == '[':
+                    self.started = True
+                    self._depth = 1
+            elif ch == '"':
+                self._in_string = True
+            elif ch in '{[':
+                if self._depth == 1:
+                    self._element_start = pos
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 1 and self._element_start >= 0:
+                    items.extend(self._decode(buffer[self._element_start:i]))
+                    self.complete_end = self._base + i
+                    self._element_start = -1
+                elif self._depth == 0:
+                    self.closed = True
+                    break
+
+        # 読み終えた部分を捨て、未完了の要素だけを保持する（全体で線形時間に保つ）
+        keep = self._element_start if self._element_start >= 0 else i
+        self._buffer = buffer[keep:]
+        self._base += keep
+        if self._element_start >= 0:
+            self._element_start = 0
+        return items
+
+    def _decode(self, text: str) -> List[Any]:
+        try:
+            return [json.loads(text)]
+        except ValueError:
+            self.skipped += 1
+            return []
@@ -0,0 +1,87 @@
+"""
+LLM応答キャッシュ
+(モデル, システムプロンプト, プロンプト, 生成設定) のハッシュをキーに応答テキストを保存し、
+リトライやワークフローの再実行で同じリクエストを送るときに API を呼ばずに済ませる。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+import config
+from cache_utils import load_json, save_json
+
+logger = logging.getLogger(__name__)
+
+
+class LLMResponseCache:
+    """リクエスト指紋 → 応答テキスト のディスクキャッシュ
+
+    有効期限（LLM_CACHE_TTL_SEC）を過ぎたエントリは読み込まず、prune() で削除する。
+    bypass=True（LLM_CACHE_BYPASS）の場合は読み込みも保存もしない。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None,
+                 ttl_sec: Optional[int] = None,
+                 bypass: Optional[bool] = None):
+        self.cache_dir = cache_dir or config.LLM_CACHE_DIR
+        self.ttl_sec = config.LLM_CACHE_TTL_SEC if ttl_sec is None else ttl_sec
+        self.bypass = config.LLM_CACHE_BYPASS if bypass is None else bypass
+
+    @staticmethod
+    def make_key(model: str, system_instruction: str, contents: str,
+                 generation_config: Dict[str, Any]) -> str:
+        """リクエスト内容からキャッシュキーを作る"""
+        payload = json.dumps(
+            [model, system_instruction, contents, generation_config],
+            ensure_ascii=False, sort_keys=True, separators=(',', ':'),
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key[:32]}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        """有効期限内の応答テキストを返す（無ければ None）"""
+        if self.bypass or self.ttl_sec <= 0:
+            return None
+        entry = load_json(self._path(key), None)
+        if not entry or entry.get('key') != key:
+            return None
+        if time.time() - entry.get('created_at', 0) > self.ttl_sec:
+            return None
+        return entry.get('text')
+
+    def put(self, key: str, text: str, model: str = "") -> None:
+        """応答テキストを保存する（パース・検証に成功した応答だけを渡すこと）"""
+        if self.bypass or self.ttl_sec <= 0:
+            return
+        entry = {'key': key, 'model': model, 'created_at': time.time(), 'text': text}
+        try:
+            save_json(self._path(key), entry)
+        except OSError as e:
+            logger.warning("LLM応答キャッシュ保存エラー: %s", e)
+        self.prune()
+
+    def prune(self) -> int:
+        """期限切れのエントリを削除して削除件数を返す"""
+        if not os.path.isdir(self.cache_dir):
+            return 0
+        now = time.time()
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json') or name.startswith('.tmp_'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                if now - os.stat(path).st_mtime > self.ttl_sec:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                continue
+        if removed:
+            logger.info("LLM応答キャッシュ: 期限切れ %d件を削除", removed)
+        return removed
@@ -5,7 +5,6 @@
 
 import logging
 import os
-import time
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Optional
 
@@ -13,8 +12,10 @@ from pydub import AudioSegment  # type: ignore[import-untyped]
 
 import config
 from content_manager import ContentManager
-from script_generator import ScriptGenerator, Script, ScriptLine
+from retry import RetryPolicy
+from script_generator import ScriptGenerator, Script, ScriptLine, should_regenerate
 from script_reviewer import ScriptReviewer
+from token_budget import ledger
 from tts_generator import TTSGenerator, get_daily_speakers
 from rss_feed_generator import RSSFeedGenerator
 from podcast_uploader import PodcastUploader, EpisodeMetadata
@@ -23,6 +24,9 @@ logger = logging.getLogger(__name__)
 
 JST = timezone(timedelta(hours=9))
 
+SCRIPT_MAX_ATTEMPTS = 5  # 台本生成の最大試行回数（台本が打ち切られたときに作り直す）
+SCRIPT_RETRY_BASE_DELAY = 30.0  # 台本生成をやり直すまでの初回待機（秒）。以降は倍々に延ばす
+
 
 class PodcastGenerator:
     """ポッドキャスト生成の全体オーケストレーション"""
@@ -80,28 +84,31 @@ class PodcastGenerator:
 
         logger.info("  %d件の記事を取得しました", len(articles))
 
-        # 2. 台本生成（503エラー時はリトライ）
+        # 2. 台本生成（打ち切り・一時的な API エラー時はリトライ）
         logger.info("2. 台本生成中...")
+        episode_num = self._get_episode_number()
+        today_jst = datetime.now(JST).date()
+        audio_filename = f"episode_{episode_num}_{today_jst.strftime('%Y%m%d')}.wav"
+        audio_path = os.path.join(config.AUDIO_OUTPUT_DIR, audio_filename)
+
         script = None
         is_fallback = False
-        max_retries = 4
-        for attempt in range(max_retries + 1):
+        audio_ready = False
+        if config.SCRIPT_STREAMING:
+            # 台本の生成中から音声合成を始める（失敗したら通常の生成に切り替え）
+            script = self._generate_streaming(articles, audio_path)
+            audio_ready = script is not None
+        if not audio_ready:
+            # 打ち切られた台本は、待機して台本生成ごとやり直す（一時的な API エラーは呼び出しごとに再試行済み）
+            policy = RetryPolicy(
+                "台本生成", self.script_generator.model,
+                max_attempts=SCRIPT_MAX_ATTEMPTS, base_delay=SCRIPT_RETRY_BASE_DELAY,
+                retry_on=should_regenerate,
+            )
             try:
-                script = self.script_generator.generate_script(articles)
-                break
+                script = policy.call(self.script_generator.generate_script, articles)
             except Exception as e:
-                is_503 = "503" in str(e) or "UNAVAILABLE" in str(e)
-                is_truncated = "台本が短すぎます" in str(e) or "トークン上限" in str(e)
-                if (is_503 or is_truncated) and attempt < max_retries:
-                    wait = 60 * (attempt + 1)
-                    logger.warning(
-                        "台本生成失敗 (attempt %d/%d), %d秒後にリトライ: %s",
-                        attempt + 1, max_retries + 1, wait, e,
-                    )
-                    time.sleep(wait)
-                else:
-                    logger.warning("台本生成失敗（リトライ上限）: %s", e)
-                    break
+                logger.warning("台本生成失敗（リトライ上限）: %s", e)
 
         if script is None:
             logger.warning("台本生成不可、お休み告知に切り替え")
@@ -114,6 +121,8 @@ class PodcastGenerator:
         # お休み告知は固定テンプレなのでレビュー不要
         if is_fallback:
             logger.info("2.5. お休み告知のため台本レビューをスキップ")
+        elif audio_ready:
+            logger.info("2.5. ストリーミング生成のため台本レビューをスキップ")
         else:
             logger.info("2.5. 台本レビュー中...")
             script = self.script_reviewer.review(script, articles)
@@ -121,17 +130,16 @@ class PodcastGenerator:
 
         # 3. 音声生成
         logger.info("3. 音声生成中...")
-        episode_num = self._get_episode_number()
-        today_jst = datetime.now(JST).date()
-        audio_filename = f"episode_{episode_num}_{today_jst.strftime('%Y%m%d')}.wav"
-        audio_path = os.path.join(config.AUDIO_OUTPUT_DIR, audio_filename)
-
         try:
-            self.tts_generator.generate_audio(script, audio_path)
+            if not audio_ready:
+                self.tts_generator.generate_audio(script, audio_path)
         except Exception as e:
             logger.error("音声生成失敗: %s", e)
             return None
 
+        # ステージごとのトークン使用量（台本生成・レビュー・TTS）
+        ledger.report()
+
         # 3.5 WAV → MP3 変換
         mp3_path = audio_path.replace('.wav', '.mp3')
         try:
@@ -148,6 +156,7 @@ class PodcastGenerator:
         # RSS フィード更新（feed.xml にエピソード追加）
         mp3_filename = os.path.basename(audio_path)
         mp3_size = os.path.getsize(audio_path) if os.path.exists(audio_path) else None
+        feed_updated = False
         try:
             self.rss_generator.add_episode(
                 mp3_filename=mp3_filename,
@@ -157,12 +166,21 @@ class PodcastGenerator:
                 duration_seconds=metadata.duration_seconds,
                 mp3_size=mp3_size,
             )
+            feed_updated = True
         except Exception as e:
             logger.error("RSS フィード更新失敗: %s", e)
 
         # 5. メタデータ JSON 保存
         success = self.uploader.upload(audio_path, metadata)
 
+        # 6. 台本で扱った記事を配信済みとして記録（翌日以降の再送を防ぐ）
+        # フィードに載らなかったエピソードの記事は、次の実行で使えるよう記録しない
+        if not is_fallback and self.script_generator.used_articles:
+            if feed_updated and success:
+                self.content_manager.mark_articles_seen(self.script_generator.used_articles)
+            else:
+                logger.warning("エピソードを配信できなかったため、記事を配信済みにしません")
+
         if success:
             logger.info("=== ポッドキャスト生成完了 ===")
             logger.info("  エピソード: %s", metadata.title)
@@ -172,6 +190,22 @@ class PodcastGenerator:
 
         return metadata
 
+    def _generate_streaming(self, articles: List[Dict[str, str]], audio_path: str) -> Optional[Script]:
+        """台本をストリーミング生成しながら音声合成する（SCRIPT_STREAMING）
+
+        Returns:
+            成功時は台本（音声は audio_path に保存済み）、失敗時は None
+        """
+        logger.info("2-3. 台本生成と音声生成を並行実行中（ストリーミング）...")
+        try:
+            script = self.tts_generator.generate_audio_stream(
+                self.script_generator.generate_script_stream(articles), audio_path,
+            )
+        except Exception as e:
+            logger.warning("ストリーミング生成失敗、通常の生成に切り替え: %s", e)
+            return None
+        return script
+
     def _get_episode_number(self) -> int:
         """次のエピソード番号を算出する
 
@@ -0,0 +1,212 @@
+"""
+読み替え辞書
+語句<TAB>読み 形式の TSV 辞書を読み込み、照合用のインデックスを作る。
+
+- 見出し語から共通の接頭辞をまとめた正規表現（トライ）を組み立て、
+  テキストを先頭から1回走査するだけで全見出し語を照合する
+- 解析済みの辞書（見出し語の長さ順・トライのパターン）は DICTIONARY_INDEX_DIR に JSON で保存し、
+  TSV の内容のハッシュが変わったときだけ作り直す（チェックアウトで更新時刻が変わっても使える）
+- プロセス内でも同じ辞書は使い回し、TSV の更新時刻かサイズが変われば次回参照時に再読み込みする
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Mapping, Optional, Pattern, Tuple
+
+import config
+from cache_utils import load_json, save_json
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 2
+
+# 「語句（読み）」の読み部分に使われる文字（ひらがな・カタカナ・長音・英字・空白）
+READING_CHARS = r'[ぁ-ゟァ-ヴーｰA-Za-z\s]+'
+
+
+def trie_pattern(words: Iterable[str]) -> Optional[str]:
+    """見出し語の集合に一致する正規表現を返す（同じ位置では長い語から試す）
+
+    "自律" と "自律型" なら "自律(?:型)?" のように接頭辞を共有させるため、
+    見出し語が数万件あっても照合は1文字ずつトライをたどるだけで済む。
+    見出し語が無ければ None を返す。
+    """
+    trie: Dict[str, dict] = {}
+    for word in words:
+        if not word:
+            continue
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+    return _node_pattern(trie) if trie else None
+
+
+def _node_pattern(node: Dict[str, dict]) -> str:
+    branches = [re.escape(ch) + _node_pattern(child) for ch, child in sorted(node.items()) if ch]
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    if '' in node:
+        # ここで終わる語もある: 続きを貪欲に試し、失敗したらここで一致させる
+        return '(?:' + body + ')?'
+    return body
+
+
+class PronunciationAnnotator:
+    """読み替え辞書 {語句: 読み} をテキストに適用する
+
+    - 読みが未付与の語句: 「語句（読み）」を付与
+    - 既に読みが付いている語句: 辞書の読みで上書き（LLM の誤った読みを修正）
+    - 付与した読みの中は再照合しない
+    """
+
+    def __init__(self, mapping: Mapping[str, str], trie: Optional[str] = None):
+        self.mapping = dict(mapping)
+        if trie is None:
+            trie = trie_pattern(self.mapping)
+        self.pattern: Optional[Pattern[str]] = None
+        if trie is not None:
+            # 語句の直後が正しい形式の読みか、読みの開き括弧以外であれば一致
+            self.pattern = re.compile(
+                '(' + trie + ')(?:（' + READING_CHARS + '）|(?!（))'
+            )
+
+    def annotate(self, text: str) -> str:
+        """テキストを1回走査して読みを付与・上書きする"""
+        if self.pattern is None:
+            return text
+        mapping = self.mapping
+        return self.pattern.sub(lambda m: f"{m.group(1)}（{mapping[m.group(1)]}）", text)
+
+
+class Dictionary:
+    """読み込み済みの辞書
+
+    Attributes:
+        entries: {語句: 読み（置換後）}
+        words: 見出し語（長い順）
+        trie: 見出し語に一致する正規表現（見出し語が無ければ None）
+    """
+
+    def __init__(self, path: str, entries: Dict[str, str], words: List[str],
+                 trie: Optional[str], stamp: Optional[Tuple[int, int]]):
+        self.path = path
+        self.entries = entries
+        self.words = words
+        self.trie = trie
+        self.stamp = stamp  # (TSV の更新時刻 ns, サイズ)。ファイルが無ければ None
+        self._annotator: Optional[PronunciationAnnotator] = None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def annotator(self) -> PronunciationAnnotator:
+        """この辞書の照合器（初回参照時に正規表現をコンパイル）"""
+        if self._annotator is None:
+            self._annotator = PronunciationAnnotator(self.entries, self.trie)
+        return self._annotator
+
+    @classmethod
+    def build(cls, path: str, entries: Dict[str, str],
+              stamp: Optional[Tuple[int, int]] = None) -> 'Dictionary':
+        """エントリから見出し語の並びとトライを作る"""
+        words = sorted(entries, key=len, reverse=True)
+        return cls(path, entries, words, trie_pattern(words), stamp)
+
+
+def parse_tsv(path: str) -> Dict[str, str]:
+    """語句<TAB>読み 形式の TSV を読む（# で始まる行と空行は無視、同じ語句は後の行が優先）"""
+    entries: Dict[str, str] = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.rstrip('\r\n')
+            if not line.strip() or line.lstrip().startswith('#'):
+                continue
+            word, sep, reading = line.partition('\t')
+            if not sep or not word or not reading:
+                logger.warning("辞書の書式エラー、スキップします (%s:%d): %s", path, lineno, line)
+                continue
+            entries[word] = reading
+    return entries
+
+
+_dictionaries: Dict[str, Dictionary] = {}
+_lock = threading.Lock()
+
+
+def load_dictionary(path: str) -> Dictionary:
+    """辞書を読み込む（TSV が前回から変わっていなければ読み込み済みの辞書を返す）"""
+    try:
+        stat = os.stat(path)
+        stamp: Optional[Tuple[int, int]] = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        stamp = None
+
+    with _lock:
+        cached = _dictionaries.get(path)
+        if cached is not None and cached.stamp == stamp:
+            return cached
+
+        if stamp is None:
+            logger.warning("辞書ファイルがありません: %s", path)
+            dictionary = Dictionary.build(path, {})
+        else:
+            digest = _file_digest(path)
+            dictionary = _load_index(path, stamp, digest)
+            if dictionary is None:
+                dictionary = Dictionary.build(path, parse_tsv(path), stamp)
+                _save_index(dictionary, digest)
+                logger.info("辞書インデックスを作成: %s (%d語)", path, len(dictionary))
+        _dictionaries[path] = dictionary
+        return dictionary
+
+
+def _file_digest(path: str) -> str:
+    """TSV の内容の SHA-256"""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _index_path(path: str) -> str:
+    return os.path.join(config.DICTIONARY_INDEX_DIR, os.path.basename(path) + ".json")
+
+
+def _load_index(path: str, stamp: Tuple[int, int], digest: str) -> Optional[Dictionary]:
+    """保存済みインデックスが TSV の内容と一致すれば読み込む"""
+    data = load_json(_index_path(path), None)
+    if (
+        not isinstance(data, dict)
+        or data.get('version') != INDEX_VERSION
+        or data.get('sha256') != digest
+    ):
+        return None
+    entries, words, trie = data.get('entries'), data.get('words'), data.get('trie')
+    if (
+        not isinstance(entries, dict)
+        or not all(isinstance(k, str) and isinstance(v, str) for k, v in entries.items())
+        or not isinstance(words, list)
+        or sorted(words) != sorted(entries)
+        or not (trie is None or isinstance(trie, str))
+    ):
+        logger.warning("辞書インデックスの形式が不正です、作り直します: %s", _index_path(path))
+        return None
+    return Dictionary(path, entries, words, trie, stamp)
+
+
+def _save_index(dictionary: Dictionary, digest: str) -> None:
+    data = {
+        'version': INDEX_VERSION,
+        'sha256': digest,
+        'entries': dictionary.entries,
+        'words': dictionary.words,
+        'trie': dictionary.trie,
+    }
+    try:
+        save_json(_index_path(dictionary.path), data)
+    except OSError as e:
+        logger.warning("辞書インデックス保存エラー: %s", e)
@@ -0,0 +1,109 @@
+"""
+クライアント側レート制限
+モデルごとの 1分あたりのリクエスト数（RPM）と入力トークン数（TPM）を直近60秒の窓で数え、
+枠に空きができた時点で呼び出しを通す。429 を受けてから待つより、送る前に待つ方が早い。
+
+制限値は config.RATE_LIMITS で設定し、同じモデルの制限は ScriptGenerator・ScriptReviewer・
+TTSGenerator など全ての呼び出し元（スレッド）で共有する。
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, TypeVar
+
+import config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+WINDOW_SEC = 60.0
+
+
+class RateLimiter:
+    """直近 WINDOW_SEC 秒のリクエスト数・トークン数を上限以下に保つ
+
+    Args:
+        rpm: 1分あたりのリクエスト数の上限（0 で無制限）
+        tpm: 1分あたりの入力トークン数の上限（0 で無制限）
+    """
+
+    def __init__(self, name: str, rpm: int, tpm: int):
+        self.name = name
+        self.rpm = rpm
+        self.tpm = tpm
+        self._events: Deque[List[float]] = deque()  # [送信時刻, トークン数]
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 0) -> List[float]:
+        """枠に空きができるまで待って送信を記録し、記録（settle() に渡す）を返す"""
+        if self.tpm > 0:
+            tokens = min(tokens, self.tpm)  # 1回で上限を超える呼び出しも、窓が空けば通す
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._expire(now)
+                wait = self._wait_time(now, tokens)
+                if wait <= 0:
+                    event = [now, float(tokens)]
+                    self._events.append(event)
+                    self._tokens += tokens
+                    break
+            time.sleep(wait)
+            waited += wait
+        if waited > 0:
+            logger.info("レート制限 (%s): %.1f秒待機して送信", self.name, waited)
+        return event
+
+    def settle(self, event: List[float], tokens: int) -> None:
+        """送信時の概算トークン数を、応答の usage_metadata による実数で置き換える"""
+        with self._lock:
+            self._tokens += tokens - event[1]
+            event[1] = float(tokens)
+
+    def call(self, tokens: int, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """枠を確保してから fn を呼ぶ（応答に入力トークン数があれば実数で記録し直す）"""
+        event = self.acquire(tokens)
+        response = fn(*args, **kwargs)
+        usage = getattr(response, 'usage_metadata', None)
+        prompt_tokens = getattr(usage, 'prompt_token_count', None)
+        if isinstance(prompt_tokens, int):
+            self.settle(event, prompt_tokens)
+        return response
+
+    def _expire(self, now: float) -> None:
+        while self._events and now - self._events[0][0] >= WINDOW_SEC:
+            self._tokens -= self._events.popleft()[1]
+
+    def _wait_time(self, now: float, tokens: int) -> float:
+        """送信できるまでの秒数（0 以下なら今すぐ送信できる）"""
+        wait = 0.0
+        if self.rpm > 0 and len(self._events) >= self.rpm:
+            # 古い方から数えて、件数が上限を下回るまで待つ
+            wait = self._events[len(self._events) - self.rpm][0] + WINDOW_SEC - now
+        if self.tpm > 0 and self._tokens + tokens > self.tpm:
+            excess = self._tokens + tokens - self.tpm
+            for sent_at, used in self._events:
+                excess -= used
+                if excess <= 0:
+                    wait = max(wait, sent_at + WINDOW_SEC - now)
+                    break
+        return wait
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def limiter_for(model: str) -> RateLimiter:
+    """モデルごとのレート制限（プロセス内で共有、設定が無いモデルは無制限）"""
+    with _limiters_lock:
+        limiter = _limiters.get(model)
+        if limiter is None:
+            rpm, tpm = config.RATE_LIMITS.get(model, (0, 0))
+            limiter = _limiters[model] = RateLimiter(model, rpm, tpm)
+        return limiter
@@ -0,0 +1,232 @@
+"""
+Gemini API 呼び出しの共通リトライ
+一時的なエラー（429・5xx・通信エラー）を指数バックオフ＋ジッターで再試行する。
+
+- 待ち時間は RETRY_BASE_DELAY_SEC から倍々に延ばし（上限 RETRY_MAX_DELAY_SEC）、
+  その半分〜全量の範囲でランダムにずらして同時リトライの集中を避ける
+- サーバーが待ち時間を指定した場合（Retry-After ヘッダー・RetryInfo）はそれ以上待つ
+- モデルごとのリトライ予算（トークンバケット）を共有し、障害中にリトライを重ねすぎない
+- ジョブ開始（RUN_STARTED_AT）から RUN_DEADLINE_SEC を過ぎる待機はせず、その時点で諦める
+- 同期関数は RetryPolicy.call()、コルーチン関数は RetryPolicy.acall() で呼ぶ
+"""
+
+import asyncio
+import logging
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+import config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+_RUN_STARTED = config.RUN_STARTED_AT or time.time()
+
+
+def run_time_remaining() -> float:
+    """実行全体の締め切り（RUN_STARTED_AT から RUN_DEADLINE_SEC）までの残り秒数
+
+    GitHub Actions では速報版・深掘り版が同じジョブの別ステップ（別プロセス）で動くため、
+    起点はワークフローが設定するジョブ開始時刻を使う。
+    """
+    return config.RUN_DEADLINE_SEC - (time.time() - _RUN_STARTED)
+
+
+def error_status(exc: BaseException) -> Optional[int]:
+    """API 例外から HTTP ステータスコードを取り出す（無ければ None）"""
+    code = getattr(exc, 'code', None)  # google.genai.errors.APIError
+    if isinstance(code, int):
+        return code
+    status_code = getattr(getattr(exc, 'response', None), 'status_code', None)
+    return status_code if isinstance(status_code, int) else None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """再試行で回復する見込みのあるエラーか（429・5xx・タイムアウト・接続エラー）"""
+    code = error_status(exc)
+    if code is not None:
+        return code in RETRYABLE_STATUS_CODES
+    return isinstance(exc, (ConnectionError, TimeoutError)) or type(exc).__name__ in (
+        'ConnectError', 'ReadTimeout', 'ConnectTimeout', 'RemoteProtocolError',  # httpx
+    )
+
+
+_DURATION = re.compile(r'^(\d+(?:\.\d+)?)s$')
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """サーバーが指定した待ち時間（秒）を返す（指定が無ければ None）
+
+    Retry-After ヘッダー（秒数または日時）と、429 応答の RetryInfo.retryDelay（"37s" 形式）を見る。
+    """
+    headers = getattr(getattr(exc, 'response', None), 'headers', None)
+    value = headers.get('retry-after') if headers is not None else None
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+
+    details = getattr(exc, 'details', None)
+    if isinstance(details, dict):
+        for detail in details.get('error', {}).get('details', []) or []:
+            if not isinstance(detail, dict) or not str(detail.get('@type', '')).endswith('RetryInfo'):
+                continue
+            m = _DURATION.match(str(detail.get('retryDelay', '')))
+            if m:
+                return float(m.group(1))
+    return None
+
+
+def describe(exc: BaseException) -> str:
+    """ログ用にエラーを短く表す"""
+    code = error_status(exc)
+    status = getattr(exc, 'status', None)
+    if code is not None:
+        return f"{code} {status}" if status else str(code)
+    return f"{type(exc).__name__}: {exc}"
+
+
+class RetryBudget:
+    """モデルごとのリトライ予算（トークンバケット）
+
+    リトライ1回ごとにトークンを1つ使い、RETRY_BUCKET_REFILL_SEC ごとに1つ回復する。
+    障害中に複数の呼び出しがそれぞれリトライを重ね、待ち時間を積み上げるのを防ぐ。
+    """
+
+    def __init__(self, capacity: float, refill_sec: float):
+        self.capacity = capacity
+        self.refill_sec = refill_sec
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """トークンを1つ使う（残っていなければ False）"""
+        with self._lock:
+            now = time.monotonic()
+            if self.refill_sec > 0:
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) / self.refill_sec)
+            self._updated = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+_budgets: Dict[str, RetryBudget] = {}
+_budgets_lock = threading.Lock()
+
+
+def budget_for(model: str) -> RetryBudget:
+    """モデルごとのリトライ予算（プロセス内で共有）"""
+    with _budgets_lock:
+        budget = _budgets.get(model)
+        if budget is None:
+            budget = _budgets[model] = RetryBudget(
+                config.RETRY_BUCKET_CAPACITY, config.RETRY_BUCKET_REFILL_SEC,
+            )
+        return budget
+
+
+class RetryPolicy:
+    """リトライの方針
+
+    Args:
+        name: ログに出す処理名
+        model: リトライ予算を共有するモデル名
+        max_attempts: 最大試行回数（初回を含む）
+        base_delay: 1回目のリトライ待機（秒）。以降は倍々に延ばす
+        max_delay: 1回あたりの待機の上限（秒）
+        deadline_sec: この呼び出し全体の締め切り（秒）。実行全体の締め切りも超えない
+        retry_on: 再試行する例外かを判定する関数（既定は is_retryable）
+    """
+
+    def __init__(self, name: str, model: str = "",
+                 max_attempts: Optional[int] = None,
+                 base_delay: Optional[float] = None,
+                 max_delay: Optional[float] = None,
+                 deadline_sec: Optional[float] = None,
+                 retry_on: Callable[[BaseException], bool] = is_retryable):
+        self.name = name
+        self.model = model
+        self.max_attempts = config.RETRY_MAX_ATTEMPTS if max_attempts is None else max_attempts
+        self.base_delay = config.RETRY_BASE_DELAY_SEC if base_delay is None else base_delay
+        self.max_delay = config.RETRY_MAX_DELAY_SEC if max_delay is None else max_delay
+        self.deadline_sec = deadline_sec
+        self.retry_on = retry_on
+
+    def call(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """fn を呼び、一時的なエラーなら待機して再試行する"""
+        started = time.monotonic()
+        attempt = 1
+        while True:
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._next_delay(e, attempt, started)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+            attempt += 1
+
+    async def acall(self, fn: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+        """コルーチン関数 fn を await し、一時的なエラーなら待機して再試行する"""
+        started = time.monotonic()
+        attempt = 1
+        while True:
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._next_delay(e, attempt, started)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def backoff(self, attempt: int) -> float:
+        """attempt 回目の失敗後の待機秒数（指数バックオフ＋ジッター）"""
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _next_delay(self, exc: Exception, attempt: int, started: float) -> Optional[float]:
+        """次の試行までの待機秒数。再試行しない場合は None"""
+        if not self.retry_on(exc):
+            return None
+        if attempt >= self.max_attempts:
+            logger.warning("%s: %s、リトライ上限 (%d回) に達しました", self.name, describe(exc), attempt)
+            return None
+
+        delay = self.backoff(attempt)
+        hinted = retry_after(exc)
+        if hinted is not None:
+            delay = max(delay, min(hinted, self.max_delay))
+
+        remaining = run_time_remaining()
+        if self.deadline_sec is not None:
+            remaining = min(remaining, self.deadline_sec - (time.monotonic() - started))
+        if delay >= remaining:
+            logger.warning(
+                "%s: %s、締め切りまで %.0f秒しかないためリトライしません",
+                self.name, describe(exc), max(0.0, remaining),
+            )
+            return None
+        if not budget_for(self.model).acquire():
+            logger.warning("%s: %s、リトライ予算 (%s) を使い切りました", self.name, describe(exc), self.model)
+            return None
+
+        logger.warning(
+            "%s: %s (試行%d/%d)、%.1f秒後にリトライ",
+            self.name, describe(exc), attempt, self.max_attempts, delay,
+        )
+        return delay
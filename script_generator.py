@@ -3,16 +3,20 @@
 Gemini Flash APIを使い、記事情報から対話形式の台本を生成する
 """
 
-import json
 import logging
-import re
 from dataclasses import dataclass, asdict
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from google import genai
 from google.genai import types
 
 import config
+from genai_client import get_client
+from json_stream import JSONArrayParser
+from llm_cache import LLMResponseCache
+from pronunciation import load_dictionary
+from rate_limiter import limiter_for
+from retry import RetryPolicy
+from token_budget import estimate_tokens, fit_articles, ledger
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +32,19 @@ class ScriptLine:
 Script = List[ScriptLine]
 
 
+class ScriptTooShortError(ValueError):
+    """台本が極端に短い（トークン上限で打ち切られた可能性がある）。再生成で回復しうる"""
+
+
+def should_regenerate(exc: BaseException) -> bool:
+    """台本生成ごとやり直せば回復しうる失敗か（打ち切られた台本）
+
+    一時的な API エラーは API 呼び出しごとの RetryPolicy で再試行済みなので、ここでは対象にしない
+    （台本生成ごとのやり直しと重なってリクエスト数と待機が掛け算で増えるため）。
+    """
+    return isinstance(exc, ScriptTooShortError)
+
+
 SYSTEM_PROMPT_TEMPLATE = """\
 あなたはポッドキャストの台本ライターです。
 以下のニュース記事をもとに、2人の話者（ホストとゲスト）による
@@ -92,8 +109,12 @@ class ScriptGenerator:
         self.api_key = api_key or config.GEMINI_API_KEY
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY が設定されていません")
-        self.client = genai.Client(api_key=self.api_key)
+        self.client = get_client(self.api_key)
         self.model = config.LLM_MODEL
+        self.response_cache = LLMResponseCache()
+        self.retry = RetryPolicy("台本生成API", self.model)
+        self.rate_limiter = limiter_for(self.model)
+        self.used_articles: List[Dict[str, Any]] = []  # 直近の台本で扱った記事（配信済みの記録用）
         self.host_name = host_name or "アオイ"
         self.guest_name = guest_name or "タクミ"
         self.system_prompt = SYSTEM_PROMPT_TEMPLATE.format(
@@ -109,589 +130,190 @@ class ScriptGenerator:
         prompt = self._build_prompt(articles)
         logger.info("台本生成を開始 (モデル: %s, 記事数: %d)", self.model, len(articles))
 
-        response = self.client.models.generate_content(
-            model=self.model,
-            config=types.GenerateContentConfig(
-                system_instruction=self.system_prompt,
-                response_mime_type="application/json",
-                max_output_tokens=65536,
-            ),
-            contents=prompt,
-        )
-
-        script = self._parse_response(response.text)
+        response_text, cache_key = self._request_json(prompt)
+        script = self._parse_response(response_text)
         script = self._apply_pronunciation_fixes(script)
         logger.info("台本生成完了: %d行", len(script))
 
         # 生成結果が極端に短い場合は失敗扱いとして上位のfallbackを発動させる
         # （JSONそのものはパースできたが、途中で打ち切られたケースを検出）
-        if len(script) < 5:
-            raise ValueError(f"台本が短すぎます ({len(script)}行)。トークン上限で打ち切られた可能性があります")
+        self._check_length(len(script))
 
+        # 検証を通った応答だけを保存する（打ち切られた応答をリトライで再利用しない）
+        self.response_cache.put(cache_key, response_text, self.model)
         return script
 
-    # TTS 読み替え辞書: {パターン: 読み替え}
-    # 正規表現パターンも使用可能（re.sub で適用）
-    PRONUNCIATION_MAP = {
-        # ===== ニュースソース（RSSフィード元）=====
-        "GIGAZINE": "ギガジン",
-        "ITmedia": "アイティメディア",
-        "Publickey": "パブリッキー",
-        "CNET Japan": "シーネットジャパン",
-        "CNET": "シーネット",
-        "Impress Watch": "インプレスウォッチ",
-        "gihyo.jp": "ギヒョー",
-        "ASCII.jp": "アスキー",
-        "ASCII": "アスキー",
-        "NHK": "エヌエイチケー",
-        "TechCrunch": "テッククランチ",
-        "Ars Technica": "アルステクニカ",
-        "Reuters": "ロイター",
-        "Yahoo": "ヤフー",
-        "The Verge": "ザ ヴァージ",
-        "Wired": "ワイアード",
-        "ZDNet": "ゼットディーネット",
-        "Engadget": "エンガジェット",
-        "Bloomberg": "ブルームバーグ",
-        "TechRadar": "テックレーダー",
-        # ===== テクノロジー企業・サービス =====
-        "Google": "グーグル",
-        "Microsoft": "マイクロソフト",
-        "Apple": "アップル",
-        "Amazon": "アマゾン",
-        "Meta": "メタ",
-        "NVIDIA": "エヌビディア",
-        "Nvidia": "エヌビディア",
-        "AMD": "エーエムディー",
-        "Intel": "インテル",
-        "Tesla": "テスラ",
-        "SpaceX": "スペースエックス",
-        "Netflix": "ネットフリックス",
-        "Spotify": "スポティファイ",
-        "YouTube": "ユーチューブ",
-        "OpenAI": "オープンエーアイ",
-        "DeepMind": "ディープマインド",
-        "Anthropic": "アンスロピック",
-        "Gemini": "ジェミニ",
-        "ChatGPT": "チャットジーピーティー",
-        "Copilot": "コパイロット",
-        "Claude": "クロード",
-        "Mistral": "ミストラル",
-        "Hugging Face": "ハギングフェイス",
-        "Slack": "スラック",
-        "Zoom": "ズーム",
-        "Teams": "チームズ",
-        "Qualcomm": "クアルコム",
-        "Huawei": "ファーウェイ",
-        "ASUS": "エイスース",
-        "Lenovo": "レノボ",
-        "Samsung": "サムスン",
-        "TSMC": "ティーエスエムシー",
-        "Oracle": "オラクル",
-        "Salesforce": "セールスフォース",
-        "SAP": "エスエーピー",
-        "Adobe": "アドビ",
-        "Cisco": "シスコ",
-        "VMware": "ブイエムウェア",
-        "Palantir": "パランティア",
-        "Databricks": "データブリックス",
-        "Snowflake": "スノーフレーク",
-        "Shopify": "ショッピファイ",
-        "Stripe": "ストライプ",
-        "Twilio": "トゥイリオ",
-        "Cloudflare": "クラウドフレア",
-        "Vercel": "ヴァーセル",
-        "Supabase": "スーパベース",
-        "Firebase": "ファイアベース",
-        "Redis": "レディス",
-        "Elasticsearch": "エラスティックサーチ",
-        "MongoDB": "モンゴディービー",
-        "PostgreSQL": "ポストグレスキューエル",
-        "MySQL": "マイエスキューエル",
-        "SQLite": "エスキューライト",
-        "Notion": "ノーション",
-        "Figma": "フィグマ",
-        "Canva": "キャンバ",
-        "DeepSeek": "ディープシーク",
-        "Perplexity": "パープレキシティ",
-        "xAI": "エックスエーアイ",
-        "Grok": "グロック",
-        "Llama": "ラマ",
-        "Stable Diffusion": "ステーブル ディフュージョン",
-        "Midjourney": "ミッドジャーニー",
-        "DALL-E": "ダリー",
-        "Sora": "ソラ",
-        # ===== プログラミング・技術用語 =====
-        "GitHub": "ギットハブ",
-        "GitLab": "ギットラブ",
-        "Kubernetes": "クバネティス",
-        "Docker": "ドッカー",
-        "Python": "パイソン",
-        "JavaScript": "ジャバスクリプト",
-        "TypeScript": "タイプスクリプト",
-        "Rust": "ラスト",
-        "React": "リアクト",
-        "Linux": "リナックス",
-        "Ubuntu": "ウブントゥ",
-        "Debian": "デビアン",
-        "Fedora": "フェドラ",
-        "CentOS": "セントオーエス",
-        "Windows": "ウィンドウズ",
-        "macOS": "マックオーエス",
-        "iOS": "アイオーエス",
-        "Android": "アンドロイド",
-        "Raspberry Pi": "ラズベリーパイ",
-        "Wi-Fi": "ワイファイ",
-        "Bluetooth": "ブルートゥース",
-        "Terraform": "テラフォーム",
-        "Ansible": "アンシブル",
-        "Prometheus": "プロメテウス",
-        "Grafana": "グラファナ",
-        "Nginx": "エンジンエックス",
-        "Apache": "アパッチ",
-        "GraphQL": "グラフキューエル",
-        "gRPC": "ジーアールピーシー",
-        "WebSocket": "ウェブソケット",
-        "OAuth": "オーオース",
-        "JWT": "ジェイダブリューティー",
-        "YAML": "ヤムル",
-        "JSON": "ジェイソン",
-        "XML": "エックスエムエル",
-        "TOML": "トムル",
-        "npm": "エヌピーエム",
-        "Webpack": "ウェブパック",
-        "Vite": "ヴィート",
-        "Next.js": "ネクストジェイエス",
-        "Vue.js": "ビュージェイエス",
-        "Svelte": "スベルト",
-        "Flutter": "フラッター",
-        "Swift": "スウィフト",
-        "Kotlin": "コトリン",
-        "Go": "ゴー",
-        "Scala": "スカラ",
-        "Haskell": "ハスケル",
-        "Elixir": "エリクサー",
-        "Erlang": "アーラン",
-        "Zig": "ジグ",
-        "RISC-V": "リスクファイブ",
-        "ARM": "アーム",
-        "FPGA": "エフピージーエー",
-        "ASIC": "エーシック",
-        "Wasm": "ワズム",
-        "WebAssembly": "ウェブアセンブリ",
-        # ===== 英語略語 =====
-        "LLM": "エルエルエム",
-        "API": "エーピーアイ",
-        "AWS": "エーダブリューエス",
-        "GPU": "ジーピーユー",
-        "CPU": "シーピーユー",
-        "TPU": "ティーピーユー",
-        "NPU": "エヌピーユー",
-        "SoC": "エスオーシー",
-        "SaaS": "サース",
-        "IaaS": "イアース",
-        "PaaS": "パース",
-        "OSS": "オーエスエス",
-        "UI": "ユーアイ",
-        "UX": "ユーエックス",
-        "CI/CD": "シーアイシーディー",
-        "IoT": "アイオーティー",
-        "DX": "ディーエックス",
-        "RAG": "ラグ",
-        "VR": "ブイアール",
-        "AR": "エーアール",
-        "XR": "エックスアール",
-        "MR": "エムアール",
-        "EV": "イーブイ",
-        "IT": "アイティー",
-        "ICT": "アイシーティー",
-        "NFT": "エヌエフティー",
-        "DAO": "ダオ",
-        "DeFi": "ディーファイ",
-        "Web3": "ウェブスリー",
-        "5G": "ファイブジー",
-        "6G": "シックスジー",
-        "SDK": "エスディーケー",
-        "IDE": "アイディーイー",
-        "CLI": "シーエルアイ",
-        "CDN": "シーディーエヌ",
-        "DNS": "ディーエヌエス",
-        "SSL": "エスエスエル",
-        "TLS": "ティーエルエス",
-        "VPN": "ブイピーエヌ",
-        "SSH": "エスエスエイチ",
-        "TCP/IP": "ティーシーピーアイピー",
-        "HTTP": "エイチティーティーピー",
-        "HTTPS": "エイチティーティーピーエス",
-        "SMTP": "エスエムティーピー",
-        "GDPR": "ジーディーピーアール",
-        "CCPA": "シーシーピーエー",
-        "KPI": "ケーピーアイ",
-        "ROI": "アールオーアイ",
-        "OKR": "オーケーアール",
-        "MVP": "エムブイピー",
-        "PoC": "ピーオーシー",
-        "SRE": "エスアールイー",
-        "MLOps": "エムエルオプス",
-        "DevOps": "デブオプス",
-        "DevSecOps": "デブセックオプス",
-        "IaC": "アイエーシー",
-        "ETL": "イーティーエル",
-        "RPA": "アールピーエー",
-        "OCR": "オーシーアール",
-        "NLP": "エヌエルピー",
-        "AGI": "エージーアイ",
-        "ASI": "エーエスアイ",
-        "RLHF": "アールエルエイチエフ",
-        "LoRA": "ローラ",
-        "VRAM": "ブイラム",
-        "HBM": "エイチビーエム",
-        "DRAM": "ディーラム",
-        "SSD": "エスエスディー",
-        "NVMe": "エヌブイエムイー",
-        "PCIe": "ピーシーアイエクスプレス",
-        "USB-C": "ユーエスビーシー",
-        "USB": "ユーエスビー",
-        "HDMI": "エイチディーエムアイ",
-        "IEEE": "アイトリプルイー",
-        "W3C": "ダブリューサンシー",
-        # ===== 漢字の難読語・多義読み =====
-        "代替": "だいたい",
-        "汎用": "はんよう",
-        "脆弱性": "ぜいじゃくせい",
-        "脆弱": "ぜいじゃく",
-        "施行": "しこう",
-        "施策": "しさく",
-        "施錠": "せじょう",
-        "頒布": "はんぷ",
-        "閾値": "しきいち",
-        "知見": "ちけん",
-        "乖離": "かいり",
-        "進捗": "しんちょく",
-        "遵守": "じゅんしゅ",
-        "拡充": "かくじゅう",
-        "暫定": "ざんてい",
-        "概要": "がいよう",
-        "既存": "きそん",
-        "凡例": "はんれい",
-        "冗長": "じょうちょう",
-        "逼迫": "ひっぱく",
-        "漏洩": "ろうえい",
-        "情報漫洩": "じょうほうろうえい",
-        "停波": "ていは",
-        "改竄": "かいざん",
-        "完遂": "かんすい",
-        "早急": "さっきゅう",
-        "重複": "ちょうふく",
-        "続柄": "つづきがら",
-        "相殺": "そうさい",
-        "境界": "きょうかい",
-        "依存": "いそん",
-        "捏造": "ねつぞう",
-        "破綻": "はたん",
-        "瑕疵": "かし",
-        "齟齬": "そご",
-        "顛末": "てんまつ",
-        "杜撰": "ずさん",
-        "老舗": "しにせ",
-        "所謂": "いわゆる",
-        "概ね": "おおむね",
-        "殆ど": "ほとんど",
-        "脅威": "きょうい",
-        "享受": "きょうじゅ",
-        "寡占": "かせん",
-        "斡旋": "あっせん",
-        "逸脱": "いつだつ",
-        "払拭": "ふっしょく",
-        "遡及": "そきゅう",
-        "遡る": "さかのぼる",
-        "是正": "ぜせい",
-        "措置": "そち",
-        "網羅": "もうら",
-        "恣意的": "しいてき",
-        "割愛": "かつあい",
-        "簡潔": "かんけつ",
-        "端末": "たんまつ",
-        "唯一": "ゆいいつ",
-        "踏襲": "とうしゅう",
-        "予め": "あらかじめ",
-        "著しい": "いちじるしい",
-        "甚大": "じんだい",
-        "鑑みる": "かんがみる",
-        "先駆": "せんく",
-        "一端": "いったん",
-        "更迭": "こうてつ",
-        "体裁": "ていさい",
-        "刷新": "さっしん",
-        "拘泥": "こうでい",
-        "微増": "びぞう",
-        "微減": "びげん",
-        "潜在的": "せんざいてき",
-        "残念": "ざんねん",
-        "滑走路": "かっそうろ",
-        "地産地消": "ちさんちしょう",
-        "否定的": "ひていてき",
-        # ===== ニュース頻出表現・基本語 =====
-        "浮き彫り": "うきぼり",
-        "相次ぐ": "あいつぐ",
-        "相次いで": "あいついで",
-        "牽引": "けんいん",
-        "台頭": "たいとう",
-        "頓挫": "とんざ",
-        "拮抗": "きっこう",
-        "淘汰": "とうた",
-        "萎縮": "いしゅく",
-        "停滞": "ていたい",
-        "堅調": "けんちょう",
-        "顕著": "けんちょ",
-        "顕在化": "けんざいか",
-        "示唆": "しさ",
-        "懸念": "けねん",
-        "懸案": "けんあん",
-        "波及": "はきゅう",
-        "惹起": "じゃっき",
-        "趨勢": "すうせい",
-        "真摯": "しんし",
-        "促す": "うながす",
-        "担う": "になう",
-        "携わる": "たずさわる",
-        "培う": "つちかう",
-        "築く": "きずく",
-        "覆す": "くつがえす",
-        "凌ぐ": "しのぐ",
-        "委ねる": "ゆだねる",
-        "費やす": "ついやす",
-        "賄う": "まかなう",
-        "遮る": "さえぎる",
-        "際立つ": "きわだつ",
-        "見据える": "みすえる",
-        "紐づく": "ひもづく",
-        "紐付け": "ひもづけ",
-        "市場": "しじょう",
-        "競合": "きょうごう",
-        "独占禁止法": "どくせんきんしほう",
-        "知的財産": "ちてきざいさん",
-        "規制緩和": "きせいかんわ",
-        "景気後退": "けいきこうたい",
-        "円安": "えんやす",
-        "円高": "えんだか",
-        "株価": "かぶか",
-        "時価総額": "じかそうがく",
-        "黒字": "くろじ",
-        "赤字": "あかじ",
-        "出資": "しゅっし",
-        "買収": "ばいしゅう",
-        "合併": "がっぺい",
-        "提携": "ていけい",
-        "上場": "じょうじょう",
-        "新興": "しんこう",
-        "躍進": "やくしん",
-        "急騰": "きゅうとう",
-        "急落": "きゅうらく",
-        "暴落": "ぼうらく",
-        "前年比": "ぜんねんひ",
-        "前年同期比": "ぜんねんどうきひ",
-        "前月比": "ぜんげつひ",
-        "過去最高": "かこさいこう",
-        "過去最大": "かこさいだい",
-        "一翼": "いちよく",
-        "一環": "いっかん",
-        "一巡": "いちじゅん",
-        "一律": "いちりつ",
-        "一斉": "いっせい",
-        "一因": "いちいん",
-        "一貫": "いっかん",
-        "見通し": "みとおし",
-        "見込み": "みこみ",
-        "見直し": "みなおし",
-        "先行き": "さきゆき",
-        "行方": "ゆくえ",
-        "様相": "ようそう",
-        "様々": "さまざま",
-        "所以": "ゆえん",
-        "外貨": "がいか",
-        "為替": "かわせ",
-        "利率": "りりつ",
-        "金利": "きんり",
-        "物価": "ぶっか",
-        "賃金": "ちんぎん",
-        "雇用": "こよう",
-        "就任": "しゅうにん",
-        "辞任": "じにん",
-        # ===== 政治・行政・国際機関 =====
-        "国防総省": "こくぼうそうしょう",
-        "国務省": "こくむしょう",
-        "国務長官": "こくむちょうかん",
-        "国防長官": "こくぼうちょうかん",
-        "国家安全保障局": "こっかあんぜんほしょうきょく",
-        "連邦準備制度理事会": "れんぽうじゅんびせいどりじかい",
-        "連邦取引委員会": "れんぽうとりひきいいんかい",
-        "証券取引委員会": "しょうけんとりひきいいんかい",
-        "司法省": "しほうしょう",
-        "商務省": "しょうむしょう",
-        "財務省": "ざいむしょう",
-        "経済産業省": "けいざいさんぎょうしょう",
-        "総務省": "そうむしょう",
-        "文部科学省": "もんぶかがくしょう",
-        "厚生労働省": "こうせいろうどうしょう",
-        "国土交通省": "こくどこうつうしょう",
-        "防衛省": "ぼうえいしょう",
-        "デジタル庁": "デジタルちょう",
-        "公正取引委員会": "こうせいとりひきいいんかい",
-        "金融庁": "きんゆうちょう",
-        "内閣府": "ないかくふ",
-        "欧州委員会": "おうしゅういいんかい",
-        "欧州連合": "おうしゅうれんごう",
-        "NATO": "ナトー",
-        "FBI": "エフビーアイ",
-        "CIA": "シーアイエー",
-        "NSA": "エヌエスエー",
-        "FRB": "エフアールビー",
-        "FTC": "エフティーシー",
-        "SEC": "エスイーシー",
-        "IMF": "アイエムエフ",
-        "WHO": "ダブリューエイチオー",
-        "WTO": "ダブリューティーオー",
-        "OECD": "オーイーシーディー",
-        "IAEA": "アイエーイーエー",
-        "DARPA": "ダーパ",
-        "NIST": "ニスト",
-        "CISA": "シーアイエスエー",
-        "EU": "イーユー",
-        "GDP": "ジーディーピー",
-        "CPI": "シーピーアイ",
-        # ===== 人名 =====
-        "Elon Musk": "イーロン マスク",
-        "Tim Cook": "ティム クック",
-        "Satya Nadella": "サティア ナデラ",
-        "Sundar Pichai": "サンダー ピチャイ",
-        "Mark Zuckerberg": "マーク ザッカーバーグ",
-        "Sam Altman": "サム アルトマン",
-        "Jensen Huang": "ジェンスン フアン",
-        "Jeff Bezos": "ジェフ ベゾス",
-        "Lisa Su": "リサ スー",
-        "Dario Amodei": "ダリオ アモデイ",
-        "Demis Hassabis": "デミス ハサビス",
-        "Linus Torvalds": "ライナス トーバルズ",
-        "Donald Trump": "ドナルド トランプ",
-        "Joe Biden": "ジョー バイデン",
-        "Xi Jinping": "しゅうきんぺい",
-        # ===== IT・テック系の日本語 =====
-        "生成AI": "せいせいエーアイ",
-        "機械学習": "きかいがくしゅう",
-        "深層学習": "しんそうがくしゅう",
-        "強化学習": "きょうかがくしゅう",
-        "量子": "りょうし",
-        "量子コンピュータ": "りょうしコンピュータ",
-        "仮想化": "かそうか",
-        "仮想通貨": "かそうつうか",
-        "暗号資産": "あんごうしさん",
-        "自律": "じりつ",
-        "自律型": "じりつがた",
-        "自動運転": "じどううんてん",
-        "半導体": "はんどうたい",
-        "微細化": "びさいか",
-        "電子署名": "でんししょめい",
-        "多要素認証": "たようそにんしょう",
-        "秘密鍵": "ひみつかぎ",
-        "公開鍵": "こうかいかぎ",
-    }
+    def generate_script_stream(self, articles: List[Dict[str, Any]]) -> Iterator[ScriptLine]:
+        """記事リストから台本を生成し、閉じた行から順に返す（ストリーミング）
+
+        LLM の応答を受信しながら JSON 配列を読み進め、行が閉じた時点で
+        読み替え辞書を適用して yield する。後続の TTS を台本の完成前に始められる。
+        行数が足りない場合は全行を返した後に ValueError を送出する。
+        """
+        if not articles:
+            raise ValueError("記事リストが空です")
+
+        prompt = self._build_prompt(articles)
+        logger.info("台本生成を開始 (ストリーミング, モデル: %s, 記事数: %d)", self.model, len(articles))
+
+        generation_config, cache_key = self._generation_request(prompt)
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            logger.info("台本生成: キャッシュ済みの応答を使用")
+            chunks: Iterable[str] = [cached]
+        else:
+            estimated = estimate_tokens(self.system_prompt, prompt)
+            self.rate_limiter.acquire(estimated)
+            chunks = self._stream_text(prompt, generation_config, estimated)
+
+        parser = JSONArrayParser()
+        annotator = load_dictionary(config.PRONUNCIATION_DICT_PATH).annotator
+        received: List[str] = []
+        count = 0
+        for text in chunks:
+            received.append(text)
+            for item in parser.feed(text):
+                line = self._to_script_line(item)
+                if line is None:
+                    continue
+                count += 1
+                yield ScriptLine(speaker=line.speaker, text=annotator.annotate(line.text))
+
+        if not parser.started:
+            raise ValueError("台本が配列形式ではありません")
+        if parser.truncated:
+            logger.warning("台本JSONが途中で打ち切られています（%d行まで使用）", count)
+        logger.info("台本生成完了: %d行", count)
+
+        self._check_length(count)
+        if parser.closed:
+            self.response_cache.put(cache_key, "".join(received), self.model)
+
+    def _stream_text(self, prompt: str, generation_config: types.GenerateContentConfig,
+                     estimated: int) -> Iterator[str]:
+        """ストリーミング応答のテキスト断片を返す（最後の断片の usage_metadata で使用量を記録）"""
+        last = None
+        for chunk in self.client.models.generate_content_stream(
+            model=self.model,
+            config=generation_config,
+            contents=prompt,
+        ):
+            last = chunk
+            yield chunk.text or ""
+        ledger.record("台本生成（ストリーミング）", estimated, last)
+
+    def _request_json(self, prompt: str, system_prompt: Optional[str] = None,
+                      max_output_tokens: int = 65536, stage: str = "台本生成") -> Tuple[str, str]:
+        """LLM に JSON 形式の応答を要求し、(応答テキスト, キャッシュキー) を返す
+
+        同じリクエストの応答がキャッシュにあれば API を呼ばない。
+        呼び出し側は応答を検証してから self.response_cache.put() で保存する。
+        トークン使用量は stage 名で集計する。
+        """
+        generation_config, cache_key = self._generation_request(prompt, system_prompt, max_output_tokens)
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            logger.info("台本生成: キャッシュ済みの応答を使用")
+            return cached, cache_key
+        estimated = estimate_tokens(system_prompt or self.system_prompt, prompt)
+        response = self.retry.call(
+            self.rate_limiter.call, estimated,
+            self.client.models.generate_content,
+            model=self.model,
+            config=generation_config,
+            contents=prompt,
+        )
+        ledger.record(stage, estimated, response)
+        return response.text or "", cache_key
+
+    def _generation_request(self, prompt: str, system_prompt: Optional[str] = None,
+                            max_output_tokens: int = 65536) -> Tuple[types.GenerateContentConfig, str]:
+        """生成設定と、LLM応答キャッシュのキーを返す（system_prompt 省略時は self.system_prompt）"""
+        system_prompt = system_prompt or self.system_prompt
+        generation_config = types.GenerateContentConfig(
+            system_instruction=system_prompt,
+            response_mime_type="application/json",
+            max_output_tokens=max_output_tokens,
+        )
+        cache_key = LLMResponseCache.make_key(
+            self.model, system_prompt, prompt,
+            generation_config.model_dump(mode='json', exclude_none=True),
+        )
+        return generation_config, cache_key
+
+    @staticmethod
+    def _check_length(count: int) -> None:
+        """台本の行数が極端に少なければ ScriptTooShortError（途中で打ち切られた応答を検出）"""
+        if count < 5:
+            raise ScriptTooShortError(f"台本が短すぎます ({count}行)。トークン上限で打ち切られた可能性があります")
+
+    @staticmethod
+    def _to_script_line(item: Any) -> Optional[ScriptLine]:
+        """JSON の要素 {speaker, text} を ScriptLine に変換する（text が空なら None）"""
+        if not isinstance(item, dict):
+            return None
+        text = item.get("text", "")
+        if not isinstance(text, str) or not text.strip():
+            return None
+        return ScriptLine(speaker=item.get("speaker", "A"), text=text.strip())
 
     def _apply_pronunciation_fixes(self, script: Script) -> Script:
-        """台本テキストに読み替え辞書を適用する
+        """台本テキストに読み替え辞書（config.PRONUNCIATION_DICT_PATH）を適用する
 
         1. LLMが付けた間違った読みを正しい読みで上書き
         2. 読みが未付与の語句に正しい読みを追加
-        3. プレースホルダーで長い語の再マッチを防止
+        3. 長い語句を優先し、付与した読みの中は再照合しない
+
+        辞書から組み立てた照合パターンは辞書が更新されるまで使い回し、各行を1回走査するだけで済む。
         """
-        # 長い語句から先にマッチさせ、部分一致の二重置換を防ぐ
-        sorted_words = sorted(self.PRONUNCIATION_MAP.keys(), key=len, reverse=True)
-        fixed: Script = []
-        for line in script:
-            text = line.text
-            placeholders: dict = {}
-            for idx, word in enumerate(sorted_words):
-                reading = self.PRONUNCIATION_MAP[word]
-                placeholder = f"\x00PH{idx}\x00"
-                # 1. 既に読みが付いている場合: プレースホルダーに置換（間違った読みも上書き）
-                wrong_pattern = re.compile(
-                    re.escape(word) + r'（[ぁ-ゟァ-ヴーｰA-Za-z\s]+）'
-                )
-                text = wrong_pattern.sub(placeholder, text)
-                # 2. 読みが未付与の場合: プレースホルダーに置換
-                bare_pattern = re.compile(re.escape(word) + r'(?!（)')
-                text = bare_pattern.sub(placeholder, text)
-                placeholders[placeholder] = f"{word}（{reading}）"
-            # プレースホルダーを正しいアノテーションに復元
-            for ph, annotated in placeholders.items():
-                text = text.replace(ph, annotated)
-            fixed.append(ScriptLine(speaker=line.speaker, text=text))
-        return fixed
+        annotator = load_dictionary(config.PRONUNCIATION_DICT_PATH).annotator
+        return [
+            ScriptLine(speaker=line.speaker, text=annotator.annotate(line.text))
+            for line in script
+        ]
 
     def _build_prompt(self, articles: List[Dict[str, Any]]) -> str:
-        """記事情報からプロンプトテキストを構築する"""
+        """記事情報からプロンプトテキストを構築する（URL・タイトルを圧縮し、PROMPT_TOKEN_BUDGET に収める）
+
+        予算に収めるために省いた記事は台本で扱わないので、used_articles に含めない。
+        """
+        prompt, kept = fit_articles(articles, self._render_prompt, label="台本生成プロンプト")
+        self.used_articles = articles[:kept]
+        return prompt
+
+    def _render_prompt(self, articles: List[Dict[str, Any]]) -> str:
+        """記事リストをプロンプトテキストにする（link が空なら URL 行を省く）"""
         lines = [f"以下の{len(articles)}件のニュース記事をもとに台本を作成してください。\n"]
 
         for i, article in enumerate(articles, 1):
             lines.append(f"--- 記事{i} ---")
             lines.append(f"タイトル: {article.get('title', '不明')}")
             lines.append(f"ソース: {article.get('source', '不明')}")
-            lines.append(f"URL: {article.get('link', '')}")
+            if article.get('link'):
+                lines.append(f"URL: {article['link']}")
             lines.append("")
 
         return "\n".join(lines)
 
     def _parse_response(self, response_text: str) -> Script:
-        """Geminiレスポンス（JSON文字列）をScript型に変換する"""
-        import re as _re
-        text = response_text.strip()
-
-        # markdownコードブロックを除去 (```json ... ``` or ``` ... ```)
-        text = _re.sub(r'^```(?:json)?\s*', '', text, flags=_re.MULTILINE)
-        text = _re.sub(r'```\s*$', '', text, flags=_re.MULTILINE)
-        text = text.strip()
-
-        # JSON配列部分を抽出（前後に余分なテキストがある場合）
-        m = _re.search(r'(\[.*\])', text, flags=_re.DOTALL)
-        if m:
-            text = m.group(1)
-
-        try:
-            data = json.loads(text)
-        except json.JSONDecodeError as e:
-            logger.error("台本JSONパースエラー: %s", e)
-            # 最終行を削って切り詰めを回復する試み
-            try:
-                lines = text.splitlines()
-                for i in range(len(lines) - 1, 0, -1):
-                    candidate = '\n'.join(lines[:i])
-                    # 末尾のカンマを除去して閉じ括弧を補う
-                    candidate = candidate.rstrip().rstrip(',')
-                    for closing in [']', '}]']:
-                        try:
-                            data = json.loads(candidate + closing)
-                            logger.warning("台本JSON部分回復: 末尾 %d 行をスキップ", len(lines) - i)
-                            break
-                        except json.JSONDecodeError:
-                            continue
-                    else:
-                        continue
-                    break
-                else:
-                    raise ValueError(f"台本のJSON解析に失敗しました: {e}")
-            except ValueError:
-                raise ValueError(f"台本のJSON解析に失敗しました: {e}")
-
-        if not isinstance(data, list):
-            raise ValueError("台本が配列形式ではありません")
-
-        script: Script = []
-        for item in data:
-            speaker = item.get("speaker", "A")
-            text = item.get("text", "")
-            if text.strip():
-                script.append(ScriptLine(speaker=speaker, text=text.strip()))
+        """Geminiレスポンス（JSON文字列）をScript型に変換する
 
+        応答を先頭から1回だけ走査し、閉じた {speaker, text} 要素を順に取り出す。
+        トークン上限で途中まで打ち切られた応答は、最後に閉じた行までを使う（線形時間）。
+        """
+        parser = JSONArrayParser()
+        items = parser.feed(response_text)
+        if not parser.started:
+            raise ValueError("台本のJSON解析に失敗しました: 配列が見つかりません")
+        if parser.truncated:
+            logger.warning(
+                "台本JSON部分回復: %d文字中 %d文字目で途切れ、それまでの %d要素を使用",
+                len(response_text), parser.complete_end, len(items),
+            )
+        if parser.skipped:
+            logger.warning("台本JSON: 解析できない要素を %d件スキップ", parser.skipped)
+
+        script: Script = [line for line in map(self._to_script_line, items) if line is not None]
         if not script:
             raise ValueError("台本が空です")
 
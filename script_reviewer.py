@@ -6,18 +6,23 @@
 
 import json
 import logging
-import re
-import time
 from typing import Any, Dict, List, Optional
 
-from google import genai
 from google.genai import types
 
 import config
+from genai_client import get_client
+from json_stream import JSONArrayParser
+from llm_cache import LLMResponseCache
+from rate_limiter import limiter_for
+from retry import RetryPolicy
 from script_generator import Script, ScriptLine
+from token_budget import compact_title, estimate_tokens, ledger
 
 logger = logging.getLogger(__name__)
 
+REVIEW_MAX_ATTEMPTS = 3  # レビューは失敗しても元の台本で続行できるので、リトライは少なめ
+
 REVIEW_SYSTEM_PROMPT = """\
 あなたはポッドキャスト台本の品質レビュアーです。
 与えられた台本を以下の5項目でチェックし、問題があれば修正してください。
@@ -50,7 +55,10 @@ class ScriptReviewer:
     ):
         self.api_key = api_key or config.GEMINI_API_KEY
         self.model = model
-        self.client = genai.Client(api_key=self.api_key)
+        self.client = get_client(self.api_key)
+        self.response_cache = LLMResponseCache()
+        self.retry = RetryPolicy("台本レビュー", self.model, max_attempts=REVIEW_MAX_ATTEMPTS)
+        self.rate_limiter = limiter_for(self.model)
 
     def review(
         self,
@@ -61,17 +69,36 @@ class ScriptReviewer:
         logger.info("台本レビュー開始 (%d行, %d記事)", len(script), len(articles))
 
         prompt = self._build_review_prompt(script, articles)
+        generation_config = types.GenerateContentConfig(
+            system_instruction=REVIEW_SYSTEM_PROMPT,
+            response_mime_type="application/json",
+        )
+        cache_key = LLMResponseCache.make_key(
+            self.model, REVIEW_SYSTEM_PROMPT, prompt,
+            generation_config.model_dump(mode='json', exclude_none=True),
+        )
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            try:
+                reviewed = self._parse_response(cached)
+                logger.info("台本レビュー完了 (キャッシュ済みの応答): %d行を修正",
+                            self._count_changes(script, reviewed))
+                return reviewed
+            except (ValueError, AttributeError) as e:
+                logger.warning("キャッシュ済みのレビュー応答が不正、再生成します: %s", e)
 
         try:
-            response = self.client.models.generate_content(
+            estimated = estimate_tokens(REVIEW_SYSTEM_PROMPT, prompt)
+            response = self.retry.call(
+                self.rate_limiter.call, estimated,
+                self.client.models.generate_content,
                 model=self.model,
-                config=types.GenerateContentConfig(
-                    system_instruction=REVIEW_SYSTEM_PROMPT,
-                    response_mime_type="application/json",
-                ),
+                config=generation_config,
                 contents=prompt,
             )
+            ledger.record("台本レビュー", estimated, response)
             reviewed = self._parse_response(response.text)
+            self.response_cache.put(cache_key, response.text, self.model)
 
             changes = self._count_changes(script, reviewed)
             if changes == 0:
@@ -81,29 +108,8 @@ class ScriptReviewer:
             return reviewed
 
         except Exception as e:
-            is_503 = "503" in str(e) or "UNAVAILABLE" in str(e)
-            if is_503:
-                logger.warning("台本レビュー: 503エラー、30秒後にリトライ: %s", e)
-                time.sleep(30)
-                try:
-                    response = self.client.models.generate_content(
-                        model=self.model,
-                        config=types.GenerateContentConfig(
-                            system_instruction=REVIEW_SYSTEM_PROMPT,
-                            response_mime_type="application/json",
-                        ),
-                        contents=prompt,
-                    )
-                    reviewed = self._parse_response(response.text)
-                    changes = self._count_changes(script, reviewed)
-                    logger.info("台本レビュー完了 (リトライ成功): %d行を修正", changes)
-                    return reviewed
-                except Exception as retry_e:
-                    logger.warning("台本レビュー: リトライも失敗、元の台本を使用: %s", retry_e)
-                    return script
-            else:
-                logger.warning("台本レビュー失敗、元の台本を使用: %s", e)
-                return script
+            logger.warning("台本レビュー失敗、元の台本を使用: %s", e)
+            return script
 
     def _build_review_prompt(
         self,
@@ -113,40 +119,43 @@ class ScriptReviewer:
         """レビュー用プロンプトを構築する"""
         lines = ["## 提供記事一覧\n"]
         for i, article in enumerate(articles, 1):
-            title = article.get("title", "不明")
+            title = compact_title(article.get("title", "不明"))
             source = article.get("source", "")
             lines.append(f"{i}. {title}（{source}）")
 
         lines.append("\n## レビュー対象の台本\n")
         lines.append("```json")
-        script_data = [{"speaker": sl.speaker, "text": sl.text} for sl in script]
-        lines.append(json.dumps(script_data, ensure_ascii=False, indent=2))
+        # 1行1要素の詰めた JSON（インデントの空白はトークンを浪費するだけ）
+        lines.append("[")
+        lines.append(",\n".join(
+            json.dumps({"speaker": sl.speaker, "text": sl.text}, ensure_ascii=False, separators=(',', ':'))
+            for sl in script
+        ))
+        lines.append("]")
         lines.append("```")
 
         lines.append("\n上記の台本を5項目でチェックし、修正版をJSON配列で返してください。")
         return "\n".join(lines)
 
     def _parse_response(self, response_text: str) -> Script:
-        """Geminiレスポンス（JSON文字列）をScript型に変換する"""
-        text = response_text.strip()
+        """Geminiレスポンス（JSON文字列）をScript型に変換する
 
-        # markdownコードブロックを除去
-        text = re.sub(r'^```(?:json)?\s*', '', text, flags=re.MULTILINE)
-        text = re.sub(r'```\s*$', '', text, flags=re.MULTILINE)
-        text = text.strip()
-
-        # JSON配列部分を抽出
-        m = re.search(r'(\[.*\])', text, flags=re.DOTALL)
-        if m:
-            text = m.group(1)
-
-        data = json.loads(text)
-
-        if not isinstance(data, list):
+        途中で打ち切られたレビュー結果は台本の後半が欠けるため採用しない（ValueError）。
+        """
+        parser = JSONArrayParser()
+        data = parser.feed(response_text)
+        if not parser.started:
             raise ValueError("レビュー結果が配列形式ではありません")
+        if parser.truncated:
+            raise ValueError(
+                f"レビュー結果が途中で打ち切られています "
+                f"({len(response_text)}文字中 {parser.complete_end}文字目まで)"
+            )
 
         script: Script = []
         for item in data:
+            if not isinstance(item, dict):
+                continue
             speaker = item.get("speaker", "A")
             t = item.get("text", "")
             if speaker not in ("A", "B"):
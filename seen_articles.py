@@ -0,0 +1,91 @@
+"""
+配信済み記事ストア
+過去のエピソードで扱った記事を「正規化URL」と「タイトル指紋」で記録し、
+翌日以降の記事取得で同じ記事を LLM に再送しないようにする。
+
+キーは 64bit ハッシュの16進文字列、値は記録日（日付の序数）だけを持つため、
+1年分の記事を記録しても数百KB程度に収まり、照合は辞書引き1回で済む。
+"""
+
+import hashlib
+import logging
+import unicodedata
+from datetime import date
+from typing import Dict, Optional
+
+import config
+from cache_utils import load_json, save_json
+
+logger = logging.getLogger(__name__)
+
+STORE_VERSION = 1
+
+
+def _digest(value: str) -> str:
+    return hashlib.blake2b(value.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def title_fingerprint(title: str) -> str:
+    """表記ゆれ（全角半角・大文字小文字・空白・記号）を吸収したタイトルの指紋"""
+    text = "".join(
+        ch for ch in unicodedata.normalize("NFKC", title).lower()
+        if ch.isalnum()
+    )
+    return _digest(text) if text else ""
+
+
+class SeenArticleStore:
+    """配信済み記事の永続インデックス（保持期間を過ぎた記録は自動で削除）"""
+
+    def __init__(self, path: Optional[str] = None, retention_days: Optional[int] = None):
+        self.path = path or config.SEEN_ARTICLES_PATH
+        self.retention_days = (
+            config.SEEN_ARTICLE_RETENTION_DAYS if retention_days is None else retention_days
+        )
+        data = load_json(self.path, {})
+        if data.get('version') != STORE_VERSION:
+            data = {}
+        self._seen: Dict[str, int] = data.get('seen', {})
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    @staticmethod
+    def _keys(norm_url: str, title: str):
+        if norm_url:
+            yield "u" + _digest(norm_url)
+        fingerprint = title_fingerprint(title)
+        if fingerprint:
+            yield "t" + fingerprint
+
+    def is_seen(self, norm_url: str, title: str, today: date) -> bool:
+        """URL かタイトルのどちらかが today より前のエピソードで使われていれば True
+
+        同じ日の別番組（速報版 → 深掘り版）が記録した記事は対象外にする。
+        """
+        today_ord = today.toordinal()
+        return any(
+            self._seen.get(key, today_ord) < today_ord
+            for key in self._keys(norm_url, title)
+        )
+
+    def mark(self, norm_url: str, title: str, day: date) -> None:
+        """記事を day のエピソードで使用済みとして記録する（最初に使用した日を保持）"""
+        day_ord = day.toordinal()
+        for key in self._keys(norm_url, title):
+            self._seen[key] = min(self._seen.get(key, day_ord), day_ord)
+
+    def evict(self, today: date) -> int:
+        """保持期間を過ぎた記録を削除し、削除件数を返す"""
+        oldest = today.toordinal() - self.retention_days
+        expired = [key for key, day in self._seen.items() if day < oldest]
+        for key in expired:
+            del self._seen[key]
+        return len(expired)
+
+    def save(self) -> None:
+        """記録をファイルに書き出す"""
+        try:
+            save_json(self.path, {'version': STORE_VERSION, 'seen': self._seen})
+        except OSError as e:
+            logger.warning("配信済み記事ストア保存エラー: %s", e)
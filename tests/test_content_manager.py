@@ -0,0 +1,112 @@
+"""content_manager の日付解析・重複排除のテスト"""
+
+import os
+import random
+import sys
+import time
+import unittest
+from datetime import datetime, timezone
+from difflib import SequenceMatcher
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from content_manager import ContentManager
+
+
+def _manager() -> ContentManager:
+    manager = ContentManager.__new__(ContentManager)
+    manager._date_strategies = {}
+    return manager
+
+
+def _struct(dt: datetime) -> time.struct_time:
+    return dt.utctimetuple()
+
+
+class ParsePublishedDateTest(unittest.TestCase):
+    FEED = 'https://example.com/feed.xml'
+
+    def test_published_parsed_wins_after_updated_only_entry(self):
+        manager = _manager()
+        updated = datetime(2024, 5, 2, tzinfo=timezone.utc)
+        published = datetime(2024, 5, 1, tzinfo=timezone.utc)
+
+        first = manager._parse_published_date({'updated_parsed': _struct(updated)}, self.FEED)
+        second = manager._parse_published_date(
+            {'published_parsed': _struct(published), 'updated_parsed': _struct(updated)}, self.FEED)
+
+        self.assertEqual(first, updated)
+        self.assertEqual(second, published)
+
+    def test_string_format_is_memoized(self):
+        manager = _manager()
+        entry = {'published': 'Wed, 01 May 2024 09:00:00 +0900'}
+
+        dt = manager._parse_published_date(entry, self.FEED)
+
+        self.assertEqual(dt, datetime(2024, 5, 1, 0, 0, tzinfo=timezone.utc))
+        self.assertEqual(manager._date_strategies[self.FEED], "%a, %d %b %Y %H:%M:%S %z")
+
+    def test_parsed_field_is_not_memoized(self):
+        manager = _manager()
+        entry = {'updated_parsed': _struct(datetime(2024, 5, 2, tzinfo=timezone.utc))}
+
+        manager._parse_published_date(entry, self.FEED)
+
+        self.assertNotIn(self.FEED, manager._date_strategies)
+
+
+def _legacy_dedup(titles, threshold=0.75):
+    """旧実装（SequenceMatcher による全ペア比較）で残るタイトル"""
+    kept = []
+    for title in titles:
+        if not any(SequenceMatcher(None, title, k).ratio() >= threshold for k in kept):
+            kept.append(title)
+    return kept
+
+
+def _dedup_titles(titles):
+    articles = [{'title': t, 'link': f'https://example.com/{i}'} for i, t in enumerate(titles)]
+    return [a['title'] for a in _manager()._deduplicate_articles(articles)]
+
+
+class DeduplicateArticlesTest(unittest.TestCase):
+
+    def test_distinct_stories_are_kept(self):
+        # ratio() は 0.70・0.72 で旧実装では別記事。バイグラム Dice 係数では 0.5 を超える
+        titles = [
+            'Microsoft announces new Surface laptop',
+            'Microsoft announces new Xbox console',
+            'NVIDIA、新GPUを発表',
+            'AMD、新GPUを発表',
+        ]
+        self.assertEqual(_dedup_titles(titles), titles)
+
+    def test_near_duplicates_are_removed(self):
+        titles = [
+            'OpenAI、新モデル「GPT-5」を発表',
+            'OpenAI、新モデル「GPT-5」を正式発表',
+            'Apple releases iOS 18.1 with Apple Intelligence',
+            'Apple releases iOS 18.1 with Apple Intelligence features',
+        ]
+        self.assertEqual(_dedup_titles(titles), titles[::2])
+
+    def test_matches_legacy_decisions(self):
+        rng = random.Random(0)
+        words = ['Google', 'Apple', 'Microsoft', 'NVIDIA', 'AMD', '新', 'AI', 'GPU', 'モデル',
+                 'を発表', 'が公開', 'の提供を開始', 'アップデート', 'Surface', 'iPhone', 'Gemini',
+                 'announces', 'releases', 'new', 'chip', 'laptop', 'model', '、', ' ']
+        titles = []
+        for _ in range(300):
+            if titles and rng.random() < 0.3:
+                base = list(rng.choice(titles))
+                for _ in range(rng.randint(1, 4)):
+                    base[rng.randrange(len(base))] = rng.choice('、 新版')
+                titles.append(''.join(base))
+            else:
+                titles.append(''.join(rng.choices(words, k=rng.randint(4, 8))))
+        self.assertEqual(_dedup_titles(titles), _legacy_dedup(titles))
+
+
+if __name__ == '__main__':
+    unittest.main()
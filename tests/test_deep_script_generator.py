@@ -0,0 +1,52 @@
+"""deep_script_generator のトピック別並列生成のテスト"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from deep_script_generator import DeepScriptGenerator
+from script_generator import ScriptLine
+
+TOPICS = [{'title': f'T{i}', 'articles': [i]} for i in range(1, 5)]
+
+
+class _Generator(DeepScriptGenerator):
+    """_generate_segment の呼び出しを記録し、failing のトピックだけ失敗させる"""
+
+    def __init__(self, failing):
+        self.failing = failing
+        self.calls = []
+
+    def _generate_segment(self, articles, topics, index, previous):
+        self.calls.append((topics[index]['title'], previous))
+        if topics[index]['title'] in self.failing:
+            raise ValueError('失敗')
+        return [ScriptLine(speaker='A', text=f"{previous}→{topics[index]['title']}")]
+
+
+class GenerateSegmentsTest(unittest.TestCase):
+
+    def test_bridge_follows_previous_successful_topic(self):
+        generator = _Generator(failing={'T1', 'T3'})
+
+        segments = generator._generate_segments([], TOPICS)
+
+        self.assertEqual([s[0].text if s else None for s in segments],
+                         [None, 'None→T2', None, 'T2→T4'])
+        # T2・T4 は並列生成の後、実際の直前のトピックで作り直される
+        self.assertIn(('T2', None), generator.calls)
+        self.assertIn(('T4', 'T2'), generator.calls)
+
+    def test_no_regeneration_when_all_succeed(self):
+        generator = _Generator(failing=set())
+
+        segments = generator._generate_segments([], TOPICS)
+
+        self.assertEqual(len(generator.calls), len(TOPICS))
+        self.assertEqual(segments[2][0].text, 'T2→T3')
+
+
+if __name__ == '__main__':
+    unittest.main()
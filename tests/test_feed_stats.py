@@ -0,0 +1,45 @@
+"""feed_stats のテスト"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from feed_stats import FeedStats
+
+URL = 'https://example.com/feed.xml'
+
+
+class RecordSuccessTest(unittest.TestCase):
+
+    def setUp(self):
+        self.stats = FeedStats(os.path.join(tempfile.mkdtemp(), 'feed_stats.json'))
+
+    def test_partial_download_keeps_latency(self):
+        self.stats.record_success(URL, 4.0, 50000, 20)
+        timeout = self.stats.timeout_for(URL)
+        self.stats.record_failure(URL)
+
+        # 304・打ち切った受信は所要時間を渡さない
+        for _ in range(10):
+            self.stats.record_success(URL, None, None, 20)
+
+        stats = self.stats.get(URL)
+        self.assertEqual(stats['latency'], 4.0)
+        self.assertEqual(stats['bytes'], 50000)
+        self.assertEqual(stats['failure_streak'], 0)
+        self.assertEqual(self.stats.timeout_for(URL), timeout)
+
+    def test_full_download_updates_latency(self):
+        self.stats.record_success(URL, 4.0, 50000, 20)
+        self.stats.record_success(URL, 2.0, 40000, 20)
+
+        stats = self.stats.get(URL)
+        self.assertAlmostEqual(stats['latency'], 3.4)
+        self.assertEqual(stats['bytes'], 40000)
+
+
+if __name__ == '__main__':
+    unittest.main()
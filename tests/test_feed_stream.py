@@ -0,0 +1,118 @@
+"""feed_stream のテスト"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from content_manager import ContentManager
+from feed_cache import FeedCache
+from feed_stream import FeedStreamError, FeedStreamParser
+
+SJIS_FEED = (
+    '<?xml version="1.0" encoding="Shift_JIS"?>\n'
+    '<rss version="2.0"><channel><title>テストフィード</title>'
+    '<item><title>日本語の記事</title><link>https://example.com/a</link>'
+    '<description>本文です</description></item>'
+    '</channel></rss>'
+).encode('shift_jis')
+
+
+def _parser() -> FeedStreamParser:
+    return FeedStreamParser(max_entries=10, max_fresh=10, cutoff=None,
+                            stale_limit=0, parse_date=lambda entry: None)
+
+
+class _Response:
+    """requests.get(stream=True) の応答の代わり"""
+
+    status_code = 200
+    url = 'https://example.com/feed.xml'
+    headers = {'Content-Type': 'application/rss+xml'}
+
+    def __init__(self, content: bytes, headers=None):
+        self.content = content
+        if headers is not None:
+            self.headers = headers
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+
+class FeedStreamParserTest(unittest.TestCase):
+
+    def test_multibyte_encoding_raises_feed_stream_error(self):
+        with self.assertRaises(FeedStreamError):
+            _parser().parse([SJIS_FEED])
+
+    def test_unknown_encoding_raises_feed_stream_error(self):
+        feed = b'<?xml version="1.0" encoding="x-unknown"?><rss><channel></channel></rss>'
+        with self.assertRaises(FeedStreamError):
+            _parser().parse([feed])
+
+    def test_non_utf8_feed_falls_back_to_feedparser(self):
+        manager = ContentManager.__new__(ContentManager)
+        manager._date_strategies = {}
+        with mock.patch.object(config, 'FEED_STREAM_PARSE', True), \
+                mock.patch('content_manager.requests.get', return_value=_Response(SJIS_FEED)):
+            response = manager._download_feed(_Response.url, timeout=5, validators={})
+
+        self.assertIsNone(response.entries)  # ストリーミング解析せず feedparser に回す
+        self.assertEqual(response.content, SJIS_FEED)
+
+
+
+def _utf8_feed(items: int) -> bytes:
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>テスト</title>'
+        + ''.join(f'<item><title>記事{i}</title><link>https://example.com/{i}</link></item>'
+                  for i in range(items))
+        + '</channel></rss>'
+    ).encode('utf-8')
+
+
+class FeedCacheOnStreamTest(unittest.TestCase):
+    """ストリーミング解析を打ち切ったフィードは条件付きGET用に保存しない"""
+
+    def _fetch(self, content: bytes, max_articles: int) -> FeedCache:
+        tmp = tempfile.mkdtemp()
+        cache_path = os.path.join(tmp, 'feed_cache.json')
+        headers = {'Content-Type': 'application/rss+xml', 'ETag': '"v1"'}
+        with mock.patch.multiple(config, RSS_FEEDS=[_Response.url], FEED_STREAM_PARSE=True,
+                                 FEED_CACHE_PATH=cache_path,
+                                 FEED_STATS_PATH=os.path.join(tmp, 'feed_stats.json'),
+                                 SEEN_ARTICLE_POLICY='off'), \
+                mock.patch('content_manager.requests.get',
+                           side_effect=lambda *a, **kw: _Response(content, headers)):
+            manager = ContentManager.__new__(ContentManager)
+            manager._date_strategies = {}
+            manager.fetch_rss_feeds(max_articles=max_articles, hours=0, use_snapshot=False)
+        return FeedCache(cache_path)
+
+    def test_stopped_early_is_not_cached(self):
+        cache = self._fetch(_utf8_feed(10), max_articles=2)
+        self.assertEqual(cache.validators(_Response.url), {})
+        self.assertIsNone(cache.get(_Response.url))
+
+    def test_complete_feed_is_cached(self):
+        cache = self._fetch(_utf8_feed(3), max_articles=5)
+        self.assertEqual(cache.validators(_Response.url), {'If-None-Match': '"v1"'})
+        self.assertEqual(len(cache.get(_Response.url)['entries']), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
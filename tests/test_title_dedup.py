@@ -0,0 +1,56 @@
+"""title_dedup のテスト"""
+
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from title_dedup import TitleIndex, shingle_similarity, title_shingles
+
+
+def _brute_force(sets, threshold):
+    """全ペア比較で、各集合より前にある最初の類似集合の番号を返す"""
+    return [
+        next((i for i in range(k) if shingle_similarity(s, sets[i]) >= threshold), None)
+        for k, s in enumerate(sets)
+    ]
+
+
+def _indexed(sets, threshold):
+    index = TitleIndex.for_titles(sets, threshold)
+    found = []
+    for s in sets:
+        found.append(index.find(s))
+        index.add(s)
+    return found
+
+
+class TitleIndexTest(unittest.TestCase):
+
+    def test_tie_at_non_default_threshold(self):
+        # Dice 係数ちょうど 0.8（2×2 / (2+3)）。サイズフィルタの 2 / (2/3) が 3 を僅かに下回っていた
+        small = frozenset(['ab', 'bc'])
+        large = frozenset(['ab', 'bc', 'cd'])
+        self.assertEqual(shingle_similarity(small, large), 0.8)
+        for first, second in ((large, small), (small, large)):
+            index = TitleIndex.for_titles([first, second], 0.8)
+            index.add(first)
+            self.assertEqual(index.find(second), 0)
+
+    def test_matches_brute_force(self):
+        rng = random.Random(0)
+        base = ["".join(rng.choices("あいうえおかきくけこAB", k=rng.randint(3, 12))) for _ in range(40)]
+        titles = base + [t[:-1] + rng.choice("さしす") for t in base] + [t + "速報" for t in base]
+        sets = [title_shingles(t) for t in titles]
+        for threshold in (0.5, 0.6, 0.7, 0.8, 0.9):
+            with self.subTest(threshold=threshold):
+                self.assertEqual(
+                    [i is None for i in _indexed(sets, threshold)],
+                    [i is None for i in _brute_force(sets, threshold)],
+                )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+"""
+記事タイトルの近似重複検出
+文字バイグラム（日本語・英語共通）の集合類似度と、プレフィックスフィルタ付き転置インデックスで
+全ペア比較をせずに類似タイトルの候補を絞り込む。重複かどうかの判定は呼び出し側が候補ごとに行う。
+"""
+
+import unicodedata
+from collections import Counter, defaultdict
+from math import ceil
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+Shingles = FrozenSet[str]
+
+# 閾値ちょうどの組を浮動小数点の誤差で取りこぼさないための許容誤差
+EPSILON = 1e-9
+
+# 候補抽出の閾値を 2r - 1 からさらに下げる幅（ratio() が閾値以上で Dice 係数が低い組を取りこぼさないため）
+CANDIDATE_MARGIN = 0.15
+
+
+def title_shingles(title: str) -> Shingles:
+    """タイトルを正規化して文字バイグラム集合に変換する
+
+    NFKC正規化・小文字化・空白除去の後、隣接2文字を1単位とする。
+    分かち書き不要なので日本語と英語を同じ方法で扱える。
+    """
+    text = "".join(
+        ch for ch in unicodedata.normalize("NFKC", title).lower()
+        if not ch.isspace()
+    )
+    if len(text) < 2:
+        return frozenset([text]) if text else frozenset()
+    return frozenset(text[i:i + 2] for i in range(len(text) - 1))
+
+
+def shingle_similarity(a: Shingles, b: Shingles) -> float:
+    """バイグラム集合同士の Dice 係数を返す (0.0〜1.0)"""
+    if not a and not b:
+        return 1.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+def ratio_candidate_threshold(ratio_threshold: float) -> float:
+    """SequenceMatcher.ratio() の閾値に対する、候補抽出用のバイグラム Dice 係数の閾値
+
+    1文字の違いはバイグラムを2つ崩すため、文字単位の一致率 r の組の Dice 係数はおよそ 2r - 1 まで下がる。
+    Dice 係数は ratio() の代わりにはならないので、これは取りこぼしを防ぐための緩い下限で、
+    重複の判定は候補ごとに ratio() で行う。
+    """
+    return max(0.0, 2 * ratio_threshold - 1 - CANDIDATE_MARGIN)
+
+
+class TitleIndex:
+    """類似タイトル検索用の転置インデックス
+
+    各集合を出現頻度の低いバイグラム順に並べ、先頭（プレフィックス）だけを索引する。
+    Dice 係数が閾値以上の2集合は必ずプレフィックス同士に共通要素を持つため、
+    候補はプレフィックスの転置リストから得られ、照合はその候補だけで済む（PPJoin 方式）。
+    """
+
+    def __init__(self, threshold: float, frequencies: Dict[str, int]):
+        """
+        Args:
+            threshold: Dice 係数の閾値（これ以上で類似とみなす）
+            frequencies: バイグラムの出現頻度（並び順の決定に使う）
+        """
+        self.threshold = threshold
+        # Dice 係数 d と Jaccard 係数 j は j = d / (2 - d) で単調に対応する
+        self._jaccard = threshold / (2 - threshold) if threshold < 2 else 1.0
+        self._frequencies = frequencies
+        # バイグラム → [(集合番号, 集合内の位置, 集合の要素数)]
+        self._postings: Dict[str, List[Tuple[int, int, int]]] = defaultdict(list)
+        self._sets: List[Shingles] = []
+        self._empty_idx: Optional[int] = None
+
+    @classmethod
+    def for_titles(cls, titles: Iterable[Shingles], threshold: float) -> "TitleIndex":
+        """照合対象のバイグラム集合群から頻度表を作ってインデックスを生成する"""
+        frequencies: Counter = Counter()
+        for shingles in titles:
+            frequencies.update(shingles)
+        return cls(threshold, frequencies)
+
+    def _ordered(self, shingles: Shingles) -> List[str]:
+        return sorted(shingles, key=lambda s: (self._frequencies.get(s, 0), s))
+
+    def _prefix_length(self, size: int) -> int:
+        return max(1, size - ceil(self._jaccard * size - EPSILON) + 1)
+
+    def find(self, shingles: Shingles) -> Optional[int]:
+        """閾値以上に類似する登録済み集合のうち番号が最小のものを返す（無ければ None）"""
+        return next(self.candidates(shingles), None)
+
+    def candidates(self, shingles: Shingles) -> Iterator[int]:
+        """閾値以上に類似する登録済み集合の番号を登録順に返す
+
+        プレフィックスの転置リストを走査しながら候補ごとの共通要素数を数え、
+        残りの要素をすべて共有しても閾値に届かない候補（位置フィルタ）や
+        要素数が離れすぎた候補（サイズフィルタ）は照合前に除外する。
+        """
+        if not shingles:
+            if self._empty_idx is not None:
+                yield self._empty_idx
+            return
+
+        ordered = self._ordered(shingles)
+        size = len(ordered)
+        min_size = self._jaccard * size - EPSILON
+        max_size = size / self._jaccard + EPSILON if self._jaccard > 0 else float("inf")
+        overlaps: Dict[int, int] = {}
+
+        for i, token in enumerate(ordered[:self._prefix_length(size)]):
+            for idx, j, other in self._postings.get(token, ()):
+                count = overlaps.get(idx, 0)
+                if count < 0:
+                    continue
+                if not min_size <= other <= max_size:
+                    overlaps[idx] = -1
+                    continue
+                required = self.threshold * (size + other) / 2 - EPSILON
+                if count + 1 + min(size - i - 1, other - j - 1) < required:
+                    overlaps[idx] = -1
+                    continue
+                overlaps[idx] = count + 1
+
+        for idx in sorted(overlaps):
+            if overlaps[idx] > 0 and shingle_similarity(shingles, self._sets[idx]) >= self.threshold:
+                yield idx
+
+    def add(self, shingles: Shingles) -> int:
+        """集合を登録して番号を返す"""
+        idx = len(self._sets)
+        self._sets.append(shingles)
+        if not shingles:
+            if self._empty_idx is None:
+                self._empty_idx = idx
+            return idx
+        ordered = self._ordered(shingles)
+        size = len(ordered)
+        for j, token in enumerate(ordered[:self._prefix_length(size)]):
+            self._postings[token].append((idx, j, size))
+        return idx
@@ -0,0 +1,169 @@
+"""
+プロンプトのトークン管理
+送信前に入力トークン数を見積もり、記事一覧を圧縮して PROMPT_TOKEN_BUDGET に収める。
+ステージ（台本生成・レビュー・TTS など）ごとのトークン使用量を集計してログに出す。
+
+記事一覧の圧縮は次の順に、予算に収まった時点で止める:
+1. URL からトラッキング用クエリ・フラグメント・スキームを除き、長い英語タイトルを切り詰める（常に行う）
+2. URL を省く（台本には読み上げないため）
+3. 本文抜粋を半分ずつ短くする
+4. 末尾（優先度の低い）記事から省く
+"""
+
+import logging
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# 記事の中身に関係しないクエリパラメータ
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'ref', 'ref_src', 'referrer',
+    'source', 'cmpid', 'ncid', 'ocid', 'sr_share', 'guccounter', 'guce_referrer', 'guce_referrer_sig',
+}
+TRACKING_PREFIXES = ('utm_', 'mc_', '_hs', 'pk_', 'at_')
+
+_ASCII_TITLE = re.compile(r'^[\x00-\x7f‘-”–—…]*$')
+
+
+def estimate_tokens(*texts: str) -> int:
+    """送信前の入力トークン数の概算（ASCII は約4文字、それ以外は約1文字で1トークン）"""
+    total = 0
+    for text in texts:
+        if not text:
+            continue
+        ascii_chars = sum(1 for ch in text if ch < '\x80')
+        total += (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+    return total
+
+
+def compact_url(url: str) -> str:
+    """トラッキング用クエリ・フラグメント・スキームを除いた URL を返す"""
+    if not url:
+        return ''
+    parsed = urlparse(url)
+    query = [
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)
+    ]
+    compact = parsed.netloc + parsed.path.rstrip('/')
+    if query:
+        compact += '?' + urlencode(query)
+    return compact
+
+
+def compact_title(title: str, max_chars: Optional[int] = None) -> str:
+    """英語（ASCII 主体）の長いタイトルを単語の切れ目で切り詰める（日本語のタイトルはそのまま）"""
+    max_chars = config.PROMPT_TITLE_MAX_CHARS if max_chars is None else max_chars
+    title = ' '.join(title.split())
+    if max_chars <= 0 or len(title) <= max_chars or not _ASCII_TITLE.match(title):
+        return title
+    cut = title.rfind(' ', 0, max_chars)
+    return title[:cut if cut > max_chars // 2 else max_chars].rstrip(' ,:;-') + '…'
+
+
+def compact_article(article: Dict[str, Any]) -> Dict[str, Any]:
+    """プロンプト用に URL とタイトルを圧縮した記事のコピーを返す"""
+    return dict(
+        article,
+        title=compact_title(article.get('title', '')),
+        link=compact_url(article.get('link', '')),
+    )
+
+
+def fit_prompt(articles: List[Dict[str, Any]],
+               render: Callable[[List[Dict[str, Any]]], str],
+               budget: Optional[int] = None,
+               label: str = "プロンプト") -> str:
+    """記事一覧を圧縮し、render(articles) のトークン数が budget 以下になるようにする
+
+    render は記事リストからプロンプト文字列を作る関数（link・body が空なら行ごと省くこと）。
+    budget が 0 以下なら圧縮（手順1）だけ行う。
+    """
+    return fit_articles(articles, render, budget, label)[0]
+
+
+def fit_articles(articles: List[Dict[str, Any]],
+                 render: Callable[[List[Dict[str, Any]]], str],
+                 budget: Optional[int] = None,
+                 label: str = "プロンプト") -> Tuple[str, int]:
+    """fit_prompt と同じ。(プロンプト, プロンプトに残った記事の件数) を返す（省くのは末尾の記事から）"""
+    budget = config.PROMPT_TOKEN_BUDGET if budget is None else budget
+    articles = [compact_article(a) for a in articles]
+    prompt = render(articles)
+    tokens = estimate_tokens(prompt)
+    steps = []
+
+    if budget > 0 and tokens > budget:
+        articles = [dict(a, link='') for a in articles]
+        prompt = render(articles)
+        tokens = estimate_tokens(prompt)
+        steps.append("URL省略")
+
+    while budget > 0 and tokens > budget and any(a.get('body') for a in articles):
+        articles = [dict(a, body=a['body'][:len(a['body']) // 2]) if a.get('body') else a for a in articles]
+        prompt = render(articles)
+        tokens = estimate_tokens(prompt)
+        if "本文短縮" not in steps:
+            steps.append("本文短縮")
+
+    dropped = 0
+    while budget > 0 and tokens > budget and len(articles) > 1:
+        articles = articles[:-1]
+        dropped += 1
+        prompt = render(articles)
+        tokens = estimate_tokens(prompt)
+    if dropped:
+        steps.append(f"記事{dropped}件省略")
+
+    if steps:
+        logger.warning("%s: 予算 %dトークンに収めるため圧縮 (%s)", label, budget, "・".join(steps))
+    logger.info("%s: 約%dトークン (記事%d件)", label, tokens, len(articles))
+    return prompt, len(articles)
+
+
+class TokenLedger:
+    """ステージごとのトークン使用量（見積もりと、応答の usage_metadata による実数）"""
+
+    def __init__(self):
+        self._stages: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, estimated: int, response: Any = None) -> None:
+        """1回の呼び出しを記録する（response に usage_metadata があれば実数も加算）"""
+        usage = getattr(response, 'usage_metadata', None)
+        with self._lock:
+            stats = self._stages.setdefault(stage, {
+                'calls': 0, 'estimated': 0, 'prompt': 0, 'cached': 0, 'output': 0,
+            })
+            stats['calls'] += 1
+            stats['estimated'] += estimated
+            if usage is not None:
+                stats['prompt'] += getattr(usage, 'prompt_token_count', None) or 0
+                stats['cached'] += getattr(usage, 'cached_content_token_count', None) or 0
+                stats['output'] += getattr(usage, 'candidates_token_count', None) or 0
+
+    def report(self) -> None:
+        """ステージごとの使用量をログに出す"""
+        with self._lock:
+            stages = list(self._stages.items())
+        if not stages:
+            return
+        logger.info("トークン使用量（ステージ別）:")
+        for stage, s in stages:
+            logger.info(
+                "  %s: %d回, 入力 %d (見積もり %d, うちキャッシュ %d), 出力 %d",
+                stage, s['calls'], s['prompt'], s['estimated'], s['cached'], s['output'],
+            )
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+
+
+# プロセス全体で共有する集計
+ledger = TokenLedger()
@@ -0,0 +1,118 @@
+"""
+TTSチャンクキャッシュ
+(モデル, 話者と音声, TTSプロンプト) のハッシュをキーに、合成済みの PCM をチャンクごとに保存する。
+TTSプロンプトには演出指示（DIRECTOR'S NOTES）と読み上げテキストが含まれるので、
+同じ内容のチャンク（途中で失敗した実行の再実行・リトライ・お休み告知など）は API を呼ばずに済む。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Optional, Sequence, Tuple
+
+import config
+from cache_utils import save_bytes
+
+logger = logging.getLogger(__name__)
+
+
+class TTSChunkCache:
+    """リクエスト指紋 → PCM のディスクキャッシュ
+
+    有効期限（TTS_CACHE_TTL_SEC）を過ぎたエントリは読み込まず、
+    prune() で期限切れと容量超過分（古い順）を削除する。ttl_sec=0 で無効。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None,
+                 ttl_sec: Optional[int] = None,
+                 max_bytes: Optional[int] = None):
+        self.cache_dir = cache_dir or config.TTS_CACHE_DIR
+        self.ttl_sec = config.TTS_CACHE_TTL_SEC if ttl_sec is None else ttl_sec
+        self.max_bytes = config.TTS_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model: str, voices: Sequence[str], prompt: str) -> str:
+        """リクエスト内容からキャッシュキーを作る"""
+        payload = json.dumps([model, list(voices), prompt], ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key[:32]}.pcm")
+
+    def get(self, key: str) -> Optional[bytes]:
+        """有効期限内の PCM を返す（無ければ None）。ヒット・ミスを数える"""
+        data = None
+        if self.ttl_sec > 0:
+            path = self._path(key)
+            try:
+                if time.time() - os.stat(path).st_mtime <= self.ttl_sec:
+                    with open(path, 'rb') as f:
+                        data = f.read()
+            except OSError:
+                data = None
+        with self._lock:
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return data
+
+    def put(self, key: str, pcm: bytes) -> None:
+        """合成した PCM を保存する"""
+        if self.ttl_sec <= 0 or not pcm:
+            return
+        try:
+            save_bytes(self._path(key), pcm)
+        except OSError as e:
+            logger.warning("TTSチャンクキャッシュ保存エラー: %s", e)
+
+    def stats(self) -> Tuple[int, int]:
+        """(ヒット数, ミス数)"""
+        with self._lock:
+            return self.hits, self.misses
+
+    def prune(self) -> int:
+        """期限切れのエントリと、容量上限を超えた古いエントリを削除して削除件数を返す"""
+        if not os.path.isdir(self.cache_dir):
+            return 0
+
+        now = time.time()
+        files = []
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.pcm') or name.startswith('.tmp_'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.ttl_sec:
+                removed += self._remove(path)
+            else:
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            removed += self._remove(path)
+            total -= size
+
+        if removed:
+            logger.info("TTSチャンクキャッシュ: %d件を削除", removed)
+        return removed
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except OSError:
+            return 0
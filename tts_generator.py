@@ -2,24 +2,35 @@
 TTS音声生成モジュール
 Gemini Flash TTS Multi-Speaker APIを使い、台本テキストから音声ファイルを生成する
 
-Multi-Speaker TTS により台本全体を1回のAPIコールで音声化するため、
-レート制限（Free Tier 3 RPM）の影響を受けない。
+Multi-Speaker TTS により台本をチャンク単位でまとめて音声化する。
+合成済みのチャンクは tts_cache に保存し、同じ内容のチャンクは API を呼ばずに再利用する。
+レート制限（Free Tier 3 RPM）は rate_limiter で送信前に守り、429 を待たずに済ませる。
 """
 
 import io
 import logging
 import re
-import time
 import wave
 import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timezone, timedelta
-from typing import List, Optional, Tuple
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from google import genai
 from google.genai import types
 
 import config
+from chunk_planner import StreamingChunker, plan_chunks
+from genai_client import get_client
+from pronunciation import Dictionary, load_dictionary
+from rate_limiter import limiter_for
+from retry import RetryPolicy
 from script_generator import Script, ScriptLine
+from token_budget import estimate_tokens, ledger
+from tts_cache import TTSChunkCache
 
 logger = logging.getLogger(__name__)
 
@@ -27,13 +38,20 @@ SAMPLE_RATE = 24000
 SAMPLE_WIDTH = 2  # 16-bit
 
 MAX_RETRIES = 3
-RETRY_DELAY = 30.0  # 429エラー時のリトライ待機秒数
+RETRY_BASE_DELAY = 15.0  # 429・5xx エラー時の初回リトライ待機秒数（以降は倍々に延ばす）
 SILENCE_PADDING_SEC = 2.0  # 末尾に追加する無音（秒）
 CHUNK_SILENCE_SEC = 0.5  # チャンク間の無音（秒）
-MAX_LINES_PER_CHUNK = 25  # 1チャンクあたりの最大行数（TTS出力上限を超えないよう分割）
 
 JST = timezone(timedelta(hours=9))
 
+# 読みアノテーション「語句（読み）」: グループ1が読み
+# 語句 = 漢字・英字・数字・記号・スペースの組み合わせ
+# 読み = ひらがな・カタカナ・長音・英字・スペースの組み合わせ
+_TERM = r'[\u4e00-\u9fff\u3400-\u4dbfA-Za-z0-9./_\-]+'
+READING_ANNOTATION = _TERM + r'(?:\s' + _TERM + r')*（([ぁ-ゟァ-ヿーA-Za-z\s]+)）'
+
+_LINE_SEPARATOR = '\x00'  # チャンクの行をまとめて処理するときの区切り（どのパターンにも一致しない）
+
 
 def get_daily_speakers() -> Tuple[str, str, str, str]:
     """曜日に応じたホスト・ゲスト情報を返す
@@ -49,10 +67,80 @@ def get_daily_speakers() -> Tuple[str, str, str, str]:
     return ("アオイ", config.TTS_VOICE_A, "タクミ", config.TTS_VOICE_B)
 
 
+class TTSTextPreprocessor:
+    """TTS向けのテキスト前処理を1回の走査で行う
+
+    - 読みアノテーション「語句（読み）」→「読み」
+    - ひらがな誤読パッチ: 誤読されやすい語句をカタカナ化（見出し語のトライで長い語から照合）
+
+    同じ位置ではアノテーションを優先するので、「Google（グーグル）」はパッチの対象にならず
+    「グーグル」になる。置換後のテキストは再照合しない。
+    """
+
+    def __init__(self, patches: Dict[str, str], trie: Optional[str] = None):
+        self.patches = patches
+        pattern = READING_ANNOTATION
+        if trie is not None:
+            pattern += '|(' + trie + ')'
+        self.pattern = re.compile(pattern)
+
+    def process(self, text: str) -> str:
+        patches = self.patches
+        return self.pattern.sub(
+            lambda m: m.group(1) if m.group(1) is not None else patches[m.group(2)], text,
+        )
+
+    def process_lines(self, texts: List[str]) -> List[str]:
+        """複数行をまとめて1回で処理する（行をまたいで一致することはない）"""
+        return self.process(_LINE_SEPARATOR.join(texts)).split(_LINE_SEPARATOR)
+
+
+class _OrderedChunkWriter:
+    """チャンクの音声合成を並列に進め、PCM を submit() した順に WAV へ書き込む
+
+    合成（とそのリトライ）はチャンクごとに独立して進み、先頭のチャンクが終わっていなければ
+    後続の PCM は書き込まずに保持する。チャンク間には silence を挟む。
+    例外で抜けた場合は、まだ始まっていない合成を取り消す。
+    """
+
+    def __init__(self, wf: wave.Wave_write, synthesize: Callable[..., bytes], silence: bytes):
+        self.wf = wf
+        self.synthesize = synthesize
+        self.silence = silence
+        self.written = 0
+        self._pending: Deque[Future[bytes]] = deque()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, config.TTS_MAX_CONCURRENCY), thread_name_prefix="tts",
+        )
+
+    def __enter__(self) -> "_OrderedChunkWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            for future in self._pending:
+                future.cancel()
+        self._executor.shutdown(wait=True)
+
+    def submit(self, *args: Any) -> None:
+        """チャンクの合成を始め、先頭から完了済みのチャンクを書き込む"""
+        self._pending.append(self._executor.submit(self.synthesize, *args))
+        self.flush(wait=False)
+
+    def flush(self, wait: bool = True) -> None:
+        """先頭から順に、完了したチャンクを書き込む（wait=True なら全チャンクを待つ）"""
+        while self._pending and (wait or self._pending[0].done()):
+            pcm = self._pending.popleft().result()
+            if self.written:
+                self.wf.writeframesraw(self.silence)  # チャンク間に短い無音
+            self.wf.writeframesraw(pcm)
+            self.written += 1
+
+
 class TTSGenerator:
     """Gemini Flash TTS Multi-Speaker APIで台本から音声ファイルを生成する
 
-    台本全体を1回のAPIコールで処理するため、レート制限の問題が発生しない。
+    長い台本はチャンクに分けて並列に合成し、レート制限は rate_limiter で送信前に守る。
     曜日ローテーションで7ペア×2人 = 14人の出演者を切り替える。
     """
 
@@ -64,8 +152,15 @@ class TTSGenerator:
         self.api_key = api_key or config.GEMINI_API_KEY
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY が設定されていません")
-        self.client = genai.Client(api_key=self.api_key)
+        self.client = get_client(self.api_key)
         self.model = config.TTS_MODEL
+        self.retry = RetryPolicy(
+            "TTS", self.model, max_attempts=MAX_RETRIES, base_delay=RETRY_BASE_DELAY,
+        )
+        self.rate_limiter = limiter_for(self.model)
+        self.chunk_cache = TTSChunkCache()
+        self._patches: Optional[Dictionary] = None
+        self._preprocessor: Optional[TTSTextPreprocessor] = None
 
         # 曜日ローテーションから取得（明示的に指定された場合はそちらを優先）
         daily = get_daily_speakers()
@@ -77,8 +172,8 @@ class TTSGenerator:
     def generate_audio(self, script: Script, output_path: str) -> str:
         """台本全体から音声ファイルを生成する（Multi-Speaker TTS）
 
-        台本が長い場合は自動的にチャンクに分割し、
-        それぞれをAPIコールして結合する。
+        台本が長い場合は読み上げ時間の揃ったチャンクに分割し（chunk_planner）、
+        TTS_MAX_CONCURRENCY 件まで並列にAPIコールして台本の順に結合する。
 
         Args:
             script: ScriptLineのリスト
@@ -92,8 +187,8 @@ class TTSGenerator:
 
         os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
 
-        # 台本をチャンクに分割
-        chunks = self._split_script(script, MAX_LINES_PER_CHUNK)
+        # 台本を読み上げ時間の揃ったチャンクに分割
+        chunks = plan_chunks(script, self._spoken_text)
 
         logger.info(
             "Multi-Speaker TTS生成開始 (ホスト=%s[%s], ゲスト=%s[%s], %d行, %dチャンク)",
@@ -101,50 +196,131 @@ class TTSGenerator:
             len(script), len(chunks),
         )
 
-        # 各チャンクを音声化して結合
-        all_pcm = b""
-        chunk_silence = self._generate_silence(CHUNK_SILENCE_SEC)
+        # 各チャンクを並列に音声化し、台本の順に WAV へ書き込む（全体を連結したバッファは持たない）
+        cache_stats = self.chunk_cache.stats()
+        with self._open_wav(output_path) as wf:
+            with _OrderedChunkWriter(wf, self._synthesize_chunk, self._generate_silence(CHUNK_SILENCE_SEC)) as writer:
+                for i, chunk in enumerate(chunks):
+                    writer.submit(chunk, i, len(chunks))
+                writer.flush()
 
-        for i, chunk in enumerate(chunks):
-            prompt = self._build_multi_speaker_prompt(chunk, chunk_index=i, total_chunks=len(chunks))
-            logger.info("  チャンク %d/%d (%d行) を生成中...", i + 1, len(chunks), len(chunk))
-            pcm_data = self._generate_with_retry(prompt)
-            if i > 0:
-                all_pcm += chunk_silence  # チャンク間に短い無音
-            all_pcm += pcm_data
+            # 末尾に無音を追加（ぶつ切り防止）
+            wf.writeframesraw(self._generate_silence(SILENCE_PADDING_SEC))
 
-        # 末尾に無音を追加（ぶつ切り防止）
-        all_pcm += self._generate_silence(SILENCE_PADDING_SEC)
-
-        # WAVファイルとして保存
-        self._save_audio(all_pcm, output_path)
+        self._log_cache_stats(cache_stats)
         logger.info("音声ファイル生成完了: %s", output_path)
         return output_path
 
-    @staticmethod
-    def _split_script(script: Script, max_lines: int) -> List[Script]:
-        """台本を max_lines 行以下のチャンクに分割する
+    def generate_audio_stream(self, lines: Iterable[ScriptLine], output_path: str) -> Script:
+        """生成中の台本を受け取りながら音声ファイルを生成する（ストリーミング）
 
-        話者Aの発話を区切りポイントとして利用し、
-        会話の途中で切れないようにする。
+        台本の行の受信（LLM のストリーミング生成）は別スレッドで進め、
+        StreamingChunker で読み上げ時間（TTS_CHUNK_TARGET_SEC 前後）ごとに区切り、
+        チャンクが揃った時点から TTS を呼ぶ（TTS_MAX_CONCURRENCY まで並列）。
+        台本の生成と音声合成が並行して進む。
+        行の受信中に例外が起きた場合はそのまま送出する（音声ファイルは作らない）。
+
+        Args:
+            lines: ScriptLine を順に返すイテラブル（ScriptGenerator.generate_script_stream など）
+            output_path: 出力ファイルパス (.wav)
+
+        Returns:
+            受け取った台本全体
         """
-        if len(script) <= max_lines:
-            return [script]
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+
+        received: "queue.Queue[object]" = queue.Queue()
+        stop = threading.Event()
+
+        def receive() -> None:
+            try:
+                for line in lines:
+                    if stop.is_set():
+                        return
+                    received.put(line)
+                received.put(None)
+            except BaseException as e:  # 受信側の例外はメインスレッドで送出する
+                received.put(e)
 
-        chunks: List[Script] = []
-        current: Script = []
+        threading.Thread(target=receive, name="script-stream", daemon=True).start()
+
+        logger.info(
+            "Multi-Speaker TTS生成開始 (ストリーミング, ホスト=%s[%s], ゲスト=%s[%s])",
+            self.host_name, self.voice_a, self.guest_name, self.voice_b,
+        )
 
-        for line in script:
-            current.append(line)
-            # max_linesに達し、話者Aの発話で区切る（次のトピックの導入になりやすい）
-            if len(current) >= max_lines and line.speaker == "A":
-                chunks.append(current)
-                current = []
+        script: Script = []
+        chunker = StreamingChunker(self._spoken_text)
+        chunk_index = 0
+        cache_stats = self.chunk_cache.stats()
+        try:
+            with self._open_wav(output_path) as wf, _OrderedChunkWriter(
+                wf, self._synthesize_chunk, self._generate_silence(CHUNK_SILENCE_SEC),
+            ) as writer:
+                while True:
+                    item = received.get()
+                    if isinstance(item, BaseException):
+                        raise item
+                    if item is None:
+                        chunk = chunker.flush()
+                    else:
+                        script.append(item)
+                        chunk = chunker.add(item)
+                    if chunk:
+                        writer.submit(chunk, chunk_index)
+                        chunk_index += 1
+                    if item is None:
+                        break
+                writer.flush()
+
+                if not script:
+                    raise ValueError("台本が空です")
+
+                # 末尾に無音を追加（ぶつ切り防止）
+                wf.writeframesraw(self._generate_silence(SILENCE_PADDING_SEC))
+        finally:
+            stop.set()
+
+        self._log_cache_stats(cache_stats)
+        logger.info("音声ファイル生成完了: %s (%d行, %dチャンク)", output_path, len(script), chunk_index)
+        return script
+
+    def _synthesize_chunk(self, chunk: Script, chunk_index: int,
+                          total_chunks: Optional[int] = None) -> bytes:
+        """チャンク1つを音声化してPCMデータを返す（total_chunks が不明なら None）
+
+        モデル・話者と音声・プロンプト（演出指示と読み上げテキスト）が同じチャンクは
+        キャッシュから返す。
+        """
+        prompt = self._build_multi_speaker_prompt(chunk, chunk_index=chunk_index, total_chunks=total_chunks)
+        key = self.chunk_cache.make_key(
+            self.model, (self.host_name, self.voice_a, self.guest_name, self.voice_b), prompt,
+        )
+        pcm = self.chunk_cache.get(key)
+        if pcm is not None:
+            logger.info(
+                "  チャンク %d/%s (%d行): キャッシュを使用",
+                chunk_index + 1, total_chunks or "?", len(chunk),
+            )
+            return pcm
 
-        if current:
-            chunks.append(current)
+        logger.info(
+            "  チャンク %d/%s (%d行) を生成中...",
+            chunk_index + 1, total_chunks or "?", len(chunk),
+        )
+        pcm = self._generate_with_retry(prompt)
+        self.chunk_cache.put(key, pcm)
+        return pcm
 
-        return chunks
+    def _log_cache_stats(self, before: Tuple[int, int]) -> None:
+        """今回の生成でのチャンクキャッシュのヒット・ミス数をログに出し、古いエントリを整理する"""
+        hits, misses = self.chunk_cache.stats()
+        logger.info("TTSチャンクキャッシュ: ヒット %d / ミス %d", hits - before[0], misses - before[1])
+        self.chunk_cache.prune()
+
+    def _spoken_text(self, line: ScriptLine) -> str:
+        """行の実際に読み上げるテキスト（チャンクの長さの見積もり用）"""
+        return self._prepare_for_tts(line.text)
 
     @staticmethod
     def _generate_silence(seconds: float) -> bytes:
@@ -165,25 +341,27 @@ Pronunciation:
 ### TRANSCRIPT
 """
 
-    def _build_multi_speaker_prompt(self, script: Script, chunk_index: int = 0, total_chunks: int = 1) -> str:
+    def _build_multi_speaker_prompt(self, script: Script, chunk_index: int = 0,
+                                    total_chunks: Optional[int] = 1) -> str:
         """台本を Multi-Speaker TTS プロンプトに変換する
 
         台本中の speaker:"A" をホスト名、"B" をゲスト名にマッピング。
         英字固有名詞はカタカナ読みに置換して TTS の誤読を防ぐ。
         複数チャンクの場合、Voice継続指示を追加して声の一貫性を保つ。
         """
-        lines = []
-        for line in script:
-            name = self.host_name if line.speaker == "A" else self.guest_name
-            text = self._prepare_for_tts(line.text)
-            lines.append(f"{name}: {text}")
-        transcript = "\n".join(lines)
+        texts = self._text_preprocessor().process_lines([line.text for line in script])
+        transcript = "\n".join(
+            f"{self.host_name if line.speaker == 'A' else self.guest_name}: {text}"
+            for line, text in zip(script, texts)
+        )
         prompt = self.DIRECTOR_NOTES_TEMPLATE + transcript
 
         # 複数チャンクの2つ目以降: 前チャンクとの声の一貫性を保つ指示
-        if total_chunks > 1 and chunk_index > 0:
+        # （ストリーミング生成ではチャンク総数が未確定のため total_chunks=None）
+        if chunk_index > 0:
+            part = f"{chunk_index + 1} of {total_chunks}" if total_chunks else f"{chunk_index + 1}"
             continuity_note = (
-                f"\n(Note: This is part {chunk_index + 1} of {total_chunks}. "
+                f"\n(Note: This is part {part}. "
                 "Continue with the same tone, pace, and energy as the previous part. "
                 "Do not add greetings or introductions.)\n\n"
             )
@@ -191,71 +369,25 @@ Pronunciation:
 
         return prompt
 
-    # TTS誤読パッチ: ひらがな基本語でGemini TTSが誤読しやすい語句をカタカナ化
-    # カタカナの方がTTSの発音精度が高い傾向がある
-    TTS_KANA_PATCHES = {
-        # 挨拶・定型句
-        "よろしくお願いします": "ヨロシクオネガイシマス",
-        "よろしくお願いいたします": "ヨロシクオネガイイタシマス",
-        "おはようございます": "オハヨウゴザイマス",
-        "ありがとうございます": "アリガトウゴザイマス",
-        "ありがとうございました": "アリガトウゴザイマシタ",
-        "お会いしましょう": "オアイシマショウ",
-        "いきましょう": "イキマショウ",
-        "よろしくお願いしますね": "ヨロシクオネガイシマスネ",
-        # 相槌・会話表現
-        "なるほど": "ナルホド",
-        "そうですね": "ソウデスネ",
-        "たしかに": "タシカニ",
-        "おっしゃる通り": "オッシャルトオリ",
-        # TTS誤読する固有名詞（PRONUNCIATION_MAPで置換後も残るケースの安全策）
-        "Google": "グーグル",
-    }
-
     def _prepare_for_tts(self, text: str) -> str:
-        """テキストをTTS向けに前処理する
+        """テキストをTTS向けに前処理する（TTSTextPreprocessor）
 
-        1. ひらがな誤読パッチ: 誤読されやすい語句をカタカナ化
-        2. 読みアノテーション除去: 「語句（読み）」→「読み」のみ
+        1. 読みアノテーション除去: 「語句（読み）」→「読み」のみ
+        2. ひらがな誤読パッチ（config.TTS_KANA_PATCHES_PATH）: 誤読されやすい語句をカタカナ化
         """
-        # 1. ひらがな誤読パッチ（長い語句から先にマッチ）
-        for hiragana, katakana in sorted(
-            self.TTS_KANA_PATCHES.items(), key=lambda x: len(x[0]), reverse=True
-        ):
-            text = text.replace(hiragana, katakana)
-
-        # 2. 語句（読み）→ 読みのみ
-        # 語句 = 漢字・英字・数字・記号・スペースの組み合わせ
-        # 読み = ひらがな・カタカナ・長音・英字・スペースの組み合わせ
-        text = re.sub(
-            r'[\u4e00-\u9fff\u3400-\u4dbfA-Za-z0-9./_\-]+(?:\s[\u4e00-\u9fff\u3400-\u4dbfA-Za-z0-9./_\-]+)*（([ぁ-ゟァ-ヿーA-Za-z\s]+)）',
-            r'\1',
-            text,
-        )
-        return text
+        return self._text_preprocessor().process(text)
+
+    def _text_preprocessor(self) -> TTSTextPreprocessor:
+        """前処理器を返す（パッチ辞書が更新されたときだけ正規表現をコンパイルし直す）"""
+        patches = load_dictionary(config.TTS_KANA_PATCHES_PATH)
+        if self._preprocessor is None or patches is not self._patches:
+            self._preprocessor = TTSTextPreprocessor(patches.entries, patches.trie)
+            self._patches = patches
+        return self._preprocessor
 
     def _generate_with_retry(self, prompt: str) -> bytes:
-        """リトライ付き Multi-Speaker TTS API 呼び出し"""
-        for attempt in range(MAX_RETRIES):
-            try:
-                if attempt > 0:
-                    wait = RETRY_DELAY * attempt
-                    logger.info("  リトライ待機: %.0f秒...", wait)
-                    time.sleep(wait)
-
-                return self._call_tts_api(prompt)
-
-            except Exception as e:
-                err_str = str(e)
-                if "429" in err_str or "RESOURCE_EXHAUSTED" in err_str:
-                    if attempt < MAX_RETRIES - 1:
-                        logger.warning(
-                            "  レート制限 (試行%d/%d)、リトライします",
-                            attempt + 1, MAX_RETRIES,
-                        )
-                        continue
-                raise
-        raise RuntimeError(f"TTS生成に{MAX_RETRIES}回失敗しました")
+        """リトライ・レート制限付き Multi-Speaker TTS API 呼び出し（429・5xx は待機して再試行）"""
+        return self.retry.call(self.rate_limiter.call, estimate_tokens(prompt), self._call_tts_api, prompt)
 
     def _call_tts_api(self, prompt: str) -> bytes:
         """Multi-Speaker TTS API 呼び出し→PCMバイナリを返す"""
@@ -289,6 +421,8 @@ Pronunciation:
             ),
         )
 
+        ledger.record("TTS", estimate_tokens(prompt), response)
+
         # レスポンスから音声データ取得
         part = response.candidates[0].content.parts[0]
         if not hasattr(part, 'inline_data') or part.inline_data is None:
@@ -316,14 +450,30 @@ Pronunciation:
             logger.warning("WAVヘッダー解析失敗、生データとして扱います")
             return wav_bytes
 
-    def _save_audio(self, pcm_data: bytes, output_path: str) -> str:
-        """PCMデータをWAVファイルとして保存する"""
-        with wave.open(output_path, 'wb') as wf:
+    @staticmethod
+    @contextmanager
+    def _open_wav(output_path: str) -> Iterator[wave.Wave_write]:
+        """書き込み用の WAV を開く（PCM は writeframesraw() でチャンクごとに追記する）
+
+        一時ファイルに書き、正常に閉じられたときだけ output_path に置き換える。
+        途中で例外が起きた場合は一時ファイルを削除し、書きかけの音声を残さない。
+        """
+        tmp_path = output_path + ".part"
+        wf = wave.open(tmp_path, 'wb')
+        try:
             wf.setnchannels(1)        # mono
             wf.setsampwidth(SAMPLE_WIDTH)  # 16-bit
             wf.setframerate(SAMPLE_RATE)   # 24kHz
-            wf.writeframes(pcm_data)
-        return output_path
+            yield wf
+            wf.close()  # ヘッダーのデータ長をここで確定する
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            wf.close()
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
 
 
 if __name__ == "__main__":